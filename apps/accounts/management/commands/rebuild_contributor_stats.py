@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.accounts.models import ContributorStats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcular os contadores de ContributorStats (lugares aprovados, "
+        "avaliações e favoritos recebidos) a partir dos dados existentes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "user_ids",
+            nargs="*",
+            type=int,
+            help="IDs dos usuários (padrão: todos)",
+        )
+
+    def handle(self, *args, **options):
+        user_ids = options["user_ids"] or None
+        with transaction.atomic():
+            count = ContributorStats.rebuild(user_ids)
+        self.stdout.write(
+            self.style.SUCCESS(f"Contadores recalculados para {count} usuários")
+        )
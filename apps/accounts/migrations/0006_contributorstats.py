@@ -0,0 +1,119 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_contributor_stats(apps, schema_editor):
+    """Calcular os contadores dos usuários existentes"""
+    User = apps.get_model("accounts", "User")
+    Place = apps.get_model("explore", "Place")
+    PlaceReview = apps.get_model("explore", "PlaceReview")
+    Favorite = apps.get_model("explore", "Favorite")
+    ContributorStats = apps.get_model("accounts", "ContributorStats")
+
+    def totals(queryset, field):
+        return dict(
+            queryset.values(field)
+            .annotate(count=models.Count("id"))
+            .order_by()
+            .values_list(field, "count")
+        )
+
+    place_totals = totals(
+        Place.objects.filter(is_approved=True, is_active=True), "created_by_id"
+    )
+    review_totals = totals(PlaceReview.objects.all(), "user_id")
+    favorite_totals = totals(Favorite.objects.all(), "place__created_by_id")
+
+    ContributorStats.objects.bulk_create(
+        [
+            ContributorStats(
+                user_id=user_id,
+                approved_places=place_totals.get(user_id, 0),
+                reviews_written=review_totals.get(user_id, 0),
+                favorites_received=favorite_totals.get(user_id, 0),
+            )
+            for user_id in User.objects.values_list("id", flat=True)
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0005_remove_profile_picture"),
+        ("explore", "0015_placecard"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ContributorStats",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        help_text="Usuário ao qual os contadores pertencem",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="contributor_stats",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "approved_places",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Lugares aprovados e ativos criados pelo usuário",
+                    ),
+                ),
+                (
+                    "reviews_written",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Avaliações escritas pelo usuário"
+                    ),
+                ),
+                (
+                    "favorites_received",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Favoritos recebidos pelos lugares do usuário",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Estatísticas de Contribuidor",
+                "verbose_name_plural": "Estatísticas de Contribuidores",
+                "indexes": [
+                    models.Index(
+                        fields=[
+                            "-approved_places",
+                            "-reviews_written",
+                            "-favorites_received",
+                        ],
+                        name="contributor_places_idx",
+                    ),
+                    models.Index(
+                        fields=[
+                            "-reviews_written",
+                            "-approved_places",
+                            "-favorites_received",
+                        ],
+                        name="contributor_reviews_idx",
+                    ),
+                    models.Index(
+                        fields=[
+                            "-favorites_received",
+                            "-approved_places",
+                            "-reviews_written",
+                        ],
+                        name="contributor_favorites_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(fill_contributor_stats, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
@@ -38,3 +39,136 @@ class User(AbstractUser):
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+
+# Ordenações do ranking de contribuidores (cada uma com um índice em
+# ContributorStats): critério principal seguido dos desempates
+LEADERBOARD_ORDERINGS = {
+    "places": ("-approved_places", "-reviews_written", "-favorites_received"),
+    "reviews": ("-reviews_written", "-approved_places", "-favorites_received"),
+    "favorites": ("-favorites_received", "-approved_places", "-reviews_written"),
+}
+
+
+class ContributorStats(models.Model):
+    """
+    Contadores desnormalizados das contribuições de um usuário
+    Atualizados de forma incremental pelos sinais do explore (aprovação de
+    lugares, avaliações e favoritos); rebuild() recalcula tudo
+    """
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="contributor_stats",
+        help_text="Usuário ao qual os contadores pertencem",
+    )
+
+    approved_places = models.PositiveIntegerField(
+        default=0, help_text="Lugares aprovados e ativos criados pelo usuário"
+    )
+
+    reviews_written = models.PositiveIntegerField(
+        default=0, help_text="Avaliações escritas pelo usuário"
+    )
+
+    favorites_received = models.PositiveIntegerField(
+        default=0, help_text="Favoritos recebidos pelos lugares do usuário"
+    )
+
+    class Meta:
+        verbose_name = "Estatísticas de Contribuidor"
+        verbose_name_plural = "Estatísticas de Contribuidores"
+        indexes = [
+            models.Index(fields=list(ordering), name=f"contributor_{name}_idx")
+            for name, ordering in LEADERBOARD_ORDERINGS.items()
+        ]
+
+    def __str__(self):
+        return f"Contributions of user {self.user_id}"
+
+    @classmethod
+    def apply(cls, user_id, places=0, reviews=0, favorites=0):
+        """
+        Aplicar variações aos contadores em um único UPDATE atômico (F())
+        Retorna False se o usuário ainda não tem registro de contadores
+        """
+        updated = cls.objects.filter(user_id=user_id).update(
+            approved_places=models.F("approved_places") + places,
+            reviews_written=models.F("reviews_written") + reviews,
+            favorites_received=models.F("favorites_received") + favorites,
+        )
+        return bool(updated)
+
+    @classmethod
+    def leaderboard(cls, order="places"):
+        """
+        Os LEADERBOARD_SIZE usuários ativos com mais contribuições, na ordem
+        de LEADERBOARD_ORDERINGS[order], como lista de dicionários
+        """
+        return list(
+            cls.objects.filter(user__is_active=True)
+            .filter(
+                models.Q(approved_places__gt=0)
+                | models.Q(reviews_written__gt=0)
+                | models.Q(favorites_received__gt=0)
+            )
+            .order_by(*LEADERBOARD_ORDERINGS[order], "user_id")
+            .values(
+                "user_id",
+                "user__username",
+                "approved_places",
+                "reviews_written",
+                "favorites_received",
+            )[: settings.LEADERBOARD_SIZE]
+        )
+
+    @classmethod
+    def rebuild(cls, user_ids=None):
+        """
+        Recalcular os contadores a partir dos lugares, avaliações e favoritos
+        Sem user_ids, recalcula todos os usuários; retorna o número de registros
+        """
+        from apps.explore.models import Favorite, Place, PlaceReview
+
+        users = User.objects.all()
+        places = Place.objects.filter(is_approved=True, is_active=True)
+        reviews = PlaceReview.objects.all()
+        favorites = Favorite.objects.all()
+        if user_ids is not None:
+            users = users.filter(id__in=user_ids)
+            places = places.filter(created_by_id__in=user_ids)
+            reviews = reviews.filter(user_id__in=user_ids)
+            favorites = favorites.filter(place__created_by_id__in=user_ids)
+
+        # Consultas agrupadas separadas para não multiplicar as linhas nas junções
+        def totals(queryset, field):
+            return dict(
+                queryset.values(field)
+                .annotate(count=models.Count("id"))
+                .order_by()
+                .values_list(field, "count")
+            )
+
+        place_totals = totals(places, "created_by_id")
+        review_totals = totals(reviews, "user_id")
+        favorite_totals = totals(favorites, "place__created_by_id")
+
+        stats = [
+            cls(
+                user_id=user_id,
+                approved_places=place_totals.get(user_id, 0),
+                reviews_written=review_totals.get(user_id, 0),
+                favorites_received=favorite_totals.get(user_id, 0),
+            )
+            for user_id in users.values_list("id", flat=True).iterator()
+        ]
+        cls.objects.bulk_create(
+            stats,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["user"],
+            update_fields=["approved_places", "reviews_written", "favorites_received"],
+        )
+        return len(stats)
@@ -1,7 +1,15 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import Client, TestCase
 from django.urls import reverse
 
+from apps.explore.models import Favorite, Place, PlaceReview
+
+from .models import ContributorStats
+
 User = get_user_model()
 
 
@@ -199,3 +207,168 @@ class AuthenticationViewTests(TestCase):
         """Testa que o ID do cliente Google OAuth é passado para a página de registro"""
         response = self.client.get(reverse("accounts:register"))
         self.assertIn("google_client_id", response.context)
+
+
+class ContributorStatsTests(TestCase):
+    """Testes dos contadores de contribuição mantidos pelos sinais"""
+
+    def setUp(self):
+        self.creator = User.objects.create_user(username="creator", password="pass")
+        self.other = User.objects.create_user(username="other", password="pass")
+        self.place = Place.objects.create(
+            name="Praia",
+            description="Descrição",
+            address="Endereço",
+            created_by=self.creator,
+        )
+
+    def _stats(self, user):
+        stats = ContributorStats.objects.filter(user=user).first()
+        if stats is None:
+            return (0, 0, 0)
+        return (stats.approved_places, stats.reviews_written, stats.favorites_received)
+
+    def _assert_matches_rebuild(self):
+        current = {user.pk: self._stats(user) for user in (self.creator, self.other)}
+        ContributorStats.rebuild()
+        rebuilt = {user.pk: self._stats(user) for user in (self.creator, self.other)}
+        self.assertEqual(current, rebuilt)
+
+    def test_approval_counts_place(self):
+        """Testa que apenas lugares aprovados e ativos contam"""
+        self.assertEqual(self._stats(self.creator)[0], 0)
+        self.place.is_approved = True
+        self.place.save()
+        self.assertEqual(self._stats(self.creator)[0], 1)
+
+        self.place.is_active = False
+        self.place.save()
+        self.assertEqual(self._stats(self.creator)[0], 0)
+        self._assert_matches_rebuild()
+
+    def test_reviews_and_favorites(self):
+        """Testa avaliações escritas e favoritos recebidos"""
+        self.place.is_approved = True
+        self.place.save()
+        review = PlaceReview.objects.create(
+            place=self.place, user=self.other, rating=5, comment="Ótimo"
+        )
+        favorite = Favorite.objects.create(user=self.other, place=self.place)
+        self.assertEqual(self._stats(self.other), (0, 1, 0))
+        self.assertEqual(self._stats(self.creator), (1, 0, 1))
+
+        review.delete()
+        favorite.delete()
+        self.assertEqual(self._stats(self.other), (0, 0, 0))
+        self.assertEqual(self._stats(self.creator), (1, 0, 0))
+
+    def test_creator_change_moves_counters(self):
+        """Testa que trocar o criador transfere o lugar e seus favoritos"""
+        self.place.is_approved = True
+        self.place.save()
+        Favorite.objects.create(user=self.other, place=self.place)
+
+        self.place.created_by = self.other
+        self.place.save()
+        self.assertEqual(self._stats(self.creator), (0, 0, 0))
+        self.assertEqual(self._stats(self.other), (1, 0, 1))
+        self._assert_matches_rebuild()
+
+    def test_place_deletion(self):
+        """Testa que excluir um lugar desconta o lugar e os favoritos"""
+        self.place.is_approved = True
+        self.place.save()
+        Favorite.objects.create(user=self.other, place=self.place)
+        PlaceReview.objects.create(
+            place=self.place, user=self.other, rating=4, comment="Bom"
+        )
+        self.place.delete()
+        self.assertEqual(self._stats(self.creator), (0, 0, 0))
+        self.assertEqual(self._stats(self.other), (0, 0, 0))
+
+    def test_user_deletion_cascades(self):
+        """Testa que excluir um contribuidor não recria seus contadores"""
+        self.place.is_approved = True
+        self.place.save()
+        Favorite.objects.create(user=self.other, place=self.place)
+        self.creator.delete()
+        self.assertFalse(ContributorStats.objects.filter(user_id=self.creator.pk))
+        self.assertEqual(self._stats(self.other), (0, 0, 0))
+
+    def test_rebuild_command(self):
+        """Testa o comando rebuild_contributor_stats"""
+        PlaceReview.objects.create(
+            place=self.place, user=self.other, rating=4, comment="Bom"
+        )
+        ContributorStats.objects.all().delete()
+        out = StringIO()
+        call_command("rebuild_contributor_stats", stdout=out)
+        self.assertIn("2 usuários", out.getvalue())
+        self.assertEqual(self._stats(self.other), (0, 1, 0))
+
+
+class ContributorsViewTests(TestCase):
+    """Testes da página pública de principais contribuidores"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.url = reverse("accounts:contributors")
+        self.users = [
+            User.objects.create_user(username=f"user{index}", password="pass")
+            for index in range(3)
+        ]
+        # user0: 2 lugares; user1: 1 lugar e 2 avaliações; user2: nada
+        for index, creator in enumerate([self.users[0], self.users[0], self.users[1]]):
+            place = Place.objects.create(
+                name=f"Lugar {index}",
+                description="Descrição",
+                address="Endereço",
+                created_by=creator,
+                is_approved=True,
+            )
+            if index < 2:
+                PlaceReview.objects.create(
+                    place=place, user=self.users[1], rating=5, comment="Ótimo"
+                )
+
+    def _usernames(self, response):
+        return [row["user__username"] for row in response.context["contributors"]]
+
+    def test_ranking_by_places(self):
+        """Testa a ordenação padrão e que usuários sem contribuições ficam fora"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "accounts/contributors.html")
+        self.assertEqual(self._usernames(response), ["user0", "user1"])
+
+    def test_ranking_by_reviews(self):
+        """Testa a ordenação por avaliações escritas"""
+        response = self.client.get(self.url, {"order": "reviews"})
+        self.assertEqual(self._usernames(response), ["user1", "user0"])
+
+    def test_inactive_users_are_hidden(self):
+        """Testa que usuários desativados não aparecem no ranking"""
+        self.users[0].is_active = False
+        self.users[0].save()
+        response = self.client.get(self.url)
+        self.assertEqual(self._usernames(response), ["user1"])
+
+    def test_anonymous_ranking_is_cached(self):
+        """Testa que visitantes anônimos recebem o ranking em cache"""
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+    def test_authenticated_ranking_is_fresh(self):
+        """Testa que usuários autenticados veem os contadores atuais"""
+        self.client.get(self.url)
+        PlaceReview.objects.create(
+            place=Place.objects.get(name="Lugar 2"),
+            user=self.users[2],
+            rating=3,
+            comment="Ok",
+        )
+        self.client.login(username="user2", password="pass")
+        response = self.client.get(self.url)
+        self.assertIn("user2", self._usernames(response))
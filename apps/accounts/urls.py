@@ -8,6 +8,7 @@ urlpatterns = [
     path("register/", views.register_view, name="register"),
     path("login/", views.login_view, name="login"),
     path("logout/", views.logout_view, name="logout"),
+    path("contribuidores/", views.contributors_view, name="contributors"),
     path("usuarios/", views.user_management_view, name="user_management"),
     path(
         "usuarios/<int:user_id>/tipo/",
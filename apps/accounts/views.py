@@ -2,12 +2,13 @@ from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
-from django.db.models import Count, Q
+from django.core.cache import cache
+from django.db.models import Q
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
 from .forms import UserRegistrationForm
-from .models import User
+from .models import LEADERBOARD_ORDERINGS, ContributorStats, User
 
 
 def register_view(request):
@@ -96,6 +97,33 @@ def logout_view(request):
     return redirect("core:landing")
 
 
+def contributors_view(request):
+    """
+    Ranking público dos usuários que mais contribuem: lugares aprovados,
+    avaliações escritas e favoritos recebidos (?order=places|reviews|favorites)
+    Servido pelos índices de ContributorStats; para visitantes anônimos o
+    ranking fica em cache por LEADERBOARD_CACHE_TIMEOUT segundos
+    """
+    order = request.GET.get("order", "")
+    if order not in LEADERBOARD_ORDERINGS:
+        order = "places"
+
+    if request.user.is_authenticated:
+        contributors = ContributorStats.leaderboard(order)
+    else:
+        key = f"accounts:leaderboard:{order}"
+        contributors = cache.get(key)
+        if contributors is None:
+            contributors = ContributorStats.leaderboard(order)
+            cache.set(key, contributors, settings.LEADERBOARD_CACHE_TIMEOUT)
+
+    context = {
+        "contributors": contributors,
+        "order": order,
+    }
+    return render(request, "accounts/contributors.html", context)
+
+
 # Views de Gerenciamento de Usuários Admin
 @login_required
 def user_management_view(request):
@@ -109,11 +137,8 @@ def user_management_view(request):
     status_filter = request.GET.get("status", "")
     search_query = request.GET.get("q", "")
 
-    # Queryset base com estatísticas
-    users = User.objects.annotate(
-        places_count=Count("places", distinct=True),
-        reviews_count=Count("place_reviews_written", distinct=True),
-    ).select_related()
+    # Queryset base (a página não exibe contagens de lugares e avaliações)
+    users = User.objects.all()
 
     # Aplicar filtros
     if role_filter == "staff":
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.core.search import SEARCH_BACKENDS, get_backend, registered_documents
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruir o índice de busca de lugares e notícias no backend "
+        "configurado (SEARCH_BACKEND), por exemplo após trocar de backend ou "
+        "alterar a análise de texto ou os pesos dos campos"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--backend",
+            choices=["auto", *SEARCH_BACKENDS],
+            help="Backend a reconstruir (padrão: SEARCH_BACKEND)",
+        )
+        parser.add_argument(
+            "--model",
+            nargs="+",
+            help="Modelos a reindexar, como explore.place (padrão: todos)",
+        )
+
+    def handle(self, *args, **options):
+        backend = get_backend(options["backend"])
+        for document in registered_documents():
+            label = document.model._meta.label_lower
+            if options["model"] and label not in options["model"]:
+                continue
+
+            # Limpeza e reindexação na mesma transação: até o commit, as buscas
+            # continuam vendo o índice anterior completo, e não um parcial
+            with transaction.atomic():
+                ids = list(
+                    document.model.objects.order_by("pk").values_list("pk", flat=True)
+                )
+                backend.clear(document)
+                for start in range(0, len(ids), BATCH_SIZE):
+                    backend.index(document, ids[start : start + BATCH_SIZE])
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{label}: {len(ids)} documentos indexados ({backend.name})"
+                )
+            )
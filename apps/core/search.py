@@ -0,0 +1,315 @@
+"""
+Busca textual com backends intercambiáveis (settings.SEARCH_BACKEND)
+Cada app registra seus documentos (modelo, campos com pesos e como carregar o
+texto de cada objeto) e usa search(), index_documents() e remove_documents();
+o backend decide onde fica o índice:
+- "icontains": sem índice, filtros icontains nos campos (caminho de referência)
+- "terms": índice invertido em tabela comum (PlaceSearchTerm), portátil
+- "fts5": tabela virtual FTS5 do SQLite por modelo (<tabela>_fts)
+- "postgres": coluna tsvector com índice GIN na própria tabela do modelo
+- "auto": o backend nativo do banco em uso ou, sem ele, "terms"
+Apenas o índice do backend ativo é mantido pelos sinais: com "auto" no SQLite
+com FTS5 ou no PostgreSQL, PlaceSearchTerm fica vazio; ele existe para bancos
+sem índice nativo (SQLite sem FTS5, outros bancos) e para quem fixa "terms"
+Os backends com índice gravam e consultam o texto já analisado por
+text.analyze (sem acentos, sem palavras vazias e reduzido ao radical), então
+todos encontram os mesmos documentos; a última palavra casa por prefixo
+"""
+
+import sqlite3
+from collections import namedtuple
+from functools import cache, reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .text import analyze
+
+# model: classe do modelo indexado
+# weights: {campo: peso}, na ordem das colunas do índice
+# texts: função (ids) -> {id: {campo: texto}}
+# lookups: caminhos de campo usados pelo backend "icontains"
+# term_index: TermIndex do backend "terms" (None: usa icontains)
+SearchDocument = namedtuple(
+    "SearchDocument", ["model", "weights", "texts", "lookups", "term_index"]
+)
+
+# search: função (queryset, consulta) -> queryset anotado com "relevance"
+# index: função (ids) -> reindexa os objetos
+TermIndex = namedtuple("TermIndex", ["search", "index"])
+
+# Backends tentados por "auto", em ordem
+AUTO_BACKENDS = ("fts5", "postgres", "terms")
+
+# Coluna tsvector do backend "postgres" e rótulos de peso na ordem dos campos
+TSVECTOR_COLUMN = "search_vector"
+TSVECTOR_LABELS = "ABCD"
+
+_documents = {}
+
+
+def register_document(model, weights, texts, lookups, term_index=None):
+    """Registrar um modelo buscável (ver SearchDocument)"""
+    document = SearchDocument(model, weights, texts, lookups, term_index)
+    _documents[model] = document
+    return document
+
+
+def get_document(model):
+    return _documents[model]
+
+
+def registered_documents():
+    return list(_documents.values())
+
+
+def analyzed_texts(document, ids):
+    """Texto analisado de cada campo: {id: [radicais do campo, ...]}"""
+    return {
+        object_id: [
+            " ".join(analyze(texts.get(field, ""))) for field in document.weights
+        ]
+        for object_id, texts in document.texts(ids).items()
+    }
+
+
+def fts5_table(model):
+    return f"{model._meta.db_table}_fts"
+
+
+@cache
+def sqlite_has_fts5():
+    """Verificar se o SQLite deste processo foi compilado com FTS5"""
+    with sqlite3.connect(":memory:") as db:
+        options = {row[0] for row in db.execute("PRAGMA compile_options")}
+    return "ENABLE_FTS5" in options
+
+
+def _empty(queryset):
+    # Consulta sem palavras buscáveis: nenhum resultado, ainda com "relevance"
+    return queryset.annotate(relevance=Value(0.0)).none()
+
+
+def _query_terms(query):
+    """Radicais distintos da consulta; o último casa por prefixo"""
+    return list(dict.fromkeys(analyze(query)))
+
+
+class SearchBackend:
+    """Interface dos backends: buscar, indexar e remover documentos"""
+
+    name = None
+
+    def is_available(self):
+        return True
+
+    def search(self, document, queryset, query):
+        """Restringir o queryset à consulta e anotar "relevance" (maior = melhor)"""
+        raise NotImplementedError
+
+    def index(self, document, ids):
+        """Reindexar os objetos (criados ou alterados)"""
+
+    def remove(self, document, ids):
+        """Remover os objetos excluídos do índice"""
+
+    def clear(self, document):
+        """Esvaziar o índice do modelo (antes de reconstruí-lo)"""
+
+
+class IContainsBackend(SearchBackend):
+    """Sem índice: a consulta inteira em icontains (varredura completa)"""
+
+    name = "icontains"
+
+    def search(self, document, queryset, query):
+        query = query.strip()
+        if not query:
+            return _empty(queryset)
+        condition = reduce(
+            or_, (Q(**{f"{lookup}__icontains": query}) for lookup in document.lookups)
+        )
+        return queryset.filter(condition).distinct().annotate(relevance=Value(0.0))
+
+
+class TermIndexBackend(SearchBackend):
+    """Índice invertido em tabela comum, mantido pelo próprio app"""
+
+    name = "terms"
+
+    def search(self, document, queryset, query):
+        if document.term_index is None:
+            return IContainsBackend().search(document, queryset, query)
+        return document.term_index.search(queryset, query)
+
+    def index(self, document, ids):
+        if document.term_index is not None:
+            document.term_index.index(ids)
+
+
+class FTS5Backend(SearchBackend):
+    """
+    Tabela virtual FTS5 por modelo, com uma coluna por campo e rowid igual ao
+    id do objeto; relevância pelo bm25 com os pesos dos campos
+    """
+
+    name = "fts5"
+
+    def is_available(self):
+        return connection.vendor == "sqlite" and sqlite_has_fts5()
+
+    def index(self, document, ids):
+        texts = analyzed_texts(document, set(ids))
+        self.remove(document, texts)
+        if not texts:
+            return
+        table = connection.ops.quote_name(fts5_table(document.model))
+        columns = ", ".join(document.weights)
+        placeholders = ", ".join(["%s"] * (len(document.weights) + 1))
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {table} (rowid, {columns}) VALUES ({placeholders})",
+                [(object_id, *fields) for object_id, fields in texts.items()],
+            )
+
+    def remove(self, document, ids):
+        ids = list(ids)
+        if not ids:
+            return
+        table = connection.ops.quote_name(fts5_table(document.model))
+        placeholders = ", ".join(["%s"] * len(ids))
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table} WHERE rowid IN ({placeholders})", ids)
+
+    def clear(self, document):
+        table = connection.ops.quote_name(fts5_table(document.model))
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table}")
+
+    def search(self, document, queryset, query):
+        terms = _query_terms(query)
+        if not terms:
+            return _empty(queryset)
+        *exact, prefix = terms
+        expression = " ".join([*(f'"{term}"' for term in exact), f'"{prefix}"*'])
+
+        quote = connection.ops.quote_name
+        table = quote(fts5_table(document.model))
+        meta = document.model._meta
+        pk = f"{quote(meta.db_table)}.{quote(meta.pk.column)}"
+        weights = ", ".join(str(weight) for weight in document.weights.values())
+        # A tabela FTS5 entra na própria consulta (sem modelo no Django), então
+        # o MATCH é avaliado uma vez e conduz a busca pelo rowid dos objetos;
+        # bm25 é negativo (menor = melhor)
+        return queryset.extra(
+            tables=[fts5_table(document.model)],
+            where=[f"{table}.rowid = {pk}", f"{table} MATCH %s"],
+            params=[expression],
+            select={"relevance": f"-bm25({table}, {weights})"},
+        )
+
+
+class PostgresBackend(SearchBackend):
+    """
+    Coluna tsvector (TSVECTOR_COLUMN) com índice GIN na tabela do modelo,
+    com os campos rotulados A, B, C... na ordem de peso; configuração "simple"
+    porque o texto já chega analisado; relevância pelo ts_rank com os pesos
+    """
+
+    name = "postgres"
+
+    def is_available(self):
+        return connection.vendor == "postgresql"
+
+    def index(self, document, ids):
+        texts = analyzed_texts(document, set(ids))
+        if not texts:
+            return
+        quote = connection.ops.quote_name
+        meta = document.model._meta
+        vector = " || ".join(
+            f"setweight(to_tsvector('simple', %s), '{label}')"
+            for label in TSVECTOR_LABELS[: len(document.weights)]
+        )
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"UPDATE {quote(meta.db_table)} SET {TSVECTOR_COLUMN} = {vector} "
+                f"WHERE {quote(meta.pk.column)} = %s",
+                [(*fields, object_id) for object_id, fields in texts.items()],
+            )
+
+    def search(self, document, queryset, query):
+        terms = _query_terms(query)
+        if not terms:
+            return _empty(queryset)
+        *exact, prefix = terms
+        tsquery = " & ".join([*exact, f"{prefix}:*"])
+
+        meta = document.model._meta
+        vector = f"{connection.ops.quote_name(meta.db_table)}.{TSVECTOR_COLUMN}"
+        # Pesos de ts_rank na ordem {D, C, B, A}, relativos ao maior peso
+        weights = list(document.weights.values())
+        label_weights = [weight / max(weights) for weight in weights]
+        label_weights += [0.0] * (len(TSVECTOR_LABELS) - len(label_weights))
+        rank_weights = "{" + ", ".join(map(str, reversed(label_weights))) + "}"
+        matches = RawSQL(
+            f"{vector} @@ to_tsquery('simple', %s)",
+            [tsquery],
+            output_field=BooleanField(),
+        )
+        relevance = RawSQL(
+            f"ts_rank(%s::real[], {vector}, to_tsquery('simple', %s))",
+            [rank_weights, tsquery],
+            output_field=FloatField(),
+        )
+        return queryset.filter(matches).annotate(relevance=relevance)
+
+
+SEARCH_BACKENDS = {
+    backend.name: backend
+    for backend in (
+        IContainsBackend(),
+        TermIndexBackend(),
+        FTS5Backend(),
+        PostgresBackend(),
+    )
+}
+
+
+def get_backend(name=None):
+    """Backend pelo nome (padrão: settings.SEARCH_BACKEND), resolvendo "auto" """
+    name = name or settings.SEARCH_BACKEND
+    if name == "auto":
+        name = next(
+            backend
+            for backend in AUTO_BACKENDS
+            if SEARCH_BACKENDS[backend].is_available()
+        )
+    backend = SEARCH_BACKENDS.get(name)
+    if backend is None or not backend.is_available():
+        raise ImproperlyConfigured(f"Backend de busca indisponível: {name}")
+    return backend
+
+
+def search(queryset, query, backend=None):
+    """
+    Restringir o queryset aos objetos que contêm todas as palavras da consulta,
+    anotando "relevance" (ordenar por "-relevance"); consulta sem palavras
+    buscáveis retorna um queryset vazio
+    """
+    document = get_document(queryset.model)
+    return get_backend(backend).search(document, queryset, query)
+
+
+def index_documents(model, ids, backend=None):
+    """Reindexar objetos criados ou alterados no backend ativo"""
+    get_backend(backend).index(get_document(model), ids)
+
+
+def remove_documents(model, ids, backend=None):
+    """Remover objetos excluídos do índice do backend ativo"""
+    get_backend(backend).remove(get_document(model), ids)
@@ -60,6 +60,20 @@ class LandingPageTests(TestCase):
         self.assertContains(response, "landing-map")
         self.assertContains(response, "Navegue pelos Lugares")
 
+    def test_landing_page_shows_place_excerpt(self):
+        """Testa que o resumo do lugar aparece inteiro, sem reticências duplicadas"""
+        user = User.objects.create_user(username="criador", password="senha123")
+        place = Place.objects.create(
+            name="Praia de Itaipuaçu",
+            description="Praia extensa com areia clara e mar aberto " * 5,
+            address="Itaipuaçu, Maricá",
+            created_by=user,
+            is_approved=True,
+        )
+        response = self.client.get(self.url)
+        self.assertContains(response, place.excerpt)
+        self.assertNotContains(response, "... …")
+
 
 class AboutPageTests(TestCase):
     """Teste suite pra funcionalidade da pagina Sobre"""
@@ -0,0 +1,114 @@
+"""
+Análise de texto em português para a busca
+Normaliza o texto (minúsculas, sem acentos), separa as palavras, remove as
+palavras vazias (stop words) e reduz cada palavra ao seu radical com uma versão
+simplificada do RSLP (removedor de sufixos da língua portuguesa): plural,
+feminino, advérbio e vogal temática
+A mesma análise é aplicada ao texto indexado e à consulta
+"""
+
+import re
+import unicodedata
+
+# Radicais mais curtos que isto não são reduzidos
+MIN_STEM_LENGTH = 3
+
+# Tamanho máximo de um termo no índice (palavras maiores são truncadas)
+MAX_TERM_LENGTH = 40
+
+WORD_RE = re.compile(r"\w+")
+
+# Palavras vazias, já sem acentos
+STOP_WORDS = frozenset(
+    """
+    a o as os um uma uns umas ao aos da do das dos de em no na nos nas num numa
+    por pelo pela pelos pelas para com sem sob sobre entre ate apos desde e ou
+    mas nem que se como quando onde porque pois ja nao sim mais menos muito
+    muita muitos muitas eu tu ele ela nos vos eles elas me te lhe lhes meu minha
+    meus minhas teu tua seu sua seus suas nosso nossa este esta estes estas esse
+    essa esses essas aquele aquela isto isso aquilo ser estar ter ha foi sao era
+    esta tem tambem so
+    """.split()
+)
+
+# (sufixo, substituição), na ordem em que são testados; o primeiro que casa vence
+PLURAL_RULES = (
+    ("oes", "ao"),
+    ("aes", "ao"),
+    ("ais", "al"),
+    ("eis", "el"),
+    ("ois", "ol"),
+    ("ns", "m"),
+    ("les", "l"),
+    ("res", "r"),
+    ("zes", "z"),
+    ("is", "il"),
+    ("s", ""),
+)
+# Palavras terminadas em "s" que não estão no plural
+PLURAL_EXCEPTIONS = frozenset(
+    "lapis onibus virus atlas pires tenis cais gas bonus campus oasis".split()
+)
+
+FEMININE_RULES = (
+    ("ona", "ao"),
+    ("eira", "eiro"),
+    ("ora", "or"),
+    ("osa", "oso"),
+    ("ica", "ico"),
+    ("ada", "ado"),
+    ("ida", "ido"),
+    ("iva", "ivo"),
+    ("ina", "ino"),
+)
+
+ADVERB_SUFFIX = "mente"
+
+THEMATIC_VOWELS = "aeo"
+
+
+def fold(text):
+    """Minúsculas e sem acentos: "Maricá" -> "marica" """
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def normalize_query(query):
+    """Consulta sem acentos, em minúsculas e com espaços colapsados"""
+    return " ".join(fold(query).split())
+
+
+def _replace_suffix(word, rules):
+    for suffix, replacement in rules:
+        stem = word[: -len(suffix)]
+        if word.endswith(suffix) and len(stem) + len(replacement) >= MIN_STEM_LENGTH:
+            return stem + replacement
+    return word
+
+
+def stem(word):
+    """
+    Radical de uma palavra já normalizada por fold()
+    "praias" -> "prai", "restaurantes" -> "restaurant", "marica" -> "maric"
+    """
+    if word.isdigit() or len(word) <= MIN_STEM_LENGTH:
+        return word
+
+    if word.endswith("s") and word not in PLURAL_EXCEPTIONS:
+        word = _replace_suffix(word, PLURAL_RULES)
+    word = _replace_suffix(word, FEMININE_RULES)
+    if word.endswith(ADVERB_SUFFIX) and len(word) - len(ADVERB_SUFFIX) >= 4:
+        word = word[: -len(ADVERB_SUFFIX)]
+    if word[-1] in THEMATIC_VOWELS and len(word) > MIN_STEM_LENGTH + 1:
+        word = word[:-1]
+    return word[:MAX_TERM_LENGTH]
+
+
+def tokenize(text):
+    """Palavras normalizadas do texto, sem as palavras vazias"""
+    return [word for word in WORD_RE.findall(fold(text)) if word not in STOP_WORDS]
+
+
+def analyze(text):
+    """Radicais das palavras do texto, na ordem (com repetições)"""
+    return [stem(word) for word in tokenize(text)]
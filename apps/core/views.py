@@ -7,31 +7,38 @@ from django.shortcuts import redirect, render
 from django.utils import timezone
 
 from apps.accounts.models import User
-from apps.explore.models import Category, Place, PlaceReview
+from apps.explore.caching import with_place_counts
+from apps.explore.models import CARD_DEFERRED_FIELDS, Category, Place, PlaceReview
 from apps.news.forms import NewsForm
 from apps.news.models import News, NewsCategory
 
 
 def landing_view(request):
-    # Lugares em destaque (mais recentes)
-    featured_places = (
+    visible_places = (
         Place.objects.filter(is_approved=True, is_active=True)
+        .select_related("stats")
+        .defer(*CARD_DEFERRED_FIELDS)
         .prefetch_related("images", "categories")
-        .order_by("-created_at")[:6]
     )
 
-    # Lugares em alta (mais populares nos últimos 7 dias)
-    day_range = timezone.now() - timedelta(days=7)
-    trending_places = (
-        Place.objects.filter(
-            is_approved=True, is_active=True, created_at__gte=day_range
-        )
-        .prefetch_related("images", "categories")
-        .order_by("-created_at")[:4]
+    # Lugares em destaque (mais recentes)
+    featured_places = visible_places.order_by("-created_at")[:6]
+
+    # Lugares em alta (pontuação de tendência indexada em PlaceStats,
+    # recalculada periodicamente por "manage.py update_trending")
+    trending_places = visible_places.filter(stats__trending_score__gt=0).order_by(
+        "-stats__trending_score", "-created_at"
+    )[:4]
+    if not trending_places:
+        # Nenhuma pontuação calculada ainda (deploy novo, cron não executado):
+        # mostrar os lugares mais recentes
+        trending_places = visible_places.order_by("-created_at")[:4]
+
+    # Contagens de lugares por categoria em cache (sem COUNT por categoria)
+    categories = with_place_counts(
+        Category.objects.filter(is_active=True).order_by("display_order")[:8]
     )
 
-    categories = Category.objects.filter(is_active=True).order_by("display_order")[:8]
-
     context = {
         "featured_places": featured_places,
         "trending_places": trending_places,
@@ -1,6 +1,15 @@
 from django.contrib import admin
+from django.db.models import Count, Q
 
-from .models import Category, Favorite, Place, PlaceApproval, PlaceImage, PlaceReview
+from .models import (
+    Category,
+    Favorite,
+    Place,
+    PlaceApproval,
+    PlaceImage,
+    PlaceReview,
+    SearchQueryLog,
+)
 
 
 @admin.register(Category)
@@ -22,6 +31,19 @@ class CategoryAdmin(admin.ModelAdmin):
 
     prepopulated_fields = {"slug": ("name",)}
 
+    def get_queryset(self, request):
+        # Contagem de lugares na própria consulta da listagem (active_places_count)
+        return (
+            super()
+            .get_queryset(request)
+            .annotate(
+                place_count=Count(
+                    "places",
+                    filter=Q(places__is_approved=True, places__is_active=True),
+                )
+            )
+        )
+
     fieldsets = (
         ("Informações Básicas", {"fields": ("name", "slug", "description", "icon")}),
         ("Configurações de Exibição", {"fields": ("display_order", "is_active")}),
@@ -206,3 +228,16 @@ class FavoriteAdmin(admin.ModelAdmin):
         ("Informações do Favorito", {"fields": ("user", "place")}),
         ("Data e Horário", {"fields": ("created_at",)}),
     )
+
+
+@admin.register(SearchQueryLog)
+class SearchQueryLogAdmin(admin.ModelAdmin):
+    """Buscas mais frequentes do explore e uso do cache de resultados"""
+
+    list_display = ("query", "hits", "misses", "last_searched_at")
+
+    search_fields = ("query",)
+
+    ordering = ("-hits",)
+
+    readonly_fields = ("query", "hits", "misses", "last_searched_at")
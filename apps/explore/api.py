@@ -3,62 +3,496 @@ Views de API para o aplicativo explore
 Fornece endpoints JSON para integração com mapas e outros recursos
 """
 
-from django.http import JsonResponse
+import heapq
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Avg, Count
+from django.db.models.functions import Substr
+from django.http import (
+    HttpResponse,
+    HttpResponseNotModified,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
 from django.views.decorators.http import require_GET
 
-from .models import Place
+from .caching import API_CACHE, map_snapshot, place_fragment_keys, tile_cache_key
+from .cards import iter_place_cards
+from .geo import (
+    bbox_q,
+    haversine_km,
+    parse_bbox,
+    radius_bbox,
+    tile_bbox,
+    zoom_to_geohash_precision,
+)
+from .models import Place, PlaceChange
+from .serializers import (
+    MAP_PLACE_FIELDS,
+    PLACE_DETAIL_FIELDS,
+    PLACES_BY_IDS_FIELDS,
+    encode_columnar,
+    iter_places,
+    parse_fields,
+    parse_precision,
+    serialize_places,
+    stream_fragments_json,
+    stream_places_json,
+)
+from .suggest import suggest_index
+
+MAP_DATA_FORMATS = ("json", "columnar")
+
+# Padrões de /explore/api/nearby/
+NEARBY_DEFAULT_RADIUS_KM = 5
+NEARBY_DEFAULT_RESULTS = 10
+# Raio da primeira busca como fração do raio pedido (dobrado até achar k lugares)
+NEARBY_INITIAL_RADIUS_FRACTION = 1 / 16
+
+# Número padrão de sugestões de /explore/api/suggest/
+SUGGEST_DEFAULT_RESULTS = 8
+
+
+def _map_places_queryset():
+    """Lugares aprovados e ativos com coordenadas (visíveis no mapa)"""
+    return Place.objects.filter(
+        is_approved=True,
+        is_active=True,
+        latitude__isnull=False,
+        longitude__isnull=False,
+    )
+
+
+def _filter_bbox(places, request):
+    """
+    Aplica o parâmetro ?bbox= ao queryset usando o índice de geohash
+    Levanta ValueError se o bbox for inválido
+    """
+    bbox_param = request.GET.get("bbox", "")
+    if bbox_param:
+        places = places.filter(bbox_q(*parse_bbox(bbox_param)))
+    return places
+
+
+def _limited_map_places(places):
+    """
+    Serializa no máximo MAP_DATA_MAX_LIMIT lugares, dos mais recentes
+    Retorna (places_data, truncated); truncated indica que havia mais
+    lugares na área do que os retornados
+    """
+    limit = settings.MAP_DATA_MAX_LIMIT
+    places_data = serialize_places(
+        places.order_by("-created_at")[: limit + 1], MAP_PLACE_FIELDS
+    )
+    return places_data[:limit], len(places_data) > limit
 
 
 @require_GET
 def map_data_api(request):
     """
-    Endpoint de API que retorna todos os lugares aprovados com coordenadas em formato JSON
+    Endpoint de API que retorna os lugares aprovados com coordenadas em formato JSON
     Usado pelo mapa interativo da página inicial
+
+    Parâmetros opcionais:
+    - bbox=south,west,north,east: apenas lugares dentro da área visível do mapa
+    - limit=N: número máximo de lugares retornados (não combina com since: 400)
+    - since=V: apenas os lugares alterados depois da versão V, mais os IDs
+      dos lugares removidos do mapa desde então (deleted); se V é anterior ao
+      registro mais antigo mantido (ver prune_place_changes) ou posterior à
+      versão atual, a resposta traz todos os lugares e "reset": true, para o
+      cliente recarregar sua cópia
+      Garantia: cada alteração é entregue ao menos uma vez. As versões são ids
+      autoincrementais e, com transações concorrentes, podem ser confirmadas
+      fora de ordem; por isso o delta relê também as últimas
+      PLACE_CHANGE_SYNC_OVERLAP versões abaixo de V, e uma alteração confirmada
+      depois de outras até esse número de versões mais novas ainda chega ao
+      cliente. Lugares podem se repetir entre deltas (o cliente os substitui)
+
+    - format=columnar: arrays paralelos compactos (ver encode_columnar)
+    - fields=id,name,...: apenas os campos pedidos (carrega só as colunas necessárias)
+    - precision=N: casas decimais das coordenadas (0 a 6)
+    - stream=1: resposta em streaming, lida do banco em blocos com memória
+      constante (apenas no formato json)
+
+    A resposta sempre inclui a versão atual ("version") para a próxima sincronização
+    Sem filtros, a resposta vem de um snapshot pré-comprimido com ETag
+    No formato json com os campos e a precisão padrão, os lugares vêm dos
+    cartões pré-serializados (PlaceCard), sem serializar cada lugar
     """
+    output_format = request.GET.get("format", "json")
+    if output_format not in MAP_DATA_FORMATS:
+        return JsonResponse({"error": "Formato de saída inválido"}, status=400)
+
+    try:
+        fields = parse_fields(request.GET.get("fields", ""), MAP_PLACE_FIELDS)
+        precision = parse_precision(request.GET.get("precision", ""))
+    except ValueError:
+        return JsonResponse({"error": "Campos ou precisão inválidos"}, status=400)
+
+    stream = request.GET.get("stream", "") == "1"
+    if stream and output_format != "json":
+        # O formato colunar ordena e interna todos os lugares antes de responder
+        return JsonResponse(
+            {"error": "Formato de saída inválido para stream"}, status=400
+        )
+
+    # Ler a versão antes dos lugares: alterações concorrentes aparecem na próxima
+    version = PlaceChange.current_version()
+
+    if set(request.GET) <= {"format"}:
+        return _map_snapshot_response(request, version, output_format)
+
     # Obter todos os lugares aprovados com coordenadas
-    places = (
-        Place.objects.filter(
-            is_approved=True,
-            is_active=True,
-            latitude__isnull=False,
-            longitude__isnull=False,
+    places = _map_places_queryset()
+
+    # Filtrar pela área visível usando o índice de geohash
+    try:
+        places = _filter_bbox(places, request)
+    except ValueError:
+        return JsonResponse({"error": "Formato de bbox inválido"}, status=400)
+
+    deleted_ids = None
+    reset = False
+    since_param = request.GET.get("since", "")
+    if since_param and request.GET.get("limit", ""):
+        # Um delta truncado perderia alterações sem que o cliente soubesse
+        return JsonResponse(
+            {"error": "limit não pode ser combinado com since"}, status=400
+        )
+    if since_param:
+        try:
+            since = int(since_param)
+        except ValueError:
+            return JsonResponse({"error": "Formato de since inválido"}, status=400)
+
+        # Alterações posteriores a since já removidas, ou versão que este
+        # servidor nunca publicou (banco recriado): recarga completa
+        oldest = PlaceChange.oldest_version()
+        reset = since > version or (oldest is not None and since < oldest - 1)
+
+    if since_param and not reset:
+        # Reler as versões logo abaixo de since: ids confirmados fora de ordem
+        overlap_start = since - settings.PLACE_CHANGE_SYNC_OVERLAP
+        changed_ids = set(
+            PlaceChange.objects.filter(
+                id__gt=overlap_start, id__lte=version
+            ).values_list("place_id", flat=True)
+        )
+        places = places.filter(id__in=changed_ids)
+
+        # Alterados que não estão mais visíveis: excluídos, rejeitados ou desativados
+        visible_ids = set(
+            _map_places_queryset()
+            .filter(id__in=changed_ids)
+            .values_list("id", flat=True)
+        )
+        deleted_ids = sorted(changed_ids - visible_ids)
+
+    # Desempate por id para uma ordem estável entre respostas
+    places = places.order_by("-created_at", "-id")
+
+    limit_param = request.GET.get("limit", "")
+    if limit_param:
+        try:
+            limit = int(limit_param)
+        except ValueError:
+            return JsonResponse({"error": "Formato de limit inválido"}, status=400)
+        if limit < 1:
+            return JsonResponse({"error": "Formato de limit inválido"}, status=400)
+        places = places[: min(limit, settings.MAP_DATA_MAX_LIMIT)]
+
+    extra = {"deleted": deleted_ids} if deleted_ids is not None else {}
+    if reset:
+        extra["reset"] = True
+    extra["version"] = version
+    chunk_size = settings.MAP_DATA_STREAM_CHUNK_SIZE if stream else None
+
+    # Campos e precisão padrão: concatenar os cartões pré-serializados
+    if (
+        output_format == "json"
+        and precision is None
+        and fields == list(MAP_PLACE_FIELDS)
+    ):
+        fragments = (
+            fragment for _, fragment in iter_place_cards(places, "map_json", chunk_size)
+        )
+        if stream:
+            return StreamingHttpResponse(
+                stream_fragments_json(fragments, extra, chunk_size),
+                content_type="application/json",
+            )
+        return HttpResponse(
+            "".join(stream_fragments_json(fragments, extra)),
+            content_type="application/json",
+        )
+
+    if stream:
+        places_data = iter_places(
+            places, MAP_PLACE_FIELDS, fields, precision, chunk_size=chunk_size
+        )
+        return StreamingHttpResponse(
+            stream_places_json(places_data, extra, chunk_size),
+            content_type="application/json",
         )
-        .prefetch_related("images", "categories")
-        .order_by("-created_at")
-    )
 
     # Construir dados de resposta
-    places_data = []
-    for place in places:
-        # Obter imagem primária ou primeira imagem
-        primary_image = place.primary_image
-        image_url = primary_image.image.url if primary_image else None
-
-        # Obter primeira categoria para ícone/cor
-        first_category = place.categories.first()
-        category_name = first_category.name if first_category else "Outros"
-        category_icon = first_category.icon if first_category else "📍"
-
-        places_data.append(
+    places_data = serialize_places(places, MAP_PLACE_FIELDS, fields, precision)
+
+    if output_format == "columnar":
+        response_data = encode_columnar(places_data)
+    else:
+        response_data = {"places": places_data, "count": len(places_data)}
+    response_data.update(extra)
+    return JsonResponse(response_data)
+
+
+def _map_data_content(version, output_format):
+    """JSON completo do mapa (todos os lugares visíveis) em bytes"""
+    places = _map_places_queryset().order_by("-created_at", "-id")
+    if output_format == "json":
+        fragments = (fragment for _, fragment in iter_place_cards(places, "map_json"))
+        return "".join(stream_fragments_json(fragments, {"version": version})).encode()
+
+    response_data = encode_columnar(serialize_places(places, MAP_PLACE_FIELDS))
+    response_data["version"] = version
+    return json.dumps(response_data, cls=DjangoJSONEncoder).encode()
+
+
+def _map_snapshot_response(request, version, output_format):
+    """
+    Servir o snapshot do mapa: 304 se o cliente já tem a versão atual,
+    bytes pré-comprimidos se o cliente aceita gzip
+    """
+    etag = f'"map-{output_format}-{version}"'
+    if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+    if etag in if_none_match or f"W/{etag}" in if_none_match:
+        response = HttpResponseNotModified()
+        response["ETag"] = etag
+        return response
+
+    snapshot = map_snapshot(
+        version, output_format, lambda: _map_data_content(version, output_format)
+    )
+
+    if "gzip" in request.headers.get("Accept-Encoding", ""):
+        response = HttpResponse(snapshot["gzip"], content_type="application/json")
+        response["Content-Encoding"] = "gzip"
+    else:
+        response = HttpResponse(snapshot["content"], content_type="application/json")
+    response["ETag"] = etag
+    patch_vary_headers(response, ["Accept-Encoding"])
+    return response
+
+
+@require_GET
+def map_clusters_api(request):
+    """
+    Endpoint de API que retorna os lugares do mapa agrupados por zoom
+    Os grupos são células da grade hierárquica de geohash (Place.geohash):
+    cada nível de zoom usa um prefixo, então o agrupamento é um GROUP BY
+    sobre o prefixo já armazenado e indexado
+
+    Parâmetros:
+    - zoom=Z: nível de zoom do mapa (obrigatório)
+    - bbox=south,west,north,east: área visível (opcional)
+
+    A partir de MAP_CLUSTER_MAX_ZOOM os lugares individuais são retornados
+    """
+    try:
+        zoom = int(request.GET.get("zoom", ""))
+    except ValueError:
+        return JsonResponse({"error": "Formato de zoom inválido"}, status=400)
+    if not 0 <= zoom <= 22:
+        return JsonResponse({"error": "Formato de zoom inválido"}, status=400)
+
+    try:
+        places = _filter_bbox(_map_places_queryset(), request)
+    except ValueError:
+        return JsonResponse({"error": "Formato de bbox inválido"}, status=400)
+
+    # Zoom alto o suficiente: retornar os lugares individualmente
+    if zoom >= settings.MAP_CLUSTER_MAX_ZOOM:
+        places_data, truncated = _limited_map_places(places)
+        return JsonResponse(
             {
-                "id": place.id,
-                "name": place.name,
-                "description": (
-                    place.description[:100] + "..."
-                    if len(place.description) > 100
-                    else place.description
-                ),
-                "latitude": float(place.latitude),
-                "longitude": float(place.longitude),
-                "image_url": image_url,
-                "category": category_name,
-                "category_icon": category_icon,
-                "url": f"/explore/place/{place.id}/",
-                "rating": float(place.average_rating) if place.average_rating else None,
-                "review_count": place.reviews.count(),
+                "zoom": zoom,
+                "clusters": [],
+                "places": places_data,
+                "count": len(places_data),
+                "truncated": truncated,
             }
         )
 
+    precision = zoom_to_geohash_precision(zoom)
+    cell = Substr("geohash", 1, precision)
+
+    # Centróide e contagem por célula
+    cells = (
+        places.annotate(cell=cell)
+        .values("cell")
+        .annotate(
+            count=Count("id"),
+            latitude=Avg("latitude"),
+            longitude=Avg("longitude"),
+        )
+        .order_by("cell")
+    )
+
+    # Categoria dominante por célula (lugares sem categoria contam como "Outros")
+    dominant = {}
+    category_counts = (
+        places.annotate(cell=cell)
+        .values("cell", "categories__name", "categories__icon")
+        .annotate(count=Count("id"))
+        .order_by("cell", "-count", "categories__name")
+    )
+    for row in category_counts:
+        dominant.setdefault(row["cell"], row)
+
+    clusters = []
+    for row in cells:
+        category = dominant.get(row["cell"], {})
+        clusters.append(
+            {
+                "geohash": row["cell"],
+                "latitude": round(float(row["latitude"]), 6),
+                "longitude": round(float(row["longitude"]), 6),
+                "count": row["count"],
+                "category": category.get("categories__name") or "Outros",
+                "category_icon": category.get("categories__icon") or "📍",
+            }
+        )
+
+    return JsonResponse(
+        {
+            "zoom": zoom,
+            "clusters": clusters,
+            "places": [],
+            "count": sum(cluster["count"] for cluster in clusters),
+        }
+    )
+
+
+@require_GET
+def map_tile_api(request, zoom, x, y):
+    """
+    Endpoint de API que retorna os lugares dentro de um tile web-mercator
+    Cada tile é armazenado em cache separadamente, com uma versão própria
+    que é incrementada apenas quando um lugar dentro dele muda
+    """
+    if zoom > settings.MAP_TILE_MAX_ZOOM or x >= (1 << zoom) or y >= (1 << zoom):
+        return JsonResponse({"error": "Tile inválido"}, status=400)
+
+    key = tile_cache_key(zoom, x, y)
+    content = caches[API_CACHE].get(key)
+    if content is None:
+        places_data, truncated = _limited_map_places(
+            _map_places_queryset().filter(bbox_q(*tile_bbox(zoom, x, y)))
+        )
+        content = json.dumps(
+            {
+                "z": zoom,
+                "x": x,
+                "y": y,
+                "places": places_data,
+                "count": len(places_data),
+                "truncated": truncated,
+            },
+            cls=DjangoJSONEncoder,
+        )
+        caches[API_CACHE].set(key, content, settings.MAP_TILE_CACHE_TIMEOUT)
+
+    return HttpResponse(content, content_type="application/json")
+
+
+def _nearest_places(latitude, longitude, radius_km, k):
+    """
+    Os k lugares mais próximos dentro do raio, como tuplas (distância, id)
+    Cada busca usa uma bounding box (índice de geohash) e calcula a distância
+    exata (haversine) apenas dos candidatos; o raio da busca começa pequeno e
+    dobra até encontrar k lugares ou chegar ao raio pedido
+    """
+    search_radius = radius_km * NEARBY_INITIAL_RADIUS_FRACTION
+    while True:
+        search_radius = min(search_radius, radius_km)
+        candidates = (
+            _map_places_queryset()
+            .filter(bbox_q(*radius_bbox(latitude, longitude, search_radius)))
+            .values_list("id", "latitude", "longitude")
+        )
+        found = []
+        for place_id, place_lat, place_lng in candidates:
+            distance = haversine_km(latitude, longitude, place_lat, place_lng)
+            if distance <= search_radius:
+                found.append((distance, place_id))
+
+        # Com k lugares a até search_radius, nenhum lugar fora dele é mais próximo
+        if len(found) >= k or search_radius >= radius_km:
+            return heapq.nsmallest(k, found)
+        search_radius *= 2
+
+
+@require_GET
+def nearby_api(request):
+    """
+    Endpoint de API que retorna os lugares mais próximos de uma coordenada,
+    ordenados pela distância de grande círculo
+
+    Parâmetros:
+    - lat=, lng=: coordenada de referência (obrigatórios)
+    - radius_km=R: raio máximo da busca (até NEARBY_MAX_RADIUS_KM)
+    - k=N: número máximo de lugares (até NEARBY_MAX_RESULTS)
+    - fields=id,name,...: apenas os campos pedidos
+
+    Cada lugar inclui "distance_km"
+    """
+    try:
+        latitude = float(request.GET.get("lat", ""))
+        longitude = float(request.GET.get("lng", ""))
+    except ValueError:
+        return JsonResponse({"error": "Formato de coordenadas inválido"}, status=400)
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return JsonResponse({"error": "Formato de coordenadas inválido"}, status=400)
+
+    try:
+        radius_km = float(request.GET.get("radius_km") or NEARBY_DEFAULT_RADIUS_KM)
+    except ValueError:
+        return JsonResponse({"error": "Formato de raio inválido"}, status=400)
+    if not 0 < radius_km <= settings.NEARBY_MAX_RADIUS_KM:
+        return JsonResponse({"error": "Formato de raio inválido"}, status=400)
+
+    try:
+        k = int(request.GET.get("k") or NEARBY_DEFAULT_RESULTS)
+    except ValueError:
+        return JsonResponse({"error": "Formato de k inválido"}, status=400)
+    if not 1 <= k <= settings.NEARBY_MAX_RESULTS:
+        return JsonResponse({"error": "Formato de k inválido"}, status=400)
+
+    try:
+        fields = parse_fields(request.GET.get("fields", ""), MAP_PLACE_FIELDS)
+    except ValueError:
+        return JsonResponse({"error": "Campos inválidos"}, status=400)
+
+    nearest = _nearest_places(latitude, longitude, radius_km, k)
+
+    # Serializar apenas os k lugares encontrados, na ordem da distância
+    query_fields = fields if "id" in fields else ["id", *fields]
+    places = Place.objects.filter(id__in=[place_id for _, place_id in nearest])
+    places_by_id = {}
+    for data in serialize_places(places.order_by("id"), MAP_PLACE_FIELDS, query_fields):
+        place_id = data["id"] if "id" in fields else data.pop("id")
+        places_by_id[place_id] = data
+
+    places_data = [
+        {**places_by_id[place_id], "distance_km": round(distance, 3)}
+        for distance, place_id in nearest
+        if place_id in places_by_id
+    ]
     return JsonResponse({"places": places_data, "count": len(places_data)})
 
 
@@ -67,7 +501,22 @@ def places_by_ids_api(request):
     """
     Endpoint de API que retorna detalhes de lugares para IDs fornecidos
     Usado pela página de favoritos para usuários anônimos
+    Os lugares vêm na ordem dos IDs pedidos (no máximo PLACES_BY_IDS_MAX), e
+    o JSON de cada lugar fica em cache até o lugar ser alterado
+
+    Parâmetros opcionais:
+    - fields=id,name,...: apenas os campos pedidos (carrega só as colunas
+      necessárias); "excerpt" (resumo da descrição) só vem quando pedido
     """
+    fields_param = request.GET.get("fields", "")
+    try:
+        if fields_param:
+            fields = parse_fields(fields_param, PLACES_BY_IDS_FIELDS)
+        else:
+            fields = list(PLACE_DETAIL_FIELDS)
+    except ValueError:
+        return JsonResponse({"error": "Campos inválidos"}, status=400)
+
     # Obter IDs separados por vírgula do parâmetro de consulta
     ids_param = request.GET.get("ids", "")
 
@@ -80,45 +529,75 @@ def places_by_ids_api(request):
     except ValueError:
         return JsonResponse({"error": "Formato de ID inválido"}, status=400)
 
-    # Obter lugares
-    places = (
-        Place.objects.filter(
-            id__in=place_ids,
+    # Remover duplicados mantendo a ordem pedida
+    place_ids = list(dict.fromkeys(place_ids))
+    if len(place_ids) > settings.PLACES_BY_IDS_MAX:
+        return JsonResponse({"error": "Número máximo de IDs excedido"}, status=400)
+
+    # Fragmentos JSON já em cache (um por lugar, na versão atual do lugar)
+    keys = place_fragment_keys(place_ids, fields)
+    cached = caches[API_CACHE].get_many(keys.values())
+    fragments = {
+        place_id: cached[key] for place_id, key in keys.items() if key in cached
+    }
+
+    # Lugares que faltam: número fixo de consultas, qualquer que seja a lista
+    missing = [place_id for place_id in place_ids if place_id not in fragments]
+    if missing:
+        places = Place.objects.filter(
+            id__in=missing,
             is_approved=True,
             is_active=True,
+        ).order_by("id")
+
+        if fields == list(PLACE_DETAIL_FIELDS):
+            # Campos padrão: cartões pré-serializados, na mesma consulta dos lugares
+            new_fragments = dict(iter_place_cards(places, "detail_json"))
+        else:
+            # O id é necessário para associar cada fragmento ao lugar
+            query_fields = fields if "id" in fields else ["id", *fields]
+            new_fragments = {}
+            for data in serialize_places(places, PLACES_BY_IDS_FIELDS, query_fields):
+                place_id = data["id"] if "id" in fields else data.pop("id")
+                new_fragments[place_id] = json.dumps(data, cls=DjangoJSONEncoder)
+        caches[API_CACHE].set_many(
+            {keys[place_id]: fragment for place_id, fragment in new_fragments.items()},
+            settings.PLACE_FRAGMENT_CACHE_TIMEOUT,
         )
-        .prefetch_related("images", "categories", "created_by")
-        .order_by("-created_at")
-    )
+        fragments.update(new_fragments)
 
-    # Construir dados de resposta
-    places_data = []
-    for place in places:
-        # Obter imagem primária ou primeira imagem
-        primary_image = place.primary_image
-        image_url = primary_image.image.url if primary_image else None
-
-        # Obter categorias
-        categories = [
-            {
-                "name": cat.name,
-                "icon": cat.icon if cat.icon else "",
-                "slug": cat.slug,
-            }
-            for cat in place.categories.all()
-        ]
+    # Remontar a resposta na ordem em que os IDs foram pedidos
+    places_data = [
+        fragments[place_id] for place_id in place_ids if place_id in fragments
+    ]
+    content = f'{{"places": [{", ".join(places_data)}], "count": {len(places_data)}}}'
+    return HttpResponse(content, content_type="application/json")
 
-        places_data.append(
-            {
-                "id": place.id,
-                "name": place.name,
-                "description": place.description,
-                "image_url": image_url,
-                "categories": categories,
-                "url": f"/explore/place/{place.id}/",
-                "rating": float(place.average_rating) if place.average_rating else None,
-                "review_count": place.reviews.count(),
-            }
-        )
 
-    return JsonResponse({"places": places_data, "count": len(places_data)})
+@require_GET
+def suggest_api(request):
+    """
+    Endpoint de API com sugestões para a caixa de busca enquanto se digita:
+    nomes de lugares e de categorias e títulos de notícias cujas palavras
+    começam pelas palavras digitadas (sem acentos; a última pode estar
+    incompleta), servidos do índice em memória sem consultar o banco
+
+    Parâmetros:
+    - q=texto: texto digitado
+    - limit=N: número máximo de sugestões (até SUGGEST_MAX_RESULTS)
+    """
+    query = request.GET.get("q", "").strip()
+    try:
+        limit = int(request.GET.get("limit") or SUGGEST_DEFAULT_RESULTS)
+    except ValueError:
+        return JsonResponse({"error": "Formato de limit inválido"}, status=400)
+    if not 1 <= limit <= settings.SUGGEST_MAX_RESULTS:
+        return JsonResponse({"error": "Formato de limit inválido"}, status=400)
+
+    suggestions = [
+        {"type": item.kind, "id": item.id, "label": item.label, "url": item.url}
+        for item in suggest_index().suggest(query, limit)
+    ]
+    return JsonResponse(
+        {"query": query, "suggestions": suggestions, "count": len(suggestions)}
+    )
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ExploreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.explore"
+
+    def ready(self):
+        from . import checks, search, signals  # noqa: F401
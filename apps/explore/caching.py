@@ -0,0 +1,255 @@
+"""
+Cache das respostas da API do explore
+- Cada tile do mapa é armazenado com uma versão própria, que é incrementada
+  quando um lugar dentro dele muda (invalidação apenas dos tiles afetados)
+- Os fragmentos JSON de cada lugar (places-by-ids) usam uma versão por lugar
+- Tiles, fragmentos e suas versões ficam no cache "api"; as versões são
+  contadores de início aleatório, para que uma versão despejada do cache não
+  volte a apontar para um conteúdo anterior à invalidação
+- A resposta completa do mapa é materializada em um snapshot (JSON e gzip)
+  identificado pela versão de alteração dos lugares (PlaceChange)
+- As contagens de lugares visíveis por categoria ficam em cache até que um
+  lugar seja aprovado, rejeitado, desativado ou mude de categoria
+- O índice de facetas (lugares de cada categoria, em memória de cada processo)
+  é reconstruído quando sua versão em cache muda
+- O índice de sugestões (em memória de cada processo) usa um contador em
+  cache: o processo que altera um item aplica a mudança no próprio índice e os
+  demais reconstroem o seu ao ver o contador mudar (o que exige um cache
+  compartilhado entre os processos, ver settings.REDIS_URL e checks.py)
+- Os resultados da busca do explore (ids dos lugares na ordem exibida) ficam
+  no cache "search", com despejo LRU (e expiração no Redis), por consulta
+  normalizada, ordenação e versão do catálogo, incrementada quando os lugares
+  visíveis mudam
+"""
+
+import gzip
+import hashlib
+import random
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db.models import Count, Q
+
+from apps.core.text import normalize_query
+
+from .geo import tile_for_coordinate
+from .models import Category
+
+CATEGORY_PLACE_COUNTS_KEY = "explore:category-place-counts"
+
+
+# Alias do cache dos tiles e fragmentos de lugares (settings.CACHES), separado
+# do padrão para que as muitas chaves de versão não despejem outras entradas
+API_CACHE = "api"
+
+
+def _tile_version_key(zoom, x, y):
+    return f"explore:tile-version:{zoom}:{x}:{y}"
+
+
+def tile_version(zoom, x, y):
+    """Versão atual de um tile (contador inteiro)"""
+    return _counter(_tile_version_key(zoom, x, y), caches[API_CACHE])
+
+
+def tile_cache_key(zoom, x, y):
+    """Chave do conteúdo do tile na versão atual"""
+    return f"explore:tile:{zoom}:{x}:{y}:v{tile_version(zoom, x, y)}"
+
+
+def invalidate_tiles_for_coordinates(*coordinates):
+    """
+    Invalida, em todos os níveis de zoom, os tiles que contêm as coordenadas
+    Coordenadas nulas são ignoradas
+    """
+    tiles = set()
+    for latitude, longitude in coordinates:
+        if latitude is None or longitude is None:
+            continue
+        for zoom in range(settings.MAP_TILE_MAX_ZOOM + 1):
+            tiles.add((zoom, *tile_for_coordinate(latitude, longitude, zoom)))
+
+    for tile in tiles:
+        _bump_counter(_tile_version_key(*tile), caches[API_CACHE])
+
+
+def _place_version_key(place_id):
+    return f"explore:place-version:{place_id}"
+
+
+def place_fragment_keys(place_ids, fields):
+    """
+    Chaves dos fragmentos JSON dos lugares na versão atual de cada um
+    Retorna um dicionário {id do lugar: chave}
+    """
+    store = caches[API_CACHE]
+    version_keys = {place_id: _place_version_key(place_id) for place_id in place_ids}
+    versions = store.get_many(version_keys.values())
+    suffix = ",".join(fields)
+    return {
+        place_id: (
+            f"explore:place-fragment:{place_id}"
+            f":v{versions[key] if key in versions else _counter(key, store)}:{suffix}"
+        )
+        for place_id, key in version_keys.items()
+    }
+
+
+def invalidate_place_fragments(*place_ids):
+    """Invalida os fragmentos JSON em cache dos lugares"""
+    store = caches[API_CACHE]
+    for place_id in set(place_ids):
+        _bump_counter(_place_version_key(place_id), store)
+
+
+def map_snapshot(version, output_format, build):
+    """
+    Snapshot da resposta completa do mapa na versão e formato informados
+    build() deve retornar o JSON em bytes; só é chamado quando a versão muda
+    Retorna um dicionário com "version", "content" e "gzip"
+    """
+    key = f"explore:map-snapshot:{output_format}"
+    snapshot = cache.get(key)
+    if snapshot is None or snapshot["version"] != version:
+        content = build()
+        snapshot = {
+            "version": version,
+            "content": content,
+            "gzip": gzip.compress(content, mtime=0),
+        }
+        cache.set(key, snapshot, None)
+    return snapshot
+
+
+def category_place_counts():
+    """
+    Número de lugares aprovados e ativos de cada categoria: {id: contagem}
+    Calculado em uma única consulta agrupada e mantido em cache
+    """
+    counts = cache.get(CATEGORY_PLACE_COUNTS_KEY)
+    if counts is None:
+        counts = dict(
+            Category.objects.annotate(
+                place_count=Count(
+                    "places",
+                    filter=Q(places__is_approved=True, places__is_active=True),
+                )
+            )
+            .order_by()
+            .values_list("id", "place_count")
+        )
+        cache.set(CATEGORY_PLACE_COUNTS_KEY, counts, None)
+    return counts
+
+
+def with_place_counts(categories):
+    """
+    Avalia o queryset de categorias preenchendo a contagem de lugares de cada
+    uma, para que Category.active_places_count não faça uma consulta por
+    categoria; retorna o próprio queryset (já avaliado)
+    """
+    counts = category_place_counts()
+    for category in categories:
+        category.place_count = counts.get(category.pk, 0)
+    return categories
+
+
+def invalidate_category_place_counts():
+    cache.delete(CATEGORY_PLACE_COUNTS_KEY)
+
+
+FACET_INDEX_VERSION_KEY = "explore:facet-index-version"
+
+
+def facet_index_version():
+    """
+    Versão atual do índice de facetas por categoria
+    Versões aleatórias: se a chave sumir do cache, a nova versão nunca coincide
+    com a de um índice antigo ainda em memória
+    """
+    version = cache.get(FACET_INDEX_VERSION_KEY)
+    if version is None:
+        cache.add(FACET_INDEX_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(FACET_INDEX_VERSION_KEY)
+    return version
+
+
+def invalidate_facet_index():
+    cache.set(FACET_INDEX_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def _counter(key, store=cache):
+    """
+    Valor atual de um contador de versão
+    Começa em um valor aleatório: se a chave sumir do cache, a nova contagem
+    não coincide com a de um conteúdo antigo ainda guardado
+    """
+    version = store.get(key)
+    if version is None:
+        store.add(key, random.getrandbits(48), None)
+        version = store.get(key)
+    return version
+
+
+def _bump_counter(key, store=cache):
+    """Incrementar um contador de versão; retorna a nova versão"""
+    try:
+        return store.incr(key)
+    except ValueError:
+        # Chave ausente: uma nova versão aleatória invalida todo o conteúdo
+        return _counter(key, store)
+
+
+SUGGEST_INDEX_VERSION_KEY = "explore:suggest-index-version"
+
+
+def suggest_index_version():
+    """Versão atual do índice de sugestões (contador inteiro)"""
+    return _counter(SUGGEST_INDEX_VERSION_KEY)
+
+
+def bump_suggest_index_version():
+    """Incrementar a versão do índice de sugestões; retorna a nova versão"""
+    return _bump_counter(SUGGEST_INDEX_VERSION_KEY)
+
+
+CATALOGUE_VERSION_KEY = "explore:catalogue-version"
+
+# Alias do cache de resultados da busca (settings.CACHES)
+SEARCH_RESULTS_CACHE = "search"
+
+
+def catalogue_version():
+    """Versão dos lugares visíveis e dos dados usados para ordená-los"""
+    return _counter(CATALOGUE_VERSION_KEY)
+
+
+def bump_catalogue_version():
+    return _bump_counter(CATALOGUE_VERSION_KEY)
+
+
+def _search_results_key(query, sort):
+    digest = hashlib.md5(normalize_query(query).encode()).hexdigest()
+    return f"explore:search:{catalogue_version()}:{sort}:{digest}"
+
+
+def get_search_results(query, sort):
+    """
+    Resultado em cache da busca na versão atual do catálogo:
+    (ids dos lugares na ordem exibida, se inclui resultados aproximados)
+    ou None
+    """
+    return caches[SEARCH_RESULTS_CACHE].get(_search_results_key(query, sort))
+
+
+def set_search_results(query, sort, place_ids, approximate):
+    """
+    Guardar o resultado de uma busca (apenas até SEARCH_CACHE_MAX_RESULTS),
+    com a expiração (TIMEOUT) do cache "search"
+    """
+    if len(place_ids) > settings.SEARCH_CACHE_MAX_RESULTS:
+        return
+    caches[SEARCH_RESULTS_CACHE].set(
+        _search_results_key(query, sort), (list(place_ids), approximate)
+    )
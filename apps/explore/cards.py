@@ -0,0 +1,101 @@
+"""
+Cartões pré-serializados dos lugares (PlaceCard)
+O JSON de cada lugar nas APIs do mapa e de detalhes é gerado uma vez, quando
+o lugar muda, e gravado ao lado do lugar; as respostas apenas concatenam os
+fragmentos prontos, sem percorrer imagens, categorias e agregados
+"""
+
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .models import Place, PlaceCard
+from .serializers import MAP_PLACE_FIELDS, PLACE_DETAIL_FIELDS, serialize_places
+
+CARD_COLUMNS = ("map_json", "detail_json")
+
+
+def build_place_cards(place_ids):
+    """
+    Serializa os lugares em cartões (sem gravar), em número fixo de consultas
+    Retorna um dicionário {id do lugar: PlaceCard}
+    """
+    places = Place.objects.filter(id__in=place_ids).order_by("id")
+    # Apenas lugares com coordenadas aparecem no mapa
+    map_data = {
+        data["id"]: data
+        for data in serialize_places(
+            places.filter(latitude__isnull=False, longitude__isnull=False),
+            MAP_PLACE_FIELDS,
+        )
+    }
+
+    encoder = DjangoJSONEncoder()
+    now = timezone.now()
+    cards = {}
+    for data in serialize_places(places, PLACE_DETAIL_FIELDS):
+        place_id = data["id"]
+        cards[place_id] = PlaceCard(
+            place_id=place_id,
+            map_json=(
+                encoder.encode(map_data[place_id]) if place_id in map_data else ""
+            ),
+            detail_json=encoder.encode(data),
+            updated_at=now,
+        )
+    return cards
+
+
+def refresh_place_cards(place_ids, create=True):
+    """
+    Regenera os cartões dos lugares
+    Com create=False, apenas atualiza cartões existentes (usado quando o lugar
+    pode estar sendo excluído em cascata)
+    """
+    cards = build_place_cards(set(place_ids))
+    if not cards:
+        return cards
+    if create:
+        PlaceCard.objects.bulk_create(
+            cards.values(),
+            update_conflicts=True,
+            unique_fields=["place"],
+            update_fields=[*CARD_COLUMNS, "updated_at"],
+        )
+    else:
+        PlaceCard.objects.bulk_update(cards.values(), [*CARD_COLUMNS, "updated_at"])
+    return cards
+
+
+def iter_place_cards(places, column, chunk_size=None):
+    """
+    Gera tuplas (id, JSON do lugar) na ordem do queryset
+    column: "map_json" ou "detail_json"
+    Os cartões são lidos na mesma consulta dos lugares; os que faltam (lugares
+    criados sem sinais, como em bulk_create) são gerados e gravados
+    Com chunk_size, percorre o queryset com .iterator() em blocos; nesse caso
+    os cartões que faltam são apenas gerados, sem gravar com o cursor aberto
+    """
+    rows = places.values_list("id", f"card__{column}")
+    if chunk_size:
+        rows = rows.iterator(chunk_size=chunk_size)
+    rows = iter(rows)
+
+    while True:
+        batch = list(islice(rows, chunk_size)) if chunk_size else list(rows)
+        if not batch:
+            return
+        missing = [place_id for place_id, fragment in batch if fragment is None]
+        if not missing:
+            cards = {}
+        elif chunk_size:
+            cards = build_place_cards(missing)
+        else:
+            cards = refresh_place_cards(missing)
+        for place_id, fragment in batch:
+            if fragment is None:
+                fragment = getattr(cards[place_id], column)
+            yield place_id, fragment
+        if not chunk_size:
+            return
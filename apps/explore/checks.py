@@ -0,0 +1,75 @@
+"""
+Verificações do aplicativo explore (python manage.py check --deploy)
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.checks import Tags, Warning, register
+
+LOCMEM_BACKEND = "django.core.cache.backends.locmem.LocMemCache"
+REDIS_BACKEND = "django.core.cache.backends.redis.RedisCache"
+
+# Políticas de maxmemory do Redis que despejam também as chaves sem expiração
+EVICTING_POLICIES = ("allkeys-lru", "allkeys-lfu", "allkeys-random")
+
+
+def redis_maxmemory_policy(alias):
+    """
+    Política de despejo (maxmemory-policy) do servidor Redis de um cache
+    Retorna None se o servidor não puder ser consultado (ex.: CONFIG desativado)
+    """
+    try:
+        client = caches[alias]._cache.get_client(write=True)
+        return client.config_get("maxmemory-policy").get("maxmemory-policy")
+    except Exception:
+        return None
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Os índices em memória de cada processo (sugestões, busca aproximada,
+    facetas) e o cache de resultados da busca são invalidados por versões
+    guardadas no cache padrão; com um cache por processo, as alterações feitas
+    em um processo não chegam aos demais
+
+    No Redis não há o limite MAX_ENTRIES do LocMemCache e as versões, snapshots
+    e resultados da busca são gravados sem expiração: sem uma política
+    allkeys-*, a memória do servidor se esgota em vez de despejar essas chaves
+    """
+    if settings.CACHES["default"]["BACKEND"] == LOCMEM_BACKEND:
+        return [
+            Warning(
+                "O cache padrão é local a cada processo: os demais processos "
+                "web não veem as versões incrementadas pelos sinais e "
+                "continuam servindo sugestões, facetas e resultados de busca "
+                "antigos.",
+                hint="Defina REDIS_URL para usar um cache compartilhado, ou "
+                "rode um único processo web.",
+                id="explore.W001",
+            )
+        ]
+
+    errors = []
+    checked = set()
+    for alias, cache_settings in settings.CACHES.items():
+        location = cache_settings.get("LOCATION")
+        if cache_settings["BACKEND"] != REDIS_BACKEND or location in checked:
+            continue
+        checked.add(location)
+        policy = redis_maxmemory_policy(alias)
+        if policy in EVICTING_POLICIES:
+            continue
+        errors.append(
+            Warning(
+                f"O Redis do cache '{alias}' usa maxmemory-policy "
+                f"{policy or 'desconhecida'}: as chaves gravadas sem expiração "
+                "(versões, snapshots e resultados da busca) não são despejadas "
+                "quando a memória acaba.",
+                hint="Configure o Redis com maxmemory e maxmemory-policy "
+                "allkeys-lru (se o servidor não permite ler CONFIG e já está "
+                "configurado, silencie explore.W002).",
+                id="explore.W002",
+            )
+        )
+    return errors
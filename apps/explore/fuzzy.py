@@ -0,0 +1,246 @@
+"""
+Busca aproximada (tolerante a erros de digitação) por trigramas
+Usada pelo explore quando a busca exata encontra poucos lugares
+(settings.FUZZY_SEARCH_MIN_RESULTS): acrescenta os lugares cujo nome, ou o
+nome de uma das categorias, se parece com a consulta ("aracatyba" encontra
+"Araçatiba"), ordenados pela similaridade
+- PostgreSQL: extensão pg_trgm (word_similarity), com índices GIN de trigramas
+  nos nomes de lugares e categorias
+- Demais bancos: índice invertido de trigramas em memória de cada processo,
+  montado a partir das palavras do índice de sugestões (mesmos lugares e
+  categorias visíveis, sem outra consulta ao banco); a memória cresce com o
+  vocabulário distinto dos nomes, não com o catálogo: números e palavras curtas
+  ficam de fora e trigramas presentes em mais de FUZZY_MAX_POSTINGS palavras
+  são descartados
+"""
+
+import heapq
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import BooleanField, Case, FloatField, Value, When
+from django.db.models.expressions import RawSQL
+
+from apps.core.text import STOP_WORDS, tokenize
+
+from .models import Category, Place
+from .search import category_index
+from .suggest import suggest_index
+
+# Similaridade mínima entre uma palavra da consulta e uma palavra dos nomes
+# (0.3 é o limite padrão do pg_trgm)
+FUZZY_MIN_SIMILARITY = 0.3
+
+# Peso da similaridade com o nome de uma categoria (o nome do lugar vale mais)
+FUZZY_CATEGORY_WEIGHT = 0.5
+
+# Número máximo de lugares acrescentados pela busca aproximada
+FUZZY_MAX_RESULTS = 50
+
+# Palavras candidatas (mais trigramas em comum) comparadas por palavra da consulta
+FUZZY_CANDIDATES = 100
+
+# Itens considerados por palavra da consulta, dos nomes mais parecidos para os
+# menos (uma palavra comum a todos os nomes não percorre o catálogo inteiro)
+FUZZY_MAX_ITEMS_PER_WORD = 2000
+
+# Trigramas presentes em mais palavras que isto não entram no índice
+FUZZY_MAX_POSTINGS = 2000
+
+# Palavras mais curtas que isto não são indexadas nem buscadas
+FUZZY_MIN_WORD_LENGTH = 3
+
+# Tipos do índice de sugestões usados pela busca aproximada
+FUZZY_KINDS = ("place", "category")
+
+
+def _indexable(word):
+    return (
+        len(word) >= FUZZY_MIN_WORD_LENGTH and word.isalpha() and word not in STOP_WORDS
+    )
+
+
+def trigrams(word):
+    """Trigramas de uma palavra com as bordas marcadas, como no pg_trgm"""
+    padded = f"  {word} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(first, second):
+    """Trigramas em comum sobre o total de trigramas distintos das duas palavras"""
+    first, second = trigrams(first), trigrams(second)
+    return len(first & second) / len(first | second)
+
+
+class TrigramIndex:
+    """Itens de cada palavra e palavras de cada trigrama"""
+
+    def __init__(self, words, version=None):
+        # words: [((tipo, id), palavras do nome)]
+        self.version = version
+        self.items = {}
+        for key, item_words in words:
+            for word in item_words:
+                if _indexable(word):
+                    self.items.setdefault(word, []).append(key)
+        self.postings = {}
+        for word in self.items:
+            for trigram in trigrams(word):
+                self.postings.setdefault(trigram, []).append(word)
+        for trigram in [
+            trigram
+            for trigram, trigram_words in self.postings.items()
+            if len(trigram_words) > FUZZY_MAX_POSTINGS
+        ]:
+            del self.postings[trigram]
+
+    def similar_words(self, word):
+        """Palavras do índice parecidas com a palavra: {palavra: similaridade}"""
+        shared = {}
+        for trigram in trigrams(word):
+            for candidate in self.postings.get(trigram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+        candidates = heapq.nlargest(FUZZY_CANDIDATES, shared, key=shared.get)
+        scores = {candidate: similarity(word, candidate) for candidate in candidates}
+        return {
+            candidate: score
+            for candidate, score in scores.items()
+            if score >= FUZZY_MIN_SIMILARITY
+        }
+
+    def search(self, query):
+        """
+        Similaridade de cada item com a consulta: {(tipo, id): similaridade}
+        Média, entre as palavras da consulta, da maior similaridade com uma
+        palavra do nome (palavras sem correspondente contam zero); cada palavra
+        da consulta alcança no máximo FUZZY_MAX_ITEMS_PER_WORD itens
+        """
+        words = [word for word in tokenize(query) if _indexable(word)]
+        scores = {}
+        for word in words:
+            similar = self.similar_words(word)
+            best = {}
+            for candidate in sorted(similar, key=similar.get, reverse=True):
+                remaining = FUZZY_MAX_ITEMS_PER_WORD - len(best)
+                if remaining <= 0:
+                    break
+                for key in self.items[candidate][:remaining]:
+                    best.setdefault(key, similar[candidate])
+            for key, score in best.items():
+                scores[key] = scores.get(key, 0.0) + score / len(words)
+        return {
+            key: score for key, score in scores.items() if score >= FUZZY_MIN_SIMILARITY
+        }
+
+
+# Índice deste processo (None até a primeira busca aproximada)
+_trigram_index = None
+_trigram_index_lock = threading.Lock()
+
+
+def trigram_index():
+    """Índice deste processo, reconstruído quando o índice de sugestões muda"""
+    global _trigram_index
+    index = suggest_index()
+    with _trigram_index_lock:
+        if _trigram_index is None or _trigram_index.version != index.version:
+            _trigram_index = TrigramIndex(index.words(FUZZY_KINDS), index.version)
+        return _trigram_index
+
+
+def _memory_scores(query):
+    """Similaridade dos nomes pelo índice em memória: (lugares, categorias)"""
+    scores = trigram_index().search(query)
+    places, categories = {}, {}
+    for (kind, item_id), score in scores.items():
+        (places if kind == "place" else categories)[item_id] = score
+    return places, categories
+
+
+def _postgres_scores(query):
+    """Similaridade dos nomes pelo pg_trgm: (lugares, categorias)"""
+    text = " ".join(tokenize(query))
+    if not text:
+        return {}, {}
+    matches = RawSQL("%s <%% name", [text], output_field=BooleanField())
+    score = RawSQL("word_similarity(%s, name)", [text], output_field=FloatField())
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Limite do operador <% apenas nesta transação
+        cursor.execute(
+            "SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)",
+            [str(FUZZY_MIN_SIMILARITY)],
+        )
+        places = dict(
+            Place.objects.filter(is_approved=True, is_active=True)
+            .filter(matches)
+            .annotate(score=score)
+            .order_by("-score")
+            .values_list("id", "score")[:FUZZY_MAX_RESULTS]
+        )
+        categories = dict(
+            Category.objects.filter(is_active=True)
+            .filter(matches)
+            .annotate(score=score)
+            .values_list("id", "score")
+        )
+    return places, categories
+
+
+def fuzzy_place_scores(query):
+    """
+    Lugares visíveis com nome ou categoria parecidos com a consulta:
+    {id do lugar: similaridade}, no máximo FUZZY_MAX_RESULTS
+    """
+    if connection.vendor == "postgresql":
+        places, categories = _postgres_scores(query)
+    else:
+        places, categories = _memory_scores(query)
+
+    scores = dict(places)
+    members = category_index() if categories else {}
+    for category_id, score in categories.items():
+        score *= FUZZY_CATEGORY_WEIGHT
+        for place_id in members.get(category_id, ()):
+            if score > scores.get(place_id, 0.0):
+                scores[place_id] = score
+    best = heapq.nsmallest(
+        FUZZY_MAX_RESULTS, scores.items(), key=lambda item: (-item[1], item[0])
+    )
+    return dict(best)
+
+
+def with_fuzzy_matches(places, results, query):
+    """
+    Completar um resultado de busca com poucos lugares com os lugares de nome
+    parecido (places: queryset antes da busca; results: retorno de search())
+    Retorna o queryset anotado com "relevance" e se houve acréscimos; os
+    resultados exatos continuam à frente dos aproximados
+    """
+    minimum = settings.FUZZY_SEARCH_MIN_RESULTS
+    exact_ids = list(
+        results.order_by("-relevance").values_list("id", flat=True)[:minimum]
+    )
+    if len(exact_ids) >= minimum:
+        return results, False
+
+    scores = {
+        place_id: score
+        for place_id, score in fuzzy_place_scores(query).items()
+        if place_id not in exact_ids
+    }
+    if not scores:
+        return results, False
+
+    # Similaridades vão até 1; os resultados exatos ficam acima, na sua ordem
+    ranking = {
+        place_id: 1.0 + len(exact_ids) - position
+        for position, place_id in enumerate(exact_ids)
+    }
+    ranking.update(scores)
+    relevance = Case(
+        *(When(id=place_id, then=Value(score)) for place_id, score in ranking.items()),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    return places.filter(id__in=ranking).annotate(relevance=relevance), True
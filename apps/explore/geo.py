@@ -0,0 +1,209 @@
+"""
+Utilitários geográficos para o aplicativo explore
+Geohash usado como índice espacial dos lugares e consultas por bounding box
+"""
+
+import math
+
+from django.db.models import Q
+
+GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Precisão armazenada em Place.geohash (~3,7cm x 1,9cm)
+GEOHASH_PRECISION = 12
+
+# Número máximo de células de geohash usadas para cobrir uma bounding box
+MAX_BBOX_CELLS = 16
+
+# Raio médio da Terra (km)
+EARTH_RADIUS_KM = 6371.0088
+
+# Quilômetros por grau de latitude
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Codifica uma coordenada em geohash com a precisão informada"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    latitude = float(latitude)
+    longitude = float(longitude)
+
+    chars = []
+    bit = 0
+    value = 0
+    even = True  # Bits pares codificam longitude, ímpares latitude
+    while len(chars) < precision:
+        target, interval = (longitude, lng_range) if even else (latitude, lat_range)
+        mid = (interval[0] + interval[1]) / 2
+        if target >= mid:
+            value = (value << 1) | 1
+            interval[0] = mid
+        else:
+            value <<= 1
+            interval[1] = mid
+        even = not even
+        bit += 1
+        if bit == 5:
+            chars.append(GEOHASH_BASE32[value])
+            bit = 0
+            value = 0
+    return "".join(chars)
+
+
+def geohash_cell_size(precision):
+    """Retorna (altura, largura) em graus de uma célula de geohash"""
+    bits = precision * 5
+    lng_bits = (bits + 1) // 2
+    lat_bits = bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def zoom_to_geohash_precision(zoom):
+    """
+    Precisão de geohash cujas células têm cerca de 1/4 de um tile do mapa
+    no nível de zoom informado (um tile de 256px cobre 360/2^zoom graus)
+    """
+    return max(1, min(GEOHASH_PRECISION, round((zoom + 2) * 2 / 5)))
+
+
+def tile_bbox(zoom, x, y):
+    """Bounding box (south, west, north, east) de um tile web-mercator"""
+    n = 1 << zoom
+    west = x / n * 360.0 - 180.0
+    east = (x + 1) / n * 360.0 - 180.0
+    north = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+    south = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 1) / n))))
+    return south, west, north, east
+
+
+def tile_for_coordinate(latitude, longitude, zoom):
+    """Tile web-mercator (x, y) que contém a coordenada no zoom informado"""
+    n = 1 << zoom
+    latitude = max(min(float(latitude), 85.05112878), -85.05112878)
+    lat_rad = math.radians(latitude)
+    x = int((float(longitude) + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def parse_bbox(value):
+    """
+    Converte 'south,west,north,east' em uma tupla de floats
+    Levanta ValueError se o formato ou os limites forem inválidos
+    """
+    parts = [part.strip() for part in value.split(",")]
+    if len(parts) != 4:
+        raise ValueError("bbox deve ter 4 valores")
+
+    south, west, north, east = (float(part) for part in parts)
+    if not (-90 <= south <= north <= 90):
+        raise ValueError("Latitudes inválidas")
+    if not (-180 <= west <= 180 and -180 <= east <= 180):
+        raise ValueError("Longitudes inválidas")
+    return south, west, north, east
+
+
+def _split_antimeridian(south, west, north, east):
+    """Divide caixas que cruzam o antimeridiano (west > east) em duas"""
+    if west <= east:
+        return [(south, west, north, east)]
+    return [(south, west, north, 180.0), (south, -180.0, north, east)]
+
+
+def bbox_geohash_cells(south, west, north, east, max_cells=MAX_BBOX_CELLS):
+    """
+    Retorna prefixos de geohash que cobrem a bounding box
+    Usa a maior precisão cujo número de células não ultrapassa max_cells
+    """
+    boxes = _split_antimeridian(south, west, north, east)
+
+    cells = [""]
+    for precision in range(1, GEOHASH_PRECISION + 1):
+        height, width = geohash_cell_size(precision)
+        candidate = set()
+        for box_south, box_west, box_north, box_east in boxes:
+            first_row = int((box_south + 90) // height)
+            last_row = int(min(box_north + 90, 180 - 1e-9) // height)
+            first_col = int((box_west + 180) // width)
+            last_col = int(min(box_east + 180, 360 - 1e-9) // width)
+            for row in range(first_row, last_row + 1):
+                for col in range(first_col, last_col + 1):
+                    candidate.add(
+                        encode_geohash(
+                            -90 + (row + 0.5) * height,
+                            -180 + (col + 0.5) * width,
+                            precision,
+                        )
+                    )
+                    if len(candidate) > max_cells:
+                        return sorted(cells)
+        cells = candidate
+    return sorted(cells)
+
+
+def geohash_prefix_q(prefixes, field="geohash"):
+    """
+    Monta um Q que filtra por prefixos de geohash usando intervalos
+    (>= prefixo e < prefixo + '{'), para que o índice B-tree seja usado
+    """
+    query = Q()
+    for prefix in prefixes:
+        if not prefix:
+            return Q(**{f"{field}__gt": ""})
+        query |= Q(**{f"{field}__gte": prefix, f"{field}__lt": prefix + "{"})
+    return query
+
+
+def bbox_q(south, west, north, east):
+    """
+    Filtro completo para lugares dentro da bounding box:
+    pré-filtro pelo índice de geohash e refinamento exato das coordenadas
+    """
+    cells = bbox_geohash_cells(south, west, north, east)
+    exact = Q()
+    for box_south, box_west, box_north, box_east in _split_antimeridian(
+        south, west, north, east
+    ):
+        exact |= Q(
+            latitude__gte=box_south,
+            latitude__lte=box_north,
+            longitude__gte=box_west,
+            longitude__lte=box_east,
+        )
+    return geohash_prefix_q(cells) & exact
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Distância de grande círculo entre duas coordenadas, em km"""
+    lat1, lng1, lat2, lng2 = map(math.radians, map(float, (lat1, lng1, lat2, lng2)))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def radius_bbox(latitude, longitude, radius_km):
+    """
+    Bounding box (south, west, north, east) que contém o círculo de raio
+    radius_km em torno da coordenada
+    Caixas que cruzam o antimeridiano ficam com west > east
+    """
+    delta_lat = radius_km / KM_PER_DEGREE
+    south = max(-90.0, latitude - delta_lat)
+    north = min(90.0, latitude + delta_lat)
+
+    # Perto dos polos o círculo pode cobrir todas as longitudes
+    cos_lat = math.cos(math.radians(max(abs(south), abs(north))))
+    if north >= 90 or south <= -90 or delta_lat / max(cos_lat, 1e-12) >= 180:
+        return south, -180.0, north, 180.0
+
+    delta_lng = delta_lat / cos_lat
+    west = longitude - delta_lng
+    east = longitude + delta_lng
+    if west < -180:
+        west += 360
+    if east > 180:
+        east -= 360
+    return south, west, north, east
@@ -0,0 +1,338 @@
+import math
+import time
+import tracemalloc
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory, override_settings
+
+from apps.core.search import SEARCH_BACKENDS, get_backend, search
+from apps.explore.api import map_data_api, nearby_api, suggest_api
+from apps.explore.caching import (
+    SEARCH_RESULTS_CACHE,
+    bump_suggest_index_version,
+    invalidate_facet_index,
+)
+from apps.explore.cards import refresh_place_cards
+from apps.explore.checks import LOCMEM_BACKEND
+from apps.explore.fuzzy import (
+    FUZZY_KINDS,
+    TrigramIndex,
+    fuzzy_place_scores,
+    trigram_index,
+)
+from apps.explore.geo import encode_geohash
+from apps.explore.models import Category, Place, place_excerpt
+from apps.explore.search import PLACE_DOCUMENT, category_facets, category_index
+from apps.explore.suggest import build_suggest_index, suggest_index
+from apps.explore.views import explore_view
+
+# Caixa que cobre o mundo inteiro: força a consulta (sem usar o snapshot)
+WORLD_BBOX = "-90,-180,90,180"
+
+# Centro de Maricá (referência para a busca por proximidade)
+NEARBY_CENTER = (-22.9194, -42.8186)
+
+# Número de categorias distribuídas entre os lugares (uma ou duas por lugar)
+CATEGORY_COUNT = 12
+
+# Termo buscado nos cenários de busca e facetas (casa com cerca de 1/9 dos lugares)
+FACET_QUERY = "Lugar 1"
+
+# Texto digitado no cenário de sugestões (prefixo de todos os lugares)
+SUGGEST_QUERY = "lug"
+
+# Busca da página do explore nos cenários do cache de resultados (111 lugares)
+EXPLORE_QUERY = "Lugar 123"
+
+# Erro de digitação da busca aproximada (parecido com o nome de todos os lugares)
+FUZZY_QUERY = "lugr"
+
+
+def _benchmark_caches():
+    """
+    Caches locais com a mesma configuração dos caches do projeto: o benchmark
+    limpa e preenche os caches, que podem ser compartilhados com o site (Redis)
+    """
+    return {
+        alias: {
+            **cache_settings,
+            "BACKEND": LOCMEM_BACKEND,
+            "LOCATION": f"benchmark-{alias}",
+        }
+        for alias, cache_settings in settings.CACHES.items()
+    }
+
+
+def _create_places(count):
+    """
+    Criar lugares aprovados em uma grade regular sobre Maricá
+    (quadrado de 0,2 grau centrado em NEARBY_CENTER)
+    """
+    user = get_user_model().objects.create_user(
+        username="benchmark_explore", password=None
+    )
+    side = math.ceil(math.sqrt(count))
+    step = 0.2 / side
+    places = []
+    for index in range(count):
+        latitude = round(NEARBY_CENTER[0] - 0.1 + (index % side) * step, 6)
+        longitude = round(NEARBY_CENTER[1] - 0.1 + (index // side) * step, 6)
+        description = f"Descrição do lugar {index} " * 8
+        places.append(
+            Place(
+                name=f"Lugar {index}",
+                description=description,
+                excerpt=place_excerpt(description),
+                address="Maricá, RJ",
+                latitude=latitude,
+                longitude=longitude,
+                geohash=encode_geohash(latitude, longitude),
+                created_by=user,
+                is_approved=True,
+            )
+        )
+    Place.objects.bulk_create(places, batch_size=1000)
+
+    categories = Category.objects.bulk_create(
+        Category(name=f"Benchmark {chr(ord('A') + index)}", slug=f"benchmark-{index}")
+        for index in range(CATEGORY_COUNT)
+    )
+    through = Place.categories.through
+    links = []
+    for index, place in enumerate(places):
+        links.append(through(place=place, category=categories[index % CATEGORY_COUNT]))
+        if index % 3 == 0:
+            second = categories[(index // 3) % CATEGORY_COUNT]
+            if second != categories[index % CATEGORY_COUNT]:
+                links.append(through(place=place, category=second))
+    through.objects.bulk_create(links, batch_size=1000)
+    # bulk_create não dispara m2m_changed nem os sinais que indexam os lugares
+    invalidate_facet_index()
+    bump_suggest_index_version()
+    _index_places(get_backend())
+
+
+def _index_places(backend):
+    place_ids = list(Place.objects.values_list("id", flat=True))
+    for start in range(0, len(place_ids), 1000):
+        backend.index(PLACE_DOCUMENT, place_ids[start : start + 1000])
+
+
+def _map_data_buffered(options):
+    request = RequestFactory().get(
+        "/explore/api/map-data/", {"bbox": WORLD_BBOX, "fields": options["fields"]}
+    )
+    return len(map_data_api(request).content)
+
+
+def _map_data_stream(options):
+    request = RequestFactory().get(
+        "/explore/api/map-data/",
+        {"bbox": WORLD_BBOX, "fields": options["fields"], "stream": "1"},
+    )
+    return sum(len(chunk) for chunk in map_data_api(request).streaming_content)
+
+
+def _create_cards(options):
+    # bulk_create não dispara os sinais que geram os cartões
+    place_ids = list(Place.objects.values_list("id", flat=True))
+    for start in range(0, len(place_ids), 1000):
+        refresh_place_cards(place_ids[start : start + 1000])
+
+
+def _map_data_cards(options, *_):
+    # Campos padrão: resposta montada com os cartões pré-serializados
+    request = RequestFactory().get("/explore/api/map-data/", {"bbox": WORLD_BBOX})
+    return len(map_data_api(request).content)
+
+
+def _nearby(options):
+    request = RequestFactory().get(
+        "/explore/api/nearby/",
+        {"lat": NEARBY_CENTER[0], "lng": NEARBY_CENTER[1], "radius_km": 5, "k": 20},
+    )
+    return len(nearby_api(request).content)
+
+
+def _visible_places():
+    return Place.objects.filter(is_approved=True, is_active=True)
+
+
+def _search_setup(options, backend):
+    # Levanta ImproperlyConfigured se o backend não existe neste banco
+    backend = get_backend(backend)
+    _index_places(backend)
+    return backend.name
+
+
+def _search(options, backend):
+    # Mesma busca de explore_view, ordenada por relevância
+    places = search(_visible_places(), options["query"], backend=backend)
+    return len(
+        str(list(places.order_by("-relevance", "-created_at").values_list("id")))
+    )
+
+
+def _search_result_ids(options):
+    # O índice de facetas é construído aqui (uma vez por processo) para medir
+    # apenas o cálculo das facetas
+    category_index()
+    return list(search(_visible_places(), FACET_QUERY).values_list("id", flat=True))
+
+
+def _facets(options, result_ids):
+    return len(str(category_facets(result_ids)))
+
+
+def _suggest_build(options):
+    # Reconstrução completa do índice de sugestões (uma consulta por tipo)
+    return len(build_suggest_index().keys)
+
+
+def _suggest_setup(options):
+    # O índice é construído uma vez por processo; mede-se apenas a consulta
+    return suggest_index()
+
+
+def _suggest(options, index):
+    request = RequestFactory().get("/explore/api/suggest/", {"q": SUGGEST_QUERY})
+    return len(suggest_api(request).content)
+
+
+def _fuzzy_build(options, index):
+    # Índice de trigramas montado a partir do índice de sugestões já construído
+    return len(TrigramIndex(index.words(FUZZY_KINDS)).postings)
+
+
+def _fuzzy_setup(options):
+    # Índices em memória construídos uma vez por processo; mede-se a consulta
+    category_index()
+    return trigram_index()
+
+
+def _fuzzy(options, index):
+    return len(str(fuzzy_place_scores(FUZZY_QUERY)))
+
+
+def _explore_search(options, *_):
+    request = RequestFactory().get("/explore/", {"q": EXPLORE_QUERY})
+    request.user = AnonymousUser()
+    return len(explore_view(request).content)
+
+
+def _explore_search_miss(options):
+    # Cache de resultados vazio: a busca é calculada no banco
+    caches[SEARCH_RESULTS_CACHE].clear()
+    return _explore_search(options)
+
+
+def _explore_search_setup(options):
+    # Uma primeira busca preenche o cache; mede-se a página com o resultado pronto
+    caches[SEARCH_RESULTS_CACHE].clear()
+    return _explore_search(options)
+
+
+# Cenários disponíveis: nome -> função que executa a operação medida
+# e retorna o tamanho da resposta em bytes
+SCENARIOS = {
+    "map-data": _map_data_buffered,
+    "map-data-stream": _map_data_stream,
+    "map-data-cards": _map_data_cards,
+    "nearby": _nearby,
+    "facets": _facets,
+    "suggest-build": _suggest_build,
+    "suggest": _suggest,
+    "fuzzy-build": _fuzzy_build,
+    "fuzzy": _fuzzy,
+    "explore-search": _explore_search_miss,
+    "explore-search-cached": _explore_search,
+    # Um cenário por backend de busca (search-icontains é a referência sem
+    # índice); backends que o banco em uso não oferece aparecem indisponíveis
+    **{f"search-{backend}": _search for backend in SEARCH_BACKENDS},
+}
+
+# Preparação (não medida) de cada cenário: o resultado é passado ao cenário
+SCENARIO_SETUP = {
+    "map-data-cards": _create_cards,
+    "facets": _search_result_ids,
+    "suggest": _suggest_setup,
+    "fuzzy-build": _suggest_setup,
+    "fuzzy": _fuzzy_setup,
+    "explore-search-cached": _explore_search_setup,
+    **{
+        f"search-{backend}": partial(_search_setup, backend=backend)
+        for backend in SEARCH_BACKENDS
+    },
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Medir tempo e pico de memória (tracemalloc) das APIs do explore "
+        "com catálogos de tamanhos diferentes. Os lugares são criados dentro "
+        "de uma transação desfeita ao final, com caches locais ao processo"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=int,
+            default=[1000, 10000, 100000],
+            help="Números de lugares do catálogo",
+        )
+        parser.add_argument(
+            "--scenario",
+            nargs="+",
+            choices=sorted(SCENARIOS),
+            default=sorted(SCENARIOS),
+            help="Cenários a executar",
+        )
+        parser.add_argument(
+            "--fields",
+            default="id,name,description,latitude,longitude,url",
+            help="Campos pedidos à API (?fields=)",
+        )
+        parser.add_argument(
+            "--query",
+            default=FACET_QUERY,
+            help="Consulta dos cenários search-<backend>",
+        )
+
+    def handle(self, *args, **options):
+        with override_settings(CACHES=_benchmark_caches()):
+            for size in options["sizes"]:
+                self.stdout.write(f"Catálogo com {size} lugares")
+                with transaction.atomic():
+                    _create_places(size)
+                    for name in options["scenario"]:
+                        self._run(name, SCENARIOS[name], options)
+                    transaction.set_rollback(True)
+
+    def _run(self, name, scenario, options):
+        setup = SCENARIO_SETUP.get(name)
+        try:
+            args = (setup(options),) if setup else ()
+        except ImproperlyConfigured:
+            self.stdout.write(f"  {name:<20} indisponível neste banco")
+            return
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        size = scenario(options, *args)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self.stdout.write(
+            f"  {name:<20} {elapsed * 1000:10.1f} ms "
+            f"{peak / 1024 / 1024:10.2f} MiB pico "
+            f"{size / 1024:10.1f} KiB resposta"
+        )
@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.explore.models import PlaceChange
+
+
+class Command(BaseCommand):
+    help = (
+        "Remover o histórico antigo de alterações de lugares (PlaceChange) usado "
+        "pela sincronização incremental do mapa; clientes com uma versão "
+        "anterior ao histórico mantido recebem o mapa completo. Executar "
+        "periodicamente (ex.: cron)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.PLACE_CHANGE_RETENTION_DAYS,
+            help="Dias de histórico mantidos (padrão: PLACE_CHANGE_RETENTION_DAYS)",
+        )
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options["days"])
+        count = PlaceChange.prune(before)
+        self.stdout.write(
+            self.style.SUCCESS(f"{count} alterações de lugares removidas")
+        )
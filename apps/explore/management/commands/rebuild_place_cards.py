@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.explore.cards import refresh_place_cards
+from apps.explore.models import Place
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        "Regenerar os cartões JSON pré-serializados dos lugares (PlaceCard), "
+        "por exemplo após alterações feitas sem sinais (bulk_create, update)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "place_ids",
+            nargs="*",
+            type=int,
+            help="IDs dos lugares (padrão: todos)",
+        )
+
+    def handle(self, *args, **options):
+        place_ids = options["place_ids"] or list(
+            Place.objects.order_by("id").values_list("id", flat=True)
+        )
+        count = 0
+        for start in range(0, len(place_ids), BATCH_SIZE):
+            with transaction.atomic():
+                count += len(refresh_place_cards(place_ids[start : start + BATCH_SIZE]))
+        self.stdout.write(
+            self.style.SUCCESS(f"Cartões regenerados para {count} lugares")
+        )
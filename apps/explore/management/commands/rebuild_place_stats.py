@@ -0,0 +1,30 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.explore.models import PlaceStats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcular os agregados de PlaceStats (avaliações e favoritos) "
+        "a partir das avaliações e favoritos existentes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "place_ids",
+            nargs="*",
+            type=int,
+            help="IDs dos lugares (padrão: todos)",
+        )
+
+    def handle(self, *args, **options):
+        place_ids = options["place_ids"] or None
+        with transaction.atomic():
+            count = PlaceStats.rebuild(place_ids)
+        self.stdout.write(
+            self.style.SUCCESS(f"Estatísticas recalculadas para {count} lugares")
+        )
+        # A nota e o número de avaliações fazem parte dos cartões JSON
+        call_command("rebuild_place_cards", *(place_ids or []), stdout=self.stdout)
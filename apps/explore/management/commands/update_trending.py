@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.explore.models import PlaceStats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcular a pontuação de tendência dos lugares (lugares em alta) "
+        "a partir das atividades recentes; executar periodicamente (ex.: cron)"
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = PlaceStats.update_trending()
+        self.stdout.write(
+            self.style.SUCCESS(f"Pontuação de tendência calculada para {count} lugares")
+        )
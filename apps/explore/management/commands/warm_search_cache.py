@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from apps.explore.caching import get_search_results, set_search_results
+from apps.explore.models import Place, SearchQueryLog
+from apps.explore.views import SEARCH_ORDER, search_places
+
+
+class Command(BaseCommand):
+    help = (
+        "Pré-aquecer o cache de resultados da busca do explore com as consultas "
+        "mais buscadas (SearchQueryLog), na ordenação padrão por relevância; "
+        "executar após mudanças no catálogo (ex.: cron). Alcança os processos "
+        'web que compartilham o backend do cache "search"'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=20,
+            help="Número de consultas mais buscadas (padrão: 20)",
+        )
+
+    def handle(self, *args, **options):
+        places = Place.objects.filter(is_approved=True, is_active=True)
+        warmed = 0
+        for log in SearchQueryLog.popular(options["limit"]):
+            if get_search_results(log.query, "relevance") is not None:
+                continue
+            results, approximate = search_places(places, log.query)
+            place_ids = list(
+                results.order_by(*SEARCH_ORDER).values_list("id", flat=True)
+            )
+            set_search_results(log.query, "relevance", place_ids, approximate)
+            warmed += 1
+        self.stdout.write(
+            self.style.SUCCESS(f"{warmed} buscas pré-aquecidas no cache de resultados")
+        )
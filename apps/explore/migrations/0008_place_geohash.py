@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Cópia do codificador de apps.explore.geo na data desta migração: mudanças
+# posteriores no módulo geo não alteram o que ela faz
+GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 12
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Codifica uma coordenada em geohash com a precisão informada"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    latitude = float(latitude)
+    longitude = float(longitude)
+
+    chars = []
+    bit = 0
+    value = 0
+    even = True  # Bits pares codificam longitude, ímpares latitude
+    while len(chars) < precision:
+        target, interval = (longitude, lng_range) if even else (latitude, lat_range)
+        mid = (interval[0] + interval[1]) / 2
+        if target >= mid:
+            value = (value << 1) | 1
+            interval[0] = mid
+        else:
+            value <<= 1
+            interval[1] = mid
+        even = not even
+        bit += 1
+        if bit == 5:
+            chars.append(GEOHASH_BASE32[value])
+            bit = 0
+            value = 0
+    return "".join(chars)
+
+
+def fill_geohash(apps, schema_editor):
+    """Preencher geohash dos lugares existentes com coordenadas"""
+    Place = apps.get_model("explore", "Place")
+
+    places = Place.objects.filter(latitude__isnull=False, longitude__isnull=False)
+    for place in places.only("id", "latitude", "longitude"):
+        place.geohash = encode_geohash(place.latitude, place.longitude)
+        place.save(update_fields=["geohash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("explore", "0007_remove_review_unique_constraint"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="place",
+            name="geohash",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                help_text="Geohash das coordenadas, usado como índice espacial",
+                max_length=12,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="place",
+            index=models.Index(
+                fields=["geohash"], name="explore_pla_geohash_a4ed99_idx"
+            ),
+        ),
+        migrations.RunPython(fill_geohash, migrations.RunPython.noop),
+    ]
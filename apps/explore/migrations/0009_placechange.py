@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("explore", "0008_place_geohash"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PlaceChange",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("place_id", models.BigIntegerField(help_text="ID do lugar alterado")),
+                (
+                    "changed_at",
+                    models.DateTimeField(
+                        auto_now_add=True, help_text="Quando a alteração aconteceu"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Alteração de Lugar",
+                "verbose_name_plural": "Alterações de Lugares",
+                "ordering": ["id"],
+                "indexes": [
+                    models.Index(
+                        fields=["place_id"], name="explore_pla_place_i_4e7d7f_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_place_stats(apps, schema_editor):
+    """Calcular os agregados dos lugares existentes"""
+    Place = apps.get_model("explore", "Place")
+    PlaceReview = apps.get_model("explore", "PlaceReview")
+    Favorite = apps.get_model("explore", "Favorite")
+    PlaceStats = apps.get_model("explore", "PlaceStats")
+
+    review_totals = {
+        row["place_id"]: row
+        for row in PlaceReview.objects.values("place_id")
+        .annotate(count=models.Count("id"), total=models.Sum("rating"))
+        .order_by()
+    }
+    favorite_totals = dict(
+        Favorite.objects.values("place_id")
+        .annotate(count=models.Count("id"))
+        .order_by()
+        .values_list("place_id", "count")
+    )
+
+    stats = []
+    for place_id in Place.objects.values_list("id", flat=True):
+        review_row = review_totals.get(place_id, {"count": 0, "total": 0})
+        stats.append(
+            PlaceStats(
+                place_id=place_id,
+                review_count=review_row["count"],
+                rating_sum=review_row["total"],
+                average_rating=(
+                    review_row["total"] / review_row["count"]
+                    if review_row["count"]
+                    else None
+                ),
+                favorites_count=favorite_totals.get(place_id, 0),
+            )
+        )
+    PlaceStats.objects.bulk_create(stats, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("explore", "0009_placechange"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PlaceStats",
+            fields=[
+                (
+                    "place",
+                    models.OneToOneField(
+                        help_text="Lugar ao qual os agregados pertencem",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to="explore.place",
+                    ),
+                ),
+                (
+                    "review_count",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Número de avaliações"
+                    ),
+                ),
+                (
+                    "rating_sum",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Soma das notas de todas as avaliações"
+                    ),
+                ),
+                (
+                    "average_rating",
+                    models.FloatField(
+                        blank=True,
+                        help_text="Nota média (vazia sem avaliações)",
+                        null=True,
+                    ),
+                ),
+                (
+                    "favorites_count",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Número de usuários que favoritaram o lugar",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Estatísticas de Lugar",
+                "verbose_name_plural": "Estatísticas de Lugares",
+            },
+        ),
+        migrations.RunPython(fill_place_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:42
+
+from django.db import migrations, models
+
+
+def fill_rating_histogram(apps, schema_editor):
+    """Calcular o histograma de notas dos lugares existentes"""
+    PlaceReview = apps.get_model("explore", "PlaceReview")
+    PlaceStats = apps.get_model("explore", "PlaceStats")
+
+    rows = (
+        PlaceReview.objects.values("place_id", "rating")
+        .annotate(count=models.Count("id"))
+        .order_by()
+        .values_list("place_id", "rating", "count")
+    )
+    for place_id, rating, count in rows:
+        PlaceStats.objects.filter(place_id=place_id).update(
+            **{f"rating_{rating}": count}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("explore", "0010_placestats"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="placestats",
+            name="rating_1",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Avaliações com 1 ★"
+            ),
+        ),
+        migrations.AddField(
+            model_name="placestats",
+            name="rating_2",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Avaliações com 2 ★"
+            ),
+        ),
+        migrations.AddField(
+            model_name="placestats",
+            name="rating_3",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Avaliações com 3 ★"
+            ),
+        ),
+        migrations.AddField(
+            model_name="placestats",
+            name="rating_4",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Avaliações com 4 ★"
+            ),
+        ),
+        migrations.AddField(
+            model_name="placestats",
+            name="rating_5",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Avaliações com 5 ★"
+            ),
+        ),
+        migrations.RunPython(fill_rating_histogram, migrations.RunPython.noop),
+    ]
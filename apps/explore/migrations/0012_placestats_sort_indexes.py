@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:47
+
+import apps.explore.models
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Cast, NullIf
+
+
+def fill_bayesian_rating(apps, schema_editor):
+    """Calcular a média bayesiana dos lugares existentes"""
+    PlaceStats = apps.get_model("explore", "PlaceStats")
+
+    weight = settings.RATING_PRIOR_WEIGHT
+    total = Cast(models.F("rating_sum"), models.FloatField()) + models.Value(
+        weight * settings.RATING_PRIOR_MEAN
+    )
+    PlaceStats.objects.update(
+        bayesian_rating=total / NullIf(models.F("review_count") + weight, 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("explore", "0011_placestats_rating_histogram"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="placestats",
+            name="bayesian_rating",
+            field=models.FloatField(
+                blank=True,
+                default=apps.explore.models.bayesian_rating,
+                help_text="Média bayesiana das notas (ver bayesian_rating())",
+                null=True,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="placestats",
+            index=models.Index(
+                fields=["-bayesian_rating"], name="explore_pla_bayesia_b740ee_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="placestats",
+            index=models.Index(
+                fields=["-favorites_count"], name="explore_pla_favorit_25862d_idx"
+            ),
+        ),
+        migrations.RunPython(fill_bayesian_rating, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,109 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:53
+
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def fill_recent_activity(apps, schema_editor):
+    """Contar as avaliações e favoritos recentes nas atividades diárias"""
+    PlaceReview = apps.get_model("explore", "PlaceReview")
+    Favorite = apps.get_model("explore", "Favorite")
+    PlaceActivity = apps.get_model("explore", "PlaceActivity")
+
+    start = timezone.localdate() - timedelta(days=settings.TRENDING_WINDOW_DAYS - 1)
+    activity = {}
+    for model, field in ((PlaceReview, "reviews"), (Favorite, "favorites")):
+        for place_id, day, count in (
+            model.objects.annotate(day=TruncDate("created_at"))
+            .filter(day__gte=start)
+            .values("place_id", "day")
+            .annotate(count=models.Count("id"))
+            .order_by()
+            .values_list("place_id", "day", "count")
+        ):
+            key = (place_id, day)
+            activity.setdefault(key, PlaceActivity(place_id=place_id, day=day))
+            setattr(activity[key], field, count)
+    PlaceActivity.objects.bulk_create(activity.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("explore", "0012_placestats_sort_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PlaceActivity",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField(help_text="Dia da atividade")),
+                (
+                    "views",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Visualizações da página do lugar"
+                    ),
+                ),
+                (
+                    "reviews",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Avaliações novas"
+                    ),
+                ),
+                (
+                    "favorites",
+                    models.PositiveIntegerField(default=0, help_text="Favoritos novos"),
+                ),
+            ],
+            options={
+                "verbose_name": "Atividade de Lugar",
+                "verbose_name_plural": "Atividades de Lugares",
+            },
+        ),
+        migrations.AddField(
+            model_name="placestats",
+            name="trending_score",
+            field=models.FloatField(
+                default=0, help_text="Popularidade recente, com decaimento no tempo"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="placestats",
+            index=models.Index(
+                fields=["-trending_score"], name="explore_pla_trendin_c8df77_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="placeactivity",
+            name="place",
+            field=models.ForeignKey(
+                help_text="Lugar da atividade",
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="activity",
+                to="explore.place",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="placeactivity",
+            index=models.Index(fields=["day"], name="explore_pla_day_8b98ea_idx"),
+        ),
+        migrations.AlterUniqueTogether(
+            name="placeactivity",
+            unique_together={("place", "day")},
+        ),
+        migrations.RunPython(fill_recent_activity, migrations.RunPython.noop),
+    ]
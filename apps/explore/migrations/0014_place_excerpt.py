@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:19
+
+from django.db import migrations, models
+from django.db.models.functions import Concat, Length, Substr
+from django.db.models.lookups import GreaterThan
+
+
+def fill_place_excerpt(apps, schema_editor):
+    """Gerar o resumo da descrição dos lugares existentes (ver place_excerpt)"""
+    Place = apps.get_model("explore", "Place")
+    Place.objects.update(
+        excerpt=models.Case(
+            models.When(
+                GreaterThan(Length("description"), 100),
+                then=Concat(
+                    Substr("description", 1, 100),
+                    models.Value("..."),
+                    output_field=models.CharField(),
+                ),
+            ),
+            default=models.F("description"),
+            output_field=models.CharField(),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("explore", "0013_placeactivity_trending_score"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="place",
+            name="excerpt",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                help_text="Resumo da descrição para listagens",
+                max_length=103,
+            ),
+        ),
+        migrations.RunPython(fill_place_excerpt, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("explore", "0014_place_excerpt"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PlaceCard",
+            fields=[
+                (
+                    "place",
+                    models.OneToOneField(
+                        help_text="Lugar serializado",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="card",
+                        serialize=False,
+                        to="explore.place",
+                    ),
+                ),
+                (
+                    "map_json",
+                    models.TextField(blank=True, help_text="JSON do lugar no mapa"),
+                ),
+                (
+                    "detail_json",
+                    models.TextField(help_text="JSON com os detalhes do lugar"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(help_text="Data da última serialização"),
+                ),
+            ],
+            options={
+                "verbose_name": "Cartão de Lugar",
+                "verbose_name_plural": "Cartões de Lugares",
+            },
+        ),
+    ]
@@ -0,0 +1,175 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:45
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Cópia da análise de texto (apps.core.text.analyze) na data desta migração:
+# mudanças posteriores no analisador não alteram o que ela faz
+MIN_STEM_LENGTH = 3
+MAX_TERM_LENGTH = 40
+WORD_RE = re.compile(r"\w+")
+STOP_WORDS = frozenset(
+    """
+    a o as os um uma uns umas ao aos da do das dos de em no na nos nas num numa
+    por pelo pela pelos pelas para com sem sob sobre entre ate apos desde e ou
+    mas nem que se como quando onde porque pois ja nao sim mais menos muito
+    muita muitos muitas eu tu ele ela nos vos eles elas me te lhe lhes meu minha
+    meus minhas teu tua seu sua seus suas nosso nossa este esta estes estas esse
+    essa esses essas aquele aquela isto isso aquilo ser estar ter ha foi sao era
+    esta tem tambem so
+    """.split()
+)
+PLURAL_RULES = (
+    ("oes", "ao"),
+    ("aes", "ao"),
+    ("ais", "al"),
+    ("eis", "el"),
+    ("ois", "ol"),
+    ("ns", "m"),
+    ("les", "l"),
+    ("res", "r"),
+    ("zes", "z"),
+    ("is", "il"),
+    ("s", ""),
+)
+PLURAL_EXCEPTIONS = frozenset(
+    "lapis onibus virus atlas pires tenis cais gas bonus campus oasis".split()
+)
+FEMININE_RULES = (
+    ("ona", "ao"),
+    ("eira", "eiro"),
+    ("ora", "or"),
+    ("osa", "oso"),
+    ("ica", "ico"),
+    ("ada", "ado"),
+    ("ida", "ido"),
+    ("iva", "ivo"),
+    ("ina", "ino"),
+)
+ADVERB_SUFFIX = "mente"
+THEMATIC_VOWELS = "aeo"
+
+
+def fold(text):
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def _replace_suffix(word, rules):
+    for suffix, replacement in rules:
+        stem = word[: -len(suffix)]
+        if word.endswith(suffix) and len(stem) + len(replacement) >= MIN_STEM_LENGTH:
+            return stem + replacement
+    return word
+
+
+def stem(word):
+    if word.isdigit() or len(word) <= MIN_STEM_LENGTH:
+        return word
+
+    if word.endswith("s") and word not in PLURAL_EXCEPTIONS:
+        word = _replace_suffix(word, PLURAL_RULES)
+    word = _replace_suffix(word, FEMININE_RULES)
+    if word.endswith(ADVERB_SUFFIX) and len(word) - len(ADVERB_SUFFIX) >= 4:
+        word = word[: -len(ADVERB_SUFFIX)]
+    if word[-1] in THEMATIC_VOWELS and len(word) > MIN_STEM_LENGTH + 1:
+        word = word[:-1]
+    return word[:MAX_TERM_LENGTH]
+
+
+def analyze(text):
+    """Radicais das palavras do texto, na ordem (com repetições)"""
+    words = WORD_RE.findall(fold(text))
+    return [stem(word) for word in words if word not in STOP_WORDS]
+
+
+# Pesos de search.SEARCH_FIELD_WEIGHTS na criação do índice
+FIELD_WEIGHTS = {"name": 4, "categories": 2, "description": 1}
+
+
+def fill_search_index(apps, schema_editor):
+    """Indexar os lugares existentes"""
+    Place = apps.get_model("explore", "Place")
+    PlaceSearchTerm = apps.get_model("explore", "PlaceSearchTerm")
+
+    category_names = {}
+    for place_id, name in Place.categories.through.objects.values_list(
+        "place_id", "category__name"
+    ):
+        category_names.setdefault(place_id, []).append(name)
+
+    terms = []
+    for place_id, name, description in Place.objects.values_list(
+        "id", "name", "description"
+    ).iterator():
+        weights = {}
+        for field, text in (
+            ("name", name),
+            ("categories", " ".join(category_names.get(place_id, []))),
+            ("description", description),
+        ):
+            for term in set(analyze(text)):
+                weights[term] = weights.get(term, 0) + FIELD_WEIGHTS[field]
+        terms.extend(
+            PlaceSearchTerm(place_id=place_id, term=term, weight=weight)
+            for term, weight in weights.items()
+        )
+    PlaceSearchTerm.objects.bulk_create(terms, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("explore", "0015_placecard"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PlaceSearchTerm",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "term",
+                    models.CharField(help_text="Radical normalizado", max_length=40),
+                ),
+                (
+                    "weight",
+                    models.PositiveSmallIntegerField(
+                        help_text="Soma dos pesos dos campos que contêm o radical"
+                    ),
+                ),
+                (
+                    "place",
+                    models.ForeignKey(
+                        help_text="Lugar indexado",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="search_terms",
+                        to="explore.place",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Termo de Busca",
+                "verbose_name_plural": "Termos de Busca",
+                "indexes": [
+                    models.Index(
+                        fields=["term", "place", "weight"],
+                        name="explore_pla_term_075ba9_idx",
+                    )
+                ],
+                "unique_together": {("place", "term")},
+            },
+        ),
+        migrations.RunPython(fill_search_index, migrations.RunPython.noop),
+    ]
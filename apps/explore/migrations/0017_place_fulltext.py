@@ -0,0 +1,165 @@
+import re
+import sqlite3
+import unicodedata
+
+from django.db import migrations
+
+# Cópia da análise de texto (apps.core.text.analyze) e da detecção de FTS5
+# (apps.core.search.sqlite_has_fts5) na data desta migração: mudanças
+# posteriores no código da busca não alteram o que ela faz
+
+
+def sqlite_has_fts5():
+    """Verificar se o SQLite deste processo foi compilado com FTS5"""
+    with sqlite3.connect(":memory:") as db:
+        options = {row[0] for row in db.execute("PRAGMA compile_options")}
+    return "ENABLE_FTS5" in options
+
+
+MIN_STEM_LENGTH = 3
+MAX_TERM_LENGTH = 40
+WORD_RE = re.compile(r"\w+")
+STOP_WORDS = frozenset(
+    """
+    a o as os um uma uns umas ao aos da do das dos de em no na nos nas num numa
+    por pelo pela pelos pelas para com sem sob sobre entre ate apos desde e ou
+    mas nem que se como quando onde porque pois ja nao sim mais menos muito
+    muita muitos muitas eu tu ele ela nos vos eles elas me te lhe lhes meu minha
+    meus minhas teu tua seu sua seus suas nosso nossa este esta estes estas esse
+    essa esses essas aquele aquela isto isso aquilo ser estar ter ha foi sao era
+    esta tem tambem so
+    """.split()
+)
+PLURAL_RULES = (
+    ("oes", "ao"),
+    ("aes", "ao"),
+    ("ais", "al"),
+    ("eis", "el"),
+    ("ois", "ol"),
+    ("ns", "m"),
+    ("les", "l"),
+    ("res", "r"),
+    ("zes", "z"),
+    ("is", "il"),
+    ("s", ""),
+)
+PLURAL_EXCEPTIONS = frozenset(
+    "lapis onibus virus atlas pires tenis cais gas bonus campus oasis".split()
+)
+FEMININE_RULES = (
+    ("ona", "ao"),
+    ("eira", "eiro"),
+    ("ora", "or"),
+    ("osa", "oso"),
+    ("ica", "ico"),
+    ("ada", "ado"),
+    ("ida", "ido"),
+    ("iva", "ivo"),
+    ("ina", "ino"),
+)
+ADVERB_SUFFIX = "mente"
+THEMATIC_VOWELS = "aeo"
+
+
+def fold(text):
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def _replace_suffix(word, rules):
+    for suffix, replacement in rules:
+        stem = word[: -len(suffix)]
+        if word.endswith(suffix) and len(stem) + len(replacement) >= MIN_STEM_LENGTH:
+            return stem + replacement
+    return word
+
+
+def stem(word):
+    if word.isdigit() or len(word) <= MIN_STEM_LENGTH:
+        return word
+
+    if word.endswith("s") and word not in PLURAL_EXCEPTIONS:
+        word = _replace_suffix(word, PLURAL_RULES)
+    word = _replace_suffix(word, FEMININE_RULES)
+    if word.endswith(ADVERB_SUFFIX) and len(word) - len(ADVERB_SUFFIX) >= 4:
+        word = word[: -len(ADVERB_SUFFIX)]
+    if word[-1] in THEMATIC_VOWELS and len(word) > MIN_STEM_LENGTH + 1:
+        word = word[:-1]
+    return word[:MAX_TERM_LENGTH]
+
+
+def analyze(text):
+    """Radicais das palavras do texto, na ordem (com repetições)"""
+    words = WORD_RE.findall(fold(text))
+    return [stem(word) for word in words if word not in STOP_WORDS]
+
+
+# Colunas do índice, na ordem dos pesos de search.SEARCH_FIELD_WEIGHTS
+FIELDS = ("name", "categories", "description")
+
+
+def _place_texts(apps):
+    """Texto analisado de cada lugar: (id, nome, categorias, descrição)"""
+    Place = apps.get_model("explore", "Place")
+    category_names = {}
+    for place_id, name in Place.categories.through.objects.values_list(
+        "place_id", "category__name"
+    ):
+        category_names.setdefault(place_id, []).append(name)
+    for place_id, name, description in Place.objects.values_list(
+        "id", "name", "description"
+    ).iterator():
+        texts = (name, " ".join(category_names.get(place_id, [])), description)
+        yield place_id, *(" ".join(analyze(text)) for text in texts)
+
+
+def create_fulltext_index(apps, schema_editor):
+    """Índice nativo do banco: tabela FTS5 no SQLite ou tsvector no PostgreSQL"""
+    connection = schema_editor.connection
+    if connection.vendor == "sqlite" and sqlite_has_fts5():
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE explore_place_fts USING fts5({', '.join(FIELDS)})"
+        )
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                "INSERT INTO explore_place_fts (rowid, name, categories, description) "
+                "VALUES (%s, %s, %s, %s)",
+                list(_place_texts(apps)),
+            )
+    elif connection.vendor == "postgresql":
+        schema_editor.execute(
+            "ALTER TABLE explore_place ADD COLUMN search_vector tsvector"
+        )
+        schema_editor.execute(
+            "CREATE INDEX explore_place_search_vector_idx ON explore_place "
+            "USING GIN (search_vector)"
+        )
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                "UPDATE explore_place SET search_vector = "
+                "setweight(to_tsvector('simple', %s), 'A') || "
+                "setweight(to_tsvector('simple', %s), 'B') || "
+                "setweight(to_tsvector('simple', %s), 'C') WHERE id = %s",
+                [(*texts, place_id) for place_id, *texts in _place_texts(apps)],
+            )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "sqlite" and sqlite_has_fts5():
+        schema_editor.execute("DROP TABLE IF EXISTS explore_place_fts")
+    elif connection.vendor == "postgresql":
+        schema_editor.execute(
+            "ALTER TABLE explore_place DROP COLUMN IF EXISTS search_vector"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("explore", "0016_placesearchterm"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+# Índices GIN de trigramas (pg_trgm) usados pela busca aproximada
+TRIGRAM_INDEXES = {
+    "explore_place_name_trgm_idx": "explore_place",
+    "explore_category_name_trgm_idx": "explore_category",
+}
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """Apenas no PostgreSQL; nos demais bancos o índice fica em memória"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for index, table in TRIGRAM_INDEXES.items():
+        schema_editor.execute(
+            f"CREATE INDEX {index} ON {table} USING GIN (name gin_trgm_ops)"
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for index in TRIGRAM_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {index}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("explore", "0017_place_fulltext"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:37
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("explore", "0018_name_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchQueryLog",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "query",
+                    models.CharField(
+                        help_text="Consulta normalizada", max_length=200, unique=True
+                    ),
+                ),
+                (
+                    "hits",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Buscas respondidas pelo cache"
+                    ),
+                ),
+                (
+                    "misses",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Buscas calculadas no banco"
+                    ),
+                ),
+                (
+                    "last_searched_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        help_text="Última vez que a consulta foi buscada",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Busca Registrada",
+                "verbose_name_plural": "Buscas Registradas",
+            },
+        ),
+    ]
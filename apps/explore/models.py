@@ -1,5 +1,13 @@
+from datetime import timedelta
+
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Cast, NullIf
+from django.utils import timezone
+
+from apps.core.text import MAX_TERM_LENGTH, normalize_query
+
+from .geo import encode_geohash
 
 
 class Category(models.Model):
@@ -42,10 +50,29 @@ class Category(models.Model):
 
     @property
     def active_places_count(self):
-        """Contagem de lugares ativos aprovados nesta categoria"""
+        """
+        Contagem de lugares ativos aprovados nesta categoria
+        Usa a contagem em cache preenchida por caching.with_place_counts()
+        """
+        if hasattr(self, "place_count"):
+            return self.place_count
         return self.places.filter(is_active=True, is_approved=True).count()
 
 
+# Tamanho do resumo da descrição exibido em cards e na API do mapa
+EXCERPT_LENGTH = 100
+
+# Colunas de texto longas que as listagens em cards não exibem (usam excerpt)
+CARD_DEFERRED_FIELDS = ("description",)
+
+
+def place_excerpt(description):
+    """Resumo da descrição: os primeiros EXCERPT_LENGTH caracteres"""
+    if len(description) > EXCERPT_LENGTH:
+        return description[:EXCERPT_LENGTH] + "..."
+    return description
+
+
 class Place(models.Model):
     name = models.CharField(max_length=200, help_text="Nome do lugar")
 
@@ -53,6 +80,14 @@ class Place(models.Model):
 
     address = models.TextField(help_text="Endereço completo do lugar")
 
+    # Mantido por save() a partir da descrição (cards e API do mapa)
+    excerpt = models.CharField(
+        max_length=EXCERPT_LENGTH + 3,
+        blank=True,
+        editable=False,
+        help_text="Resumo da descrição para listagens",
+    )
+
     # Coordenadas de localização
     latitude = models.DecimalField(
         max_digits=9,
@@ -68,6 +103,12 @@ class Place(models.Model):
         blank=True,
         help_text="Coordenada de longitude",
     )
+    geohash = models.CharField(
+        max_length=12,
+        blank=True,
+        editable=False,
+        help_text="Geohash das coordenadas, usado como índice espacial",
+    )
 
     # Relacionamentos
     categories = models.ManyToManyField(
@@ -104,17 +145,53 @@ class Place(models.Model):
         indexes = [
             models.Index(fields=["is_approved", "is_active"]),
             models.Index(fields=["-created_at"]),
+            models.Index(fields=["geohash"]),
         ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Manter o geohash e o resumo sincronizados com as coordenadas e a descrição
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = encode_geohash(self.latitude, self.longitude)
+        else:
+            self.geohash = ""
+
+        if "description" not in self.get_deferred_fields():
+            self.excerpt = place_excerpt(self.description)
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            derived = set()
+            if "latitude" in update_fields or "longitude" in update_fields:
+                derived.add("geohash")
+            if "description" in update_fields:
+                derived.add("excerpt")
+            if derived:
+                kwargs["update_fields"] = {*update_fields, *derived}
+
+        super().save(*args, **kwargs)
+
     @property
     def is_pending(self):
         return not self.is_approved
 
     @property
     def primary_image(self):
+        """
+        Imagem primária do lugar (ou None)
+        Usa as imagens já pré-carregadas (prefetch_related("images") ou o
+        Prefetch com to_attr="primary_images") sem nova consulta; só consulta o
+        banco quando as imagens não foram pré-carregadas
+        """
+        if hasattr(self, "primary_images"):
+            return self.primary_images[0] if self.primary_images else None
+        if "images" in getattr(self, "_prefetched_objects_cache", {}):
+            # Mesma ordem de PlaceImage.Meta.ordering usada por .first()
+            return next(
+                (image for image in self.images.all() if image.is_primary), None
+            )
         return self.images.filter(is_primary=True).first()
 
     @property
@@ -122,17 +199,40 @@ class Place(models.Model):
         return self.images.all()
 
     @property
-    def average_rating(self):
-        """Calcula a avaliação média de todas as avaliações"""
-        from django.db.models import Avg
+    def place_stats(self):
+        """Agregados do lugar (PlaceStats) ou None se ainda não existirem"""
+        try:
+            return self.stats
+        except PlaceStats.DoesNotExist:
+            return None
 
-        result = self.reviews.aggregate(Avg("rating"))
-        return round(result["rating__avg"], 1) if result["rating__avg"] else None
+    @property
+    def average_rating(self):
+        """Avaliação média de todas as avaliações (lida de PlaceStats)"""
+        stats = self.place_stats
+        if stats is None or not stats.average_rating:
+            return None
+        return round(stats.average_rating, 1)
 
     @property
     def review_count(self):
-        """Contagem de avaliações para este lugar"""
-        return self.reviews.count()
+        """Contagem de avaliações para este lugar (lida de PlaceStats)"""
+        stats = self.place_stats
+        return stats.review_count if stats else 0
+
+    @property
+    def favorites_count(self):
+        """Contagem de favoritos para este lugar (lida de PlaceStats)"""
+        stats = self.place_stats
+        return stats.favorites_count if stats else 0
+
+    @property
+    def rating_histogram(self):
+        """Número de avaliações por nota: {1: n, ..., 5: n} (lido de PlaceStats)"""
+        stats = self.place_stats
+        if stats is None:
+            return dict.fromkeys(RATING_STARS, 0)
+        return stats.rating_histogram
 
 
 class PlaceImage(models.Model):
@@ -331,3 +431,462 @@ class Favorite(models.Model):
 
     def __str__(self):
         return f"{self.user.username} favorited {self.place.name}"
+
+
+class PlaceChange(models.Model):
+    """
+    Registro de alterações de lugares para a sincronização incremental do mapa
+    O id é a versão de alteração (monotonicamente crescente); place_id não é
+    uma chave estrangeira para que o registro sobreviva à exclusão do lugar
+    """
+
+    place_id = models.BigIntegerField(help_text="ID do lugar alterado")
+
+    changed_at = models.DateTimeField(
+        auto_now_add=True, help_text="Quando a alteração aconteceu"
+    )
+
+    class Meta:
+        ordering = ["id"]
+        verbose_name = "Alteração de Lugar"
+        verbose_name_plural = "Alterações de Lugares"
+        indexes = [
+            models.Index(fields=["place_id"]),
+        ]
+
+    def __str__(self):
+        return f"Place {self.place_id} @ v{self.id}"
+
+    @classmethod
+    def record(cls, place_ids):
+        """Registrar uma nova versão para cada lugar informado"""
+        cls.objects.bulk_create([cls(place_id=place_id) for place_id in place_ids])
+
+    @classmethod
+    def current_version(cls):
+        """Versão mais recente (0 se nada foi alterado ainda)"""
+        return cls.objects.aggregate(version=models.Max("id"))["version"] or 0
+
+    @classmethod
+    def oldest_version(cls):
+        """Versão mais antiga ainda registrada (None se não há registros)"""
+        return cls.objects.aggregate(version=models.Min("id"))["version"]
+
+    @classmethod
+    def prune(cls, before):
+        """
+        Remover os registros anteriores à data informada, mantendo sempre o
+        mais recente (a versão atual não pode voltar atrás)
+        Retorna o número de registros removidos
+        """
+        deleted, _ = cls.objects.filter(
+            changed_at__lt=before, id__lt=cls.current_version()
+        ).delete()
+        return deleted
+
+
+RATING_STARS = (1, 2, 3, 4, 5)
+
+
+def bayesian_rating(rating_sum=0, review_count=0):
+    """
+    Média bayesiana das notas: a média é puxada para RATING_PRIOR_MEAN como se
+    o lugar tivesse RATING_PRIOR_WEIGHT avaliações extras com essa nota, para
+    que poucas avaliações não coloquem um lugar no topo
+    """
+    weight = settings.RATING_PRIOR_WEIGHT
+    total = weight * settings.RATING_PRIOR_MEAN + rating_sum
+    return total / (weight + review_count) if weight + review_count else None
+
+
+class PlaceStats(models.Model):
+    """
+    Agregados desnormalizados de um lugar (avaliações e favoritos)
+    Atualizados de forma incremental pelos sinais de PlaceReview e Favorite;
+    rebuild() recalcula tudo a partir das tabelas de origem
+    """
+
+    place = models.OneToOneField(
+        Place,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats",
+        help_text="Lugar ao qual os agregados pertencem",
+    )
+
+    review_count = models.PositiveIntegerField(
+        default=0, help_text="Número de avaliações"
+    )
+
+    rating_sum = models.PositiveIntegerField(
+        default=0, help_text="Soma das notas de todas as avaliações"
+    )
+
+    average_rating = models.FloatField(
+        null=True, blank=True, help_text="Nota média (vazia sem avaliações)"
+    )
+
+    # Histograma das notas (número de avaliações com cada nota)
+    rating_1 = models.PositiveIntegerField(default=0, help_text="Avaliações com 1 ★")
+    rating_2 = models.PositiveIntegerField(default=0, help_text="Avaliações com 2 ★")
+    rating_3 = models.PositiveIntegerField(default=0, help_text="Avaliações com 3 ★")
+    rating_4 = models.PositiveIntegerField(default=0, help_text="Avaliações com 4 ★")
+    rating_5 = models.PositiveIntegerField(default=0, help_text="Avaliações com 5 ★")
+
+    # Usada na ordenação por avaliação (?sort=rating)
+    bayesian_rating = models.FloatField(
+        null=True,
+        blank=True,
+        default=bayesian_rating,
+        help_text="Média bayesiana das notas (ver bayesian_rating())",
+    )
+
+    favorites_count = models.PositiveIntegerField(
+        default=0, help_text="Número de usuários que favoritaram o lugar"
+    )
+
+    # Calculada periodicamente por update_trending() a partir de PlaceActivity
+    trending_score = models.FloatField(
+        default=0, help_text="Popularidade recente, com decaimento no tempo"
+    )
+
+    class Meta:
+        verbose_name = "Estatísticas de Lugar"
+        verbose_name_plural = "Estatísticas de Lugares"
+        indexes = [
+            models.Index(fields=["-bayesian_rating"]),
+            models.Index(fields=["-favorites_count"]),
+            models.Index(fields=["-trending_score"]),
+        ]
+
+    def __str__(self):
+        return f"Stats of place {self.place_id}"
+
+    @property
+    def rating_histogram(self):
+        """Número de avaliações por nota: {1: n, ..., 5: n}"""
+        return {stars: getattr(self, f"rating_{stars}") for stars in RATING_STARS}
+
+    @classmethod
+    def apply(cls, place_id, reviews=0, rating=0, favorites=0, stars=None):
+        """
+        Aplicar variações aos agregados em um único UPDATE atômico
+        (F() evita condições de corrida entre requisições concorrentes)
+        stars: variações do histograma, por exemplo {4: -1, 5: 1}
+        Retorna False se o lugar ainda não tem registro de estatísticas
+        """
+        review_count = models.F("review_count") + reviews
+        rating_sum = models.F("rating_sum") + rating
+        histogram = {
+            f"rating_{star}": models.F(f"rating_{star}") + delta
+            for star, delta in (stars or {}).items()
+            if delta
+        }
+        updated = cls.objects.filter(place_id=place_id).update(
+            review_count=review_count,
+            rating_sum=rating_sum,
+            average_rating=Cast(rating_sum, models.FloatField())
+            / NullIf(review_count, 0),
+            bayesian_rating=cls.bayesian_rating_expression(rating_sum, review_count),
+            favorites_count=models.F("favorites_count") + favorites,
+            **histogram,
+        )
+        return bool(updated)
+
+    @staticmethod
+    def bayesian_rating_expression(rating_sum, review_count):
+        """Versão SQL de bayesian_rating(), para atualizações com F()"""
+        weight = settings.RATING_PRIOR_WEIGHT
+        total = Cast(rating_sum, models.FloatField()) + models.Value(
+            weight * settings.RATING_PRIOR_MEAN
+        )
+        return total / NullIf(review_count + weight, 0)
+
+    @classmethod
+    def rebuild(cls, place_ids=None):
+        """
+        Recalcular os agregados a partir de PlaceReview e Favorite
+        Sem place_ids, recalcula todos os lugares; retorna o número de registros
+        """
+        places = Place.objects.all()
+        reviews = PlaceReview.objects.all()
+        favorites = Favorite.objects.all()
+        if place_ids is not None:
+            places = places.filter(id__in=place_ids)
+            reviews = reviews.filter(place_id__in=place_ids)
+            favorites = favorites.filter(place_id__in=place_ids)
+
+        # Consultas agrupadas separadas para não multiplicar as linhas nas junções
+        histograms = {}
+        for place_id, rating, count in (
+            reviews.values("place_id", "rating")
+            .annotate(count=models.Count("id"))
+            .order_by()
+            .values_list("place_id", "rating", "count")
+        ):
+            histograms.setdefault(place_id, {})[rating] = count
+        favorite_totals = dict(
+            favorites.values("place_id")
+            .annotate(count=models.Count("id"))
+            .order_by()
+            .values_list("place_id", "count")
+        )
+
+        stats = []
+        for place_id in places.values_list("id", flat=True).iterator():
+            histogram = histograms.get(place_id, {})
+            review_count = sum(histogram.values())
+            rating_sum = sum(star * count for star, count in histogram.items())
+            stats.append(
+                cls(
+                    place_id=place_id,
+                    review_count=review_count,
+                    rating_sum=rating_sum,
+                    average_rating=(
+                        rating_sum / review_count if review_count else None
+                    ),
+                    bayesian_rating=bayesian_rating(rating_sum, review_count),
+                    favorites_count=favorite_totals.get(place_id, 0),
+                    **{
+                        f"rating_{star}": histogram.get(star, 0)
+                        for star in RATING_STARS
+                    },
+                )
+            )
+
+        cls.objects.bulk_create(
+            stats,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["place"],
+            update_fields=[
+                "review_count",
+                "rating_sum",
+                "average_rating",
+                "bayesian_rating",
+                "favorites_count",
+                *(f"rating_{star}" for star in RATING_STARS),
+            ],
+        )
+        return len(stats)
+
+    @classmethod
+    def update_trending(cls, today=None):
+        """
+        Recalcular trending_score a partir das atividades diárias recentes
+        Cada dia soma as atividades ponderadas por TRENDING_WEIGHTS, com peso
+        reduzido à metade a cada TRENDING_HALF_LIFE_DAYS dias; só os lugares com
+        atividade na janela (ou que ainda têm pontuação) são atualizados
+        Remove as atividades anteriores à janela; retorna o número de lugares
+        com pontuação
+        """
+        today = today or timezone.localdate()
+        start = today - timedelta(days=settings.TRENDING_WINDOW_DAYS - 1)
+        half_life = settings.TRENDING_HALF_LIFE_DAYS
+
+        scores = {}
+        for place_id, day, *counts in (
+            PlaceActivity.objects.filter(day__gte=start, day__lte=today)
+            .values_list("place_id", "day", *TRENDING_WEIGHTS)
+            .iterator()
+        ):
+            points = sum(
+                count * weight
+                for count, weight in zip(counts, TRENDING_WEIGHTS.values())
+            )
+            decay = 0.5 ** ((today - day).days / half_life)
+            scores[place_id] = scores.get(place_id, 0) + points * decay
+
+        # Lugares cuja atividade saiu da janela voltam a zero
+        cls.objects.filter(trending_score__gt=0).exclude(
+            place_id__in=PlaceActivity.objects.filter(
+                day__gte=start, day__lte=today
+            ).values("place_id")
+        ).update(trending_score=0)
+        cls.objects.bulk_update(
+            [
+                cls(place_id=place_id, trending_score=score)
+                for place_id, score in scores.items()
+            ],
+            ["trending_score"],
+            batch_size=1000,
+        )
+        PlaceActivity.objects.filter(day__lt=start).delete()
+        return len(scores)
+
+
+# Peso de cada tipo de atividade na pontuação de tendência
+TRENDING_WEIGHTS = {"views": 1, "reviews": 5, "favorites": 3}
+
+
+class PlaceActivity(models.Model):
+    """
+    Contadores diários de atividade de um lugar (visualizações, avaliações e
+    favoritos novos), usados no cálculo da pontuação de tendência
+    """
+
+    place = models.ForeignKey(
+        Place,
+        on_delete=models.CASCADE,
+        related_name="activity",
+        help_text="Lugar da atividade",
+    )
+
+    day = models.DateField(help_text="Dia da atividade")
+
+    views = models.PositiveIntegerField(
+        default=0, help_text="Visualizações da página do lugar"
+    )
+
+    reviews = models.PositiveIntegerField(default=0, help_text="Avaliações novas")
+
+    favorites = models.PositiveIntegerField(default=0, help_text="Favoritos novos")
+
+    class Meta:
+        verbose_name = "Atividade de Lugar"
+        verbose_name_plural = "Atividades de Lugares"
+        unique_together = ("place", "day")  # Um contador por lugar por dia
+        indexes = [
+            models.Index(fields=["day"]),
+        ]
+
+    def __str__(self):
+        return f"Activity of place {self.place_id} on {self.day}"
+
+    @classmethod
+    def record(cls, place_id, **counts):
+        """
+        Somar atividades ao contador do dia, por exemplo record(1, views=1)
+        O contador do dia é criado na primeira atividade
+        """
+        day = timezone.localdate()
+        deltas = {field: models.F(field) + value for field, value in counts.items()}
+        if cls.objects.filter(place_id=place_id, day=day).update(**deltas):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(place_id=place_id, day=day, **counts)
+        except IntegrityError:
+            # Outra requisição criou o contador do dia ao mesmo tempo
+            cls.objects.filter(place_id=place_id, day=day).update(**deltas)
+
+
+class SearchQueryLog(models.Model):
+    """
+    Buscas do explore por consulta normalizada, com quantas foram respondidas
+    pelo cache de resultados (hits) e quantas foram calculadas (misses); as
+    mais frequentes são pré-aquecidas pelo comando warm_search_cache
+    """
+
+    query = models.CharField(
+        max_length=200, unique=True, help_text="Consulta normalizada"
+    )
+
+    hits = models.PositiveIntegerField(
+        default=0, help_text="Buscas respondidas pelo cache"
+    )
+
+    misses = models.PositiveIntegerField(
+        default=0, help_text="Buscas calculadas no banco"
+    )
+
+    last_searched_at = models.DateTimeField(
+        default=timezone.now, help_text="Última vez que a consulta foi buscada"
+    )
+
+    class Meta:
+        verbose_name = "Busca Registrada"
+        verbose_name_plural = "Buscas Registradas"
+
+    def __str__(self):
+        return self.query
+
+    @classmethod
+    def record(cls, query, hit):
+        """Contar uma busca (a consulta é normalizada; vazias são ignoradas)"""
+        query = normalize_query(query)[: cls._meta.get_field("query").max_length]
+        if not query:
+            return
+        counts = {"hits": 1} if hit else {"misses": 1}
+        deltas = {field: models.F(field) + value for field, value in counts.items()}
+        now = timezone.now()
+        if cls.objects.filter(query=query).update(last_searched_at=now, **deltas):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(query=query, last_searched_at=now, **counts)
+        except IntegrityError:
+            # Outra requisição registrou a consulta ao mesmo tempo
+            cls.objects.filter(query=query).update(last_searched_at=now, **deltas)
+
+    @classmethod
+    def popular(cls, limit):
+        """Consultas mais buscadas (acertos e faltas)"""
+        return cls.objects.order_by(
+            (models.F("hits") + models.F("misses")).desc(), "query"
+        )[:limit]
+
+
+class PlaceCard(models.Model):
+    """
+    JSON pré-serializado de um lugar, como aparece nas APIs do explore
+    Regenerado pelos sinais quando o lugar, suas imagens, categorias ou
+    avaliações mudam (ver cards.py); as APIs concatenam os fragmentos prontos
+    """
+
+    place = models.OneToOneField(
+        Place,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="card",
+        help_text="Lugar serializado",
+    )
+
+    # Campos de MAP_PLACE_FIELDS (vazio para lugares sem coordenadas)
+    map_json = models.TextField(blank=True, help_text="JSON do lugar no mapa")
+
+    # Campos de PLACE_DETAIL_FIELDS
+    detail_json = models.TextField(help_text="JSON com os detalhes do lugar")
+
+    updated_at = models.DateTimeField(help_text="Data da última serialização")
+
+    class Meta:
+        verbose_name = "Cartão de Lugar"
+        verbose_name_plural = "Cartões de Lugares"
+
+    def __str__(self):
+        return f"Card of place {self.place_id}"
+
+
+class PlaceSearchTerm(models.Model):
+    """
+    Índice invertido da busca do explore: um registro por radical de cada
+    lugar (ver text.analyze), com o peso dos campos onde o radical aparece
+    Usado pelo backend de busca "terms" (apps.core.search); mantido pelos
+    sinais quando esse backend está ativo (ver search.py)
+    """
+
+    place = models.ForeignKey(
+        Place,
+        on_delete=models.CASCADE,
+        related_name="search_terms",
+        help_text="Lugar indexado",
+    )
+
+    term = models.CharField(max_length=MAX_TERM_LENGTH, help_text="Radical normalizado")
+
+    weight = models.PositiveSmallIntegerField(
+        help_text="Soma dos pesos dos campos que contêm o radical"
+    )
+
+    class Meta:
+        verbose_name = "Termo de Busca"
+        verbose_name_plural = "Termos de Busca"
+        unique_together = ("place", "term")  # Um registro por radical por lugar
+        indexes = [
+            # Listas de lugares por radical (igualdade ou intervalo de prefixo)
+            models.Index(fields=["term", "place", "weight"]),
+        ]
+
+    def __str__(self):
+        return f"{self.term} ({self.place_id})"
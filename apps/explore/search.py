@@ -0,0 +1,195 @@
+"""
+Busca de lugares do explore
+- Documento de busca de Place (apps.core.search): nome, categorias e
+  descrição, com pesos por campo; a busca usa o backend configurado
+- Índice invertido em PlaceSearchTerm (backend "terms"): radicais do nome, das
+  categorias e da descrição de cada lugar, com pesos por campo; a busca
+  consulta apenas as listas de lugares dos radicais pedidos (índice por termo)
+- Facetas por categoria calculadas sobre o resultado da busca a partir de um
+  índice em memória (lugares de cada categoria), sem consulta por categoria
+"""
+
+from functools import reduce
+from operator import or_
+
+from django.db.models import Exists, OuterRef, Q, Subquery, Sum, Value
+
+from apps.core.search import TermIndex, register_document
+from apps.core.text import analyze
+
+from .caching import facet_index_version
+from .models import Place, PlaceSearchTerm
+
+# Peso de cada campo na relevância: o nome vale mais que as categorias, que
+# valem mais que a descrição
+SEARCH_FIELD_WEIGHTS = {"name": 4, "categories": 2, "description": 1}
+
+# Limite superior do intervalo de prefixo (term >= p AND term < p + fim)
+PREFIX_END = chr(0x10FFFF)
+
+
+def _category_names(place_ids):
+    """Nomes das categorias de cada lugar: {id do lugar: [nomes]}"""
+    category_names = {}
+    for place_id, category_name in Place.categories.through.objects.filter(
+        place_id__in=place_ids
+    ).values_list("place_id", "category__name"):
+        category_names.setdefault(place_id, []).append(category_name)
+    return category_names
+
+
+def place_texts(place_ids):
+    """Texto de cada campo buscável: {id do lugar: {campo: texto}}"""
+    category_names = _category_names(place_ids)
+    return {
+        place_id: {
+            "name": name,
+            "categories": " ".join(category_names.get(place_id, [])),
+            "description": description,
+        }
+        for place_id, name, description in Place.objects.filter(
+            id__in=place_ids
+        ).values_list("id", "name", "description")
+    }
+
+
+def place_terms(name, description, category_names):
+    """Radicais de um lugar com o peso de cada um: {radical: peso}"""
+    weights = {}
+    for field, text in (
+        ("name", name),
+        ("categories", " ".join(category_names)),
+        ("description", description),
+    ):
+        for term in set(analyze(text)):
+            weights[term] = weights.get(term, 0) + SEARCH_FIELD_WEIGHTS[field]
+    return weights
+
+
+def index_places(place_ids):
+    """
+    Reindexar os lugares (nome, descrição e nomes das categorias) em número
+    fixo de consultas; retorna o número de termos gravados
+    """
+    place_ids = set(place_ids)
+    if not place_ids:
+        return 0
+
+    category_names = _category_names(place_ids)
+    terms = []
+    for place_id, name, description in Place.objects.filter(
+        id__in=place_ids
+    ).values_list("id", "name", "description"):
+        weights = place_terms(name, description, category_names.get(place_id, []))
+        terms.extend(
+            PlaceSearchTerm(place_id=place_id, term=term, weight=weight)
+            for term, weight in weights.items()
+        )
+
+    PlaceSearchTerm.objects.filter(place_id__in=place_ids).delete()
+    PlaceSearchTerm.objects.bulk_create(terms, batch_size=1000)
+    return len(terms)
+
+
+def query_conditions(query):
+    """
+    Uma condição sobre PlaceSearchTerm.term por palavra da consulta
+    A última palavra casa por prefixo (busca enquanto se digita); as demais,
+    pelo radical exato. Lista vazia se a consulta só tem palavras vazias
+    """
+    terms = list(dict.fromkeys(analyze(query)))
+    if not terms:
+        return []
+    *exact, prefix = terms
+    conditions = [Q(term=term) for term in exact]
+    conditions.append(Q(term__gte=prefix, term__lt=prefix + PREFIX_END))
+    return conditions
+
+
+def search_term_index(places, query):
+    """
+    Restringe o queryset de lugares aos que contêm todas as palavras da
+    consulta e anota "relevance" (soma dos pesos dos termos encontrados)
+    A lista de lugares da palavra mais rara conduz a busca; as demais palavras
+    são conferidas apenas nesses lugares pelo índice (lugar, termo), então o
+    custo não cresce com o catálogo, e sim com a lista mais curta
+    Sem palavras buscáveis, o resultado é vazio (ainda com "relevance")
+    """
+    conditions = query_conditions(query)
+    if not conditions:
+        return places.annotate(relevance=Value(0)).none()
+    if len(conditions) > 1:
+        conditions.sort(key=lambda condition: _posting_count(condition))
+
+    rarest, *others = conditions
+    places = places.filter(
+        id__in=PlaceSearchTerm.objects.filter(rarest).values("place_id")
+    )
+    for condition in others:
+        places = places.filter(
+            Exists(PlaceSearchTerm.objects.filter(condition, place=OuterRef("pk")))
+        )
+
+    relevance = (
+        PlaceSearchTerm.objects.filter(reduce(or_, conditions), place=OuterRef("pk"))
+        .values("place")
+        .annotate(total=Sum("weight"))
+        .values("total")
+    )
+    return places.annotate(relevance=Subquery(relevance))
+
+
+def _posting_count(condition):
+    """Tamanho da lista de lugares de uma palavra (varredura só do índice)"""
+    return PlaceSearchTerm.objects.filter(condition).count()
+
+
+PLACE_DOCUMENT = register_document(
+    Place,
+    weights=SEARCH_FIELD_WEIGHTS,
+    texts=place_texts,
+    lookups=("name", "description", "categories__name"),
+    term_index=TermIndex(search=search_term_index, index=index_places),
+)
+
+
+# Índice de facetas deste processo: versão e {id da categoria: ids dos lugares}
+_facet_index = (None, {})
+
+
+def category_index():
+    """
+    Lugares de cada categoria: {id da categoria: frozenset de ids dos lugares}
+    Mantido em memória e reconstruído (uma consulta na tabela de ligação
+    lugar–categoria) quando a versão do índice muda
+    """
+    global _facet_index
+    version = facet_index_version()
+    if _facet_index[0] != version:
+        members = {}
+        for place_id, category_id in (
+            Place.categories.through.objects.values_list("place_id", "category_id")
+            .order_by()
+            .iterator()
+        ):
+            members.setdefault(category_id, set()).add(place_id)
+        _facet_index = (
+            version,
+            {category_id: frozenset(ids) for category_id, ids in members.items()},
+        )
+    return _facet_index[1]
+
+
+def category_facets(place_ids):
+    """
+    Número de lugares do resultado em cada categoria: {id da categoria: contagem}
+    place_ids: ids dos lugares do resultado da busca; categorias sem nenhum
+    lugar do resultado não aparecem
+    """
+    place_ids = set(place_ids)
+    counts = {}
+    for category_id, members in category_index().items():
+        count = len(members & place_ids)
+        if count:
+            counts[category_id] = count
+    return counts
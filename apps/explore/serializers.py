@@ -0,0 +1,324 @@
+"""
+Serialização dos lugares para as APIs JSON do explore
+Cada campo declara as colunas e os prefetches de que precisa, para que as
+consultas carreguem apenas o necessário para os campos pedidos (?fields=)
+"""
+
+from collections import namedtuple
+from types import SimpleNamespace
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Prefetch
+from django.db.models.functions import Coalesce
+
+from .models import RATING_STARS, PlaceImage
+
+PLACE_URL_TEMPLATE = "/explore/place/{id}/"
+
+# Precisão máxima das coordenadas (DecimalField com 6 casas decimais)
+MAX_COORDINATE_PRECISION = 6
+
+# columns: colunas de Place necessárias
+# annotations: agregações calculadas na própria consulta dos lugares
+# prefetch: relacionamentos a pré-carregar
+# simple: o valor depende apenas das colunas e anotações (permite usar .values())
+PlaceField = namedtuple(
+    "PlaceField", ["columns", "annotations", "prefetch", "simple", "value"]
+)
+
+# Apenas a imagem primária, em uma única consulta para todos os lugares
+PRIMARY_IMAGES = Prefetch(
+    "images",
+    queryset=PlaceImage.objects.filter(is_primary=True),
+    to_attr="primary_images",
+)
+# Agregados desnormalizados em PlaceStats (junção 1:1, sem GROUP BY)
+RATING_ANNOTATIONS = {
+    "rating_avg": F("stats__average_rating"),
+    "reviews_total": Coalesce(F("stats__review_count"), 0),
+}
+
+
+def _image_url(place):
+    # Imagem primária pré-carregada em PRIMARY_IMAGES
+    return place.primary_images[0].image.url if place.primary_images else None
+
+
+def _first_category(place):
+    # Obter primeira categoria para ícone/cor
+    return place.categories.first()
+
+
+def _category_name(place):
+    first_category = _first_category(place)
+    return first_category.name if first_category else "Outros"
+
+
+def _category_icon(place):
+    first_category = _first_category(place)
+    return first_category.icon if first_category else "📍"
+
+
+def _categories(place):
+    return [
+        {
+            "name": cat.name,
+            "icon": cat.icon if cat.icon else "",
+            "slug": cat.slug,
+        }
+        for cat in place.categories.all()
+    ]
+
+
+def _rating(place):
+    # Mesmo arredondamento de Place.average_rating
+    return round(place.rating_avg, 1) if place.rating_avg else None
+
+
+_ID = PlaceField(("id",), {}, (), True, lambda place: place.id)
+_NAME = PlaceField(("name",), {}, (), True, lambda place: place.name)
+_URL = PlaceField(
+    ("id",), {}, (), True, lambda place: PLACE_URL_TEMPLATE.format(id=place.id)
+)
+_IMAGE_URL = PlaceField((), {}, (PRIMARY_IMAGES,), False, _image_url)
+_RATING = PlaceField((), RATING_ANNOTATIONS, (), True, _rating)
+_REVIEW_COUNT = PlaceField(
+    (), RATING_ANNOTATIONS, (), True, lambda place: place.reviews_total
+)
+
+# Campos de /explore/api/map-data/ (e clusters/tiles), na ordem da resposta
+MAP_PLACE_FIELDS = {
+    "id": _ID,
+    "name": _NAME,
+    # Resumo armazenado em Place.excerpt (sem carregar a descrição completa)
+    "description": PlaceField(("excerpt",), {}, (), True, lambda place: place.excerpt),
+    "latitude": PlaceField(
+        ("latitude",), {}, (), True, lambda place: float(place.latitude)
+    ),
+    "longitude": PlaceField(
+        ("longitude",), {}, (), True, lambda place: float(place.longitude)
+    ),
+    "image_url": _IMAGE_URL,
+    "category": PlaceField((), {}, ("categories",), False, _category_name),
+    "category_icon": PlaceField((), {}, ("categories",), False, _category_icon),
+    "url": _URL,
+    "rating": _RATING,
+    "review_count": _REVIEW_COUNT,
+}
+
+# Histograma de notas desnormalizado em PlaceStats
+RATING_HISTOGRAM_ANNOTATIONS = {
+    f"rating_{stars}_total": Coalesce(F(f"stats__rating_{stars}"), 0)
+    for stars in RATING_STARS
+}
+
+
+def _rating_histogram(place):
+    return {stars: getattr(place, f"rating_{stars}_total") for stars in RATING_STARS}
+
+
+# Campos de /explore/api/places-by-ids/, na ordem da resposta
+PLACE_DETAIL_FIELDS = {
+    "id": _ID,
+    "name": _NAME,
+    "description": PlaceField(
+        ("description",), {}, (), True, lambda place: place.description
+    ),
+    "image_url": _IMAGE_URL,
+    "categories": PlaceField((), {}, ("categories",), False, _categories),
+    "url": _URL,
+    "rating": _RATING,
+    "review_count": _REVIEW_COUNT,
+    "rating_histogram": PlaceField(
+        (), RATING_HISTOGRAM_ANNOTATIONS, (), True, _rating_histogram
+    ),
+}
+
+# Campos aceitos por places-by-ids: os de detalhe e, apenas quando pedido, o
+# resumo da descrição (a resposta padrão continua igual aos cartões PlaceCard)
+PLACES_BY_IDS_FIELDS = {
+    **PLACE_DETAIL_FIELDS,
+    "excerpt": PlaceField(("excerpt",), {}, (), True, lambda place: place.excerpt),
+}
+
+
+def parse_fields(value, available):
+    """
+    Converte '?fields=id,name' em uma lista de campos válidos
+    Sem valor, retorna todos os campos; levanta ValueError para campos desconhecidos
+    """
+    if not value:
+        return list(available)
+
+    requested = [field.strip() for field in value.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in available]
+    if unknown or not requested:
+        raise ValueError(f"Campos inválidos: {', '.join(unknown)}")
+
+    # Manter a ordem padrão da resposta, sem duplicados
+    return [field for field in available if field in requested]
+
+
+def parse_precision(value):
+    """Converte '?precision=N' (0 a 6 casas decimais); None se não informado"""
+    if not value:
+        return None
+    precision = int(value)
+    if not 0 <= precision <= MAX_COORDINATE_PRECISION:
+        raise ValueError("Precisão inválida")
+    return precision
+
+
+def iter_places(queryset, available, fields=None, precision=None, chunk_size=None):
+    """
+    Gera os dicionários dos lugares apenas com os campos pedidos
+    Carrega só as colunas necessárias (.only() ou .values()), calcula as
+    agregações na mesma consulta e só faz os prefetches que os campos usam,
+    então o número de consultas não depende do número de lugares
+    O queryset deve ter ordenação explícita (order_by)
+    Com chunk_size, percorre o queryset com .iterator(): os lugares são lidos
+    do banco em blocos, sem manter o resultado inteiro em memória
+    """
+    fields = list(available) if fields is None else fields
+    specs = [available[field] for field in fields]
+    columns = {"id"}.union(*(spec.columns for spec in specs))
+    annotations = {}
+    for spec in specs:
+        annotations.update(spec.annotations)
+
+    simple = all(spec.simple for spec in specs)
+    if simple:
+        # Nenhum relacionamento necessário: evitar instanciar os modelos
+        rows = queryset.values(*columns, **annotations)
+    else:
+        prefetch = dict.fromkeys(p for spec in specs for p in spec.prefetch)
+        rows = (
+            queryset.only(*columns).annotate(**annotations).prefetch_related(*prefetch)
+        )
+
+    if chunk_size:
+        rows = rows.iterator(chunk_size=chunk_size)
+    if simple:
+        rows = (SimpleNamespace(**row) for row in rows)
+
+    for place in rows:
+        data = {field: spec.value(place) for field, spec in zip(fields, specs)}
+        if precision is not None:
+            for field in ("latitude", "longitude"):
+                if field in data:
+                    data[field] = round(data[field], precision)
+        yield data
+
+
+def serialize_places(queryset, available, fields=None, precision=None):
+    """Lista com os dicionários dos lugares (ver iter_places)"""
+    return list(iter_places(queryset, available, fields, precision))
+
+
+def stream_places_json(places_data, extra, chunk_size):
+    """
+    Gera o JSON {"places": [...], "count": N, ...extra} em pedaços,
+    acumulando no máximo chunk_size lugares por pedaço
+    """
+    encoder = DjangoJSONEncoder()
+    fragments = (encoder.encode(place) for place in places_data)
+    return stream_fragments_json(fragments, extra, chunk_size)
+
+
+def stream_fragments_json(fragments, extra, chunk_size=None):
+    """
+    Como stream_places_json, mas a partir do JSON já serializado de cada lugar
+    (por exemplo, os cartões de PlaceCard); sem chunk_size, gera um único pedaço
+    """
+    encoder = DjangoJSONEncoder()
+    count = 0
+    buffer = ['{"places": [']
+    for fragment in fragments:
+        if count:
+            buffer.append(", ")
+        buffer.append(fragment)
+        count += 1
+        if chunk_size and count % chunk_size == 0:
+            yield "".join(buffer)
+            buffer = []
+
+    buffer.append(f'], "count": {count}')
+    for key, value in extra.items():
+        buffer.append(f", {encoder.encode(key)}: {encoder.encode(value)}")
+    buffer.append("}")
+    yield "".join(buffer)
+
+
+def _micro_degrees(value):
+    return round(value * 1_000_000)
+
+
+def encode_columnar(places_data):
+    """
+    Converte uma lista de lugares do mapa no formato colunar compacto:
+    - arrays paralelos em "columns" (sem repetir as chaves a cada lugar)
+    - coordenadas em micrograus inteiros, ordenadas e codificadas por diferença
+    - categorias e URLs de imagem internadas em tabelas de consulta
+    - a URL do lugar é derivada do id via "url_template"
+    Funciona com qualquer subconjunto dos campos de MAP_PLACE_FIELDS
+    """
+    present = [
+        field for field in MAP_PLACE_FIELDS if places_data and field in places_data[0]
+    ]
+    has_coordinates = "latitude" in present and "longitude" in present
+
+    if has_coordinates:
+        rows = sorted(
+            places_data,
+            key=lambda place: (
+                _micro_degrees(place["latitude"]),
+                _micro_degrees(place["longitude"]),
+                place.get("id"),
+            ),
+        )
+    else:
+        rows = list(places_data)
+
+    categories = {}
+    images = {}
+    columns = {}
+    for field in present:
+        if field == "category_icon" and "category" in present:
+            continue  # Internado junto com "category"
+        if field == "image_url":
+            field = "image"
+        if field != "url" or "id" not in present:
+            columns[field] = []
+
+    previous_lat = previous_lng = 0
+    for place in rows:
+        for field, values in columns.items():
+            if field in ("latitude", "longitude") and has_coordinates:
+                continue
+            if field == "category":
+                category = (place["category"], place.get("category_icon"))
+                values.append(categories.setdefault(category, len(categories)))
+            elif field == "image":
+                image_url = place["image_url"]
+                values.append(
+                    images.setdefault(image_url, len(images)) if image_url else -1
+                )
+            else:
+                values.append(place[field])
+
+        if has_coordinates:
+            lat = _micro_degrees(place["latitude"])
+            lng = _micro_degrees(place["longitude"])
+            columns["latitude"].append(lat - previous_lat)
+            columns["longitude"].append(lng - previous_lng)
+            previous_lat, previous_lng = lat, lng
+
+    payload = {"format": "columnar", "count": len(rows)}
+    if "url" in present and "id" in present:
+        payload["url_template"] = PLACE_URL_TEMPLATE
+    if "category" in columns:
+        payload["categories"] = [list(category) for category in categories]
+    if "image" in columns:
+        payload["images"] = list(images)
+    payload["columns"] = columns
+    return payload
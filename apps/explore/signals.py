@@ -0,0 +1,422 @@
+"""
+Sinais do aplicativo explore
+Mantém os caches e o registro de alterações da API de mapa sincronizados
+com as alterações de lugares, os agregados de PlaceStats atualizados, as
+atividades diárias usadas na pontuação de tendência e os cartões JSON
+pré-serializados de cada lugar (PlaceCard), o índice do backend de busca
+(apps.core.search), o índice de sugestões da caixa de busca (lugares e
+categorias; as notícias ficam em apps.news.signals) e os contadores de
+contribuição de cada usuário (ContributorStats)
+"""
+
+from collections import Counter
+
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from apps.accounts.models import ContributorStats
+from apps.core.search import index_documents, remove_documents
+
+from .caching import (
+    bump_catalogue_version,
+    invalidate_category_place_counts,
+    invalidate_facet_index,
+    invalidate_place_fragments,
+    invalidate_tiles_for_coordinates,
+)
+from .cards import refresh_place_cards
+from .models import (
+    Category,
+    Favorite,
+    Place,
+    PlaceActivity,
+    PlaceChange,
+    PlaceImage,
+    PlaceReview,
+    PlaceStats,
+)
+from .suggest import update_suggestions
+
+
+def places_changed(places):
+    """
+    Registrar uma nova versão e invalidar os tiles e fragmentos de cada lugar
+    e os resultados de busca em cache (versão do catálogo)
+    places: iterável de tuplas (id, latitude, longitude)
+    """
+    places = list(places)
+    if not places:
+        return
+    place_ids = list(dict.fromkeys(place_id for place_id, _, _ in places))
+    PlaceChange.record(place_ids)
+    bump_catalogue_version()
+    invalidate_place_fragments(*place_ids)
+    invalidate_tiles_for_coordinates(*[(lat, lng) for _, lat, lng in places])
+
+
+def _is_visible(is_approved, is_active):
+    return bool(is_approved and is_active)
+
+
+@receiver(pre_save, sender=Place)
+def remember_previous_coordinates(sender, instance, **kwargs):
+    """
+    Guardar as coordenadas salvas antes da alteração (para mover o lugar),
+    se o lugar estava visível (para as contagens por categoria), o seu
+    criador (para os contadores de contribuição) e o nome (para as sugestões)
+    """
+    previous = None
+    if instance.pk:
+        previous = (
+            Place.objects.filter(pk=instance.pk)
+            .values_list(
+                "latitude",
+                "longitude",
+                "is_approved",
+                "is_active",
+                "created_by_id",
+                "name",
+            )
+            .first()
+        )
+    instance._previous_coordinates = previous[:2] if previous else None
+    instance._previous_visible = _is_visible(*previous[2:4]) if previous else False
+    instance._previous_creator = previous[4] if previous else None
+    instance._previous_name = previous[5] if previous else None
+
+
+@receiver(post_save, sender=Place)
+def create_place_stats(sender, instance, created, **kwargs):
+    """Todo lugar novo começa com agregados zerados"""
+    if created:
+        PlaceStats.objects.get_or_create(place=instance)
+
+
+@receiver(post_save, sender=Place)
+def place_saved(sender, instance, **kwargs):
+    """Invalidar os tiles das coordenadas antigas e novas"""
+    places = [(instance.pk, instance.latitude, instance.longitude)]
+    previous = getattr(instance, "_previous_coordinates", None)
+    if previous:
+        places.append((instance.pk, *previous))
+    places_changed(places)
+
+
+@receiver(post_save, sender=Place)
+def place_visibility_changed(sender, instance, **kwargs):
+    """Aprovar, rejeitar ou desativar um lugar muda as contagens por categoria"""
+    previous = getattr(instance, "_previous_visible", False)
+    if _is_visible(instance.is_approved, instance.is_active) != previous:
+        invalidate_category_place_counts()
+
+
+@receiver(post_delete, sender=Place)
+def place_deleted(sender, instance, **kwargs):
+    """Lugares excluídos viram tombstones na sincronização incremental"""
+    places_changed([(instance.pk, instance.latitude, instance.longitude)])
+    invalidate_category_place_counts()
+
+
+@receiver(m2m_changed, sender=Place.categories.through)
+def place_categories_changed(sender, instance, action, pk_set, **kwargs):
+    """Categorias alteradas mudam o ícone exibido no mapa"""
+    if action == "pre_clear" and not isinstance(instance, Place):
+        # category.places.clear() não informa pk_set: guardar os lugares
+        # antes de desvinculá-los
+        instance._cleared_place_ids = list(instance.places.values_list("id", flat=True))
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    invalidate_category_place_counts()
+    invalidate_facet_index()
+
+    if isinstance(instance, Place):
+        places_changed([(instance.pk, instance.latitude, instance.longitude)])
+    else:
+        # Alteração feita pelo lado da categoria (category.places.add(...))
+        if action == "post_clear":
+            pk_set = getattr(instance, "_cleared_place_ids", [])
+        places_changed(
+            Place.objects.filter(pk__in=pk_set or []).values_list(
+                "id", "latitude", "longitude"
+            )
+        )
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def category_changed(sender, instance, **kwargs):
+    """Nome e ícone da categoria aparecem nos dados de todos os seus lugares"""
+    places_changed(instance.places.values_list("id", "latitude", "longitude"))
+    invalidate_category_place_counts()
+    invalidate_facet_index()
+
+
+@receiver(post_save, sender=PlaceImage)
+@receiver(post_delete, sender=PlaceImage)
+@receiver(post_save, sender=PlaceReview)
+@receiver(post_delete, sender=PlaceReview)
+def place_content_changed(sender, instance, **kwargs):
+    """Imagens e avaliações fazem parte dos dados do lugar no mapa"""
+    places_changed(
+        Place.objects.filter(pk=instance.place_id).values_list(
+            "id", "latitude", "longitude"
+        )
+    )
+
+
+def _apply_place_stats(instance, rebuild=True, **deltas):
+    """
+    Aplicar variações ao PlaceStats do lugar de uma avaliação ou favorito
+    Com rebuild, recalcula os agregados se o registro ainda não existir
+    """
+    if not PlaceStats.apply(instance.place_id, **deltas) and rebuild:
+        PlaceStats.rebuild([instance.place_id])
+
+    # O UPDATE com F() não altera os agregados já carregados no lugar
+    # relacionado: descartá-los para que sejam lidos de novo
+    if type(instance).place.is_cached(instance):
+        place = instance.place
+        if Place.stats.is_cached(place):
+            Place.stats.related.delete_cached_value(place)
+
+
+@receiver(pre_save, sender=PlaceReview)
+def remember_previous_rating(sender, instance, **kwargs):
+    """Guardar a nota salva antes da edição da avaliação"""
+    previous = None
+    if instance.pk:
+        previous = (
+            PlaceReview.objects.filter(pk=instance.pk)
+            .values_list("rating", flat=True)
+            .first()
+        )
+    instance._previous_rating = previous
+
+
+@receiver(post_save, sender=PlaceReview)
+def review_saved(sender, instance, created, **kwargs):
+    """Nova avaliação ou nota editada: atualizar contagem, soma, média e histograma"""
+    previous = getattr(instance, "_previous_rating", None)
+    if created or previous is None:
+        _apply_place_stats(
+            instance, reviews=1, rating=instance.rating, stars={instance.rating: 1}
+        )
+    elif instance.rating != previous:
+        _apply_place_stats(
+            instance,
+            rating=instance.rating - previous,
+            stars={previous: -1, instance.rating: 1},
+        )
+
+
+@receiver(post_delete, sender=PlaceReview)
+def review_deleted(sender, instance, **kwargs):
+    # Sem recálculo: se o registro não existe, o lugar está sendo excluído
+    _apply_place_stats(
+        instance,
+        rebuild=False,
+        reviews=-1,
+        rating=-instance.rating,
+        stars={instance.rating: -1},
+    )
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def favorite_catalogue_changed(sender, instance, **kwargs):
+    """A ordenação por favoritos dos resultados de busca em cache mudou"""
+    bump_catalogue_version()
+
+
+@receiver(post_save, sender=Favorite)
+def favorite_saved(sender, instance, created, **kwargs):
+    if created:
+        _apply_place_stats(instance, favorites=1)
+
+
+@receiver(post_delete, sender=Favorite)
+def favorite_deleted(sender, instance, **kwargs):
+    # Sem recálculo: se o registro não existe, o lugar está sendo excluído
+    _apply_place_stats(instance, rebuild=False, favorites=-1)
+
+
+@receiver(post_save, sender=PlaceReview)
+@receiver(post_save, sender=Favorite)
+def record_activity(sender, instance, created, **kwargs):
+    """Avaliações e favoritos novos contam para a pontuação de tendência"""
+    if created:
+        field = "reviews" if sender is PlaceReview else "favorites"
+        PlaceActivity.record(instance.place_id, **{field: 1})
+
+
+def _apply_contributor_stats(user_id, rebuild=True, **deltas):
+    """
+    Aplicar variações aos contadores de contribuição de um usuário
+    Com rebuild, recalcula os contadores se o registro ainda não existir
+    """
+    if not ContributorStats.apply(user_id, **deltas) and rebuild:
+        ContributorStats.rebuild([user_id])
+
+
+@receiver(post_save, sender=Place)
+def place_contribution_changed(sender, instance, created, **kwargs):
+    """Aprovar, rejeitar, desativar ou trocar o criador de um lugar"""
+    visible = _is_visible(instance.is_approved, instance.is_active)
+    previous_visible = getattr(instance, "_previous_visible", False)
+    previous_creator = getattr(instance, "_previous_creator", None)
+    creator = instance.created_by_id
+    creator_changed = not created and previous_creator != creator
+
+    # Uma única atualização por usuário (o recálculo já inclui este lugar)
+    deltas = {}
+    if previous_visible:
+        deltas.setdefault(previous_creator, Counter())["places"] -= 1
+    if visible:
+        deltas.setdefault(creator, Counter())["places"] += 1
+    if creator_changed:
+        # Os favoritos já recebidos pelo lugar passam para o novo criador
+        favorites = instance.favorited_by.count()
+        deltas.setdefault(previous_creator, Counter())["favorites"] -= favorites
+        deltas.setdefault(creator, Counter())["favorites"] += favorites
+
+    for user_id, user_deltas in deltas.items():
+        if any(user_deltas.values()):
+            _apply_contributor_stats(user_id, **user_deltas)
+
+
+@receiver(post_delete, sender=Place)
+def place_contribution_deleted(sender, instance, **kwargs):
+    # Sem recálculo: o criador pode estar sendo excluído em cascata
+    if _is_visible(instance.is_approved, instance.is_active):
+        _apply_contributor_stats(instance.created_by_id, rebuild=False, places=-1)
+
+
+@receiver(post_save, sender=PlaceReview)
+def review_contribution_saved(sender, instance, created, **kwargs):
+    if created:
+        _apply_contributor_stats(instance.user_id, reviews=1)
+
+
+@receiver(post_delete, sender=PlaceReview)
+def review_contribution_deleted(sender, instance, **kwargs):
+    _apply_contributor_stats(instance.user_id, rebuild=False, reviews=-1)
+
+
+def _place_creator(place_id):
+    return (
+        Place.objects.filter(pk=place_id)
+        .values_list("created_by_id", flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Favorite)
+def favorite_contribution_saved(sender, instance, created, **kwargs):
+    if created:
+        _apply_contributor_stats(_place_creator(instance.place_id), favorites=1)
+
+
+@receiver(post_delete, sender=Favorite)
+def favorite_contribution_deleted(sender, instance, **kwargs):
+    # O lugar pode já ter sido excluído: nesse caso não há criador a descontar
+    creator = _place_creator(instance.place_id)
+    if creator:
+        _apply_contributor_stats(creator, rebuild=False, favorites=-1)
+
+
+# Cartões pré-serializados e índice de busca: regenerados depois dos
+# receptores acima, para que os cartões incluam os agregados já atualizados
+
+
+def _refresh_places(place_ids, search=True):
+    """Regenerar os cartões e (com search) reindexar os lugares na busca"""
+    place_ids = list(place_ids)
+    refresh_place_cards(place_ids)
+    if search:
+        index_documents(Place, place_ids)
+
+
+@receiver(post_save, sender=Place)
+def place_content_saved(sender, instance, **kwargs):
+    _refresh_places([instance.pk])
+
+
+@receiver(post_delete, sender=Place)
+def place_content_deleted(sender, instance, **kwargs):
+    # Cartões e termos saem em cascata; índices fora das tabelas do Django não
+    remove_documents(Place, [instance.pk])
+
+
+@receiver(m2m_changed, sender=Place.categories.through)
+def place_content_categories_changed(sender, instance, action, pk_set, **kwargs):
+    if isinstance(instance, Place):
+        if action in ("post_add", "post_remove", "post_clear"):
+            _refresh_places([instance.pk])
+    elif action == "pre_clear":
+        # category.places.clear(): guardar os lugares antes de desvinculá-los
+        instance._linked_place_ids = list(instance.places.values_list("id", flat=True))
+    elif action == "post_clear":
+        _refresh_places(getattr(instance, "_linked_place_ids", []))
+    elif action in ("post_add", "post_remove"):
+        _refresh_places(pk_set or [])
+
+
+@receiver(pre_delete, sender=Category)
+def remember_category_places(sender, instance, **kwargs):
+    """Guardar os lugares da categoria antes que os vínculos sejam excluídos"""
+    instance._linked_place_ids = list(instance.places.values_list("id", flat=True))
+
+
+@receiver(post_save, sender=Category)
+def category_content_saved(sender, instance, **kwargs):
+    _refresh_places(instance.places.values_list("id", flat=True))
+
+
+@receiver(post_delete, sender=Category)
+def category_content_deleted(sender, instance, **kwargs):
+    _refresh_places(getattr(instance, "_linked_place_ids", []))
+
+
+@receiver(post_save, sender=PlaceImage)
+@receiver(post_save, sender=PlaceReview)
+def place_card_content_saved(sender, instance, **kwargs):
+    refresh_place_cards([instance.place_id])
+
+
+@receiver(post_delete, sender=PlaceImage)
+@receiver(post_delete, sender=PlaceReview)
+def place_card_content_deleted(sender, instance, **kwargs):
+    # Apenas atualizar: o lugar pode estar sendo excluído em cascata
+    refresh_place_cards([instance.place_id], create=False)
+
+
+# Índice de sugestões: apenas nomes e visibilidade importam
+
+
+@receiver(post_save, sender=Place)
+def place_suggestion_changed(sender, instance, **kwargs):
+    visible = _is_visible(instance.is_approved, instance.is_active)
+    previous_visible = getattr(instance, "_previous_visible", False)
+    renamed = getattr(instance, "_previous_name", None) != instance.name
+    if visible != previous_visible or (visible and renamed):
+        update_suggestions("place", [instance.pk])
+
+
+@receiver(post_delete, sender=Place)
+def place_suggestion_deleted(sender, instance, **kwargs):
+    if _is_visible(instance.is_approved, instance.is_active):
+        update_suggestions("place", [instance.pk])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_suggestion_changed(sender, instance, **kwargs):
+    update_suggestions("category", [instance.pk])
@@ -0,0 +1,219 @@
+"""
+Sugestões da caixa de busca enquanto se digita (/explore/api/suggest/)
+Índice de prefixos em memória de cada processo: uma lista ordenada de
+(palavra sem acento, tipo, id) com as palavras dos nomes de lugares e de
+categorias e dos títulos de notícias; a consulta localiza o intervalo do
+prefixo com bisect, sem consultar o banco
+O índice é construído na primeira consulta de cada processo e atualizado de
+forma incremental pelos sinais (ver caching.suggest_index_version)
+"""
+
+import sys
+import threading
+from bisect import bisect_left, insort
+from collections import namedtuple
+
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.core.text import WORD_RE, fold
+from apps.news.models import News
+
+from .caching import bump_suggest_index_version, suggest_index_version
+from .models import Category, Place
+from .serializers import PLACE_URL_TEMPLATE
+
+# Tipos de sugestão, na ordem de prioridade entre itens igualmente relevantes
+SUGGEST_KINDS = ("category", "place", "news")
+
+# Entradas percorridas no intervalo do prefixo antes de ordenar as sugestões
+# (palavras mais curtas vêm antes na ordem do índice: "lua" antes de "luar")
+SUGGEST_SCAN_LIMIT = 500
+
+# visible_from: data a partir da qual o item aparece (publicação das notícias)
+Suggestion = namedtuple("Suggestion", ["kind", "id", "label", "url", "visible_from"])
+
+
+def _folded(label):
+    # Nome sem acento e suas palavras, compartilhadas entre as entradas (sys.intern)
+    folded = fold(label)
+    return folded, frozenset(sys.intern(word) for word in WORD_RE.findall(folded))
+
+
+def load_suggestions(kind, ids=None):
+    """Itens visíveis de um tipo (todos ou apenas os ids informados)"""
+    if kind == "place":
+        places = Place.objects.filter(is_approved=True, is_active=True)
+        if ids is not None:
+            places = places.filter(id__in=ids)
+        return [
+            Suggestion(
+                "place", place_id, name, PLACE_URL_TEMPLATE.format(id=place_id), None
+            )
+            for place_id, name in places.values_list("id", "name").iterator()
+        ]
+    if kind == "category":
+        categories = Category.objects.filter(is_active=True)
+        if ids is not None:
+            categories = categories.filter(id__in=ids)
+        return [
+            Suggestion(
+                "category",
+                category_id,
+                name,
+                reverse("explore:category_detail", args=[slug]),
+                None,
+            )
+            for category_id, name, slug in categories.values_list("id", "name", "slug")
+        ]
+    # Notícias agendadas entram no índice e aparecem a partir da publicação
+    news = News.objects.filter(status=News.PUBLISHED)
+    if ids is not None:
+        news = news.filter(id__in=ids)
+    return [
+        Suggestion(
+            "news",
+            news_id,
+            title,
+            reverse("news:news_detail", args=[slug]),
+            publish_date,
+        )
+        for news_id, title, slug, publish_date in news.values_list(
+            "id", "title", "slug", "publish_date"
+        )
+    ]
+
+
+class SuggestIndex:
+    """
+    Lista ordenada de (palavra, tipo, id), os itens por (tipo, id) e o nome
+    sem acento de cada um com suas palavras, calculados uma vez na inclusão
+    """
+
+    def __init__(self, items=(), version=None):
+        self.version = version
+        self.items = {(item.kind, item.id): item for item in items}
+        self.labels = {key: _folded(item.label) for key, item in self.items.items()}
+        self.keys = sorted(
+            (word, kind, item_id)
+            for (kind, item_id), (_, words) in self.labels.items()
+            for word in words
+        )
+        self._lock = threading.Lock()
+
+    def put(self, item):
+        """Incluir ou substituir um item"""
+        with self._lock:
+            self._discard(item.kind, item.id)
+            self.items[(item.kind, item.id)] = item
+            self.labels[(item.kind, item.id)] = folded, words = _folded(item.label)
+            for word in words:
+                insort(self.keys, (word, item.kind, item.id))
+
+    def words(self, kinds):
+        """Palavras sem acento de cada item dos tipos pedidos: [((tipo, id), palavras)]"""
+        with self._lock:
+            return [
+                (key, words)
+                for key, (_, words) in self.labels.items()
+                if key[0] in kinds
+            ]
+
+    def discard(self, kind, item_id):
+        with self._lock:
+            self._discard(kind, item_id)
+
+    def _discard(self, kind, item_id):
+        if self.items.pop((kind, item_id), None) is None:
+            return
+        _, words = self.labels.pop((kind, item_id))
+        for word in words:
+            key = (word, kind, item_id)
+            position = bisect_left(self.keys, key)
+            if position < len(self.keys) and self.keys[position] == key:
+                del self.keys[position]
+
+    def suggest(self, query, limit):
+        """
+        Até limit itens cujas palavras começam pelas palavras da consulta
+        (a última pode estar incompleta), ordenados por: nome que começa pela
+        consulta, tipo (SUGGEST_KINDS), nome mais curto e ordem alfabética
+        """
+        words = WORD_RE.findall(fold(query))
+        if not words:
+            return []
+        *complete, prefix = words
+        folded_query = " ".join(words)
+        now = timezone.now()
+
+        candidates = {}
+        with self._lock:
+            start = bisect_left(self.keys, (prefix,))
+            end = min(len(self.keys), start + SUGGEST_SCAN_LIMIT)
+            for word, kind, item_id in self.keys[start:end]:
+                if not word.startswith(prefix):
+                    break
+                item = self.items[(kind, item_id)]
+                if item.visible_from is not None and item.visible_from > now:
+                    continue
+                candidates[(kind, item_id)] = item, self.labels[(kind, item_id)]
+
+        ranked = []
+        for item, (label, label_words) in candidates.values():
+            if complete and not all(
+                any(label_word.startswith(word) for label_word in label_words)
+                for word in complete
+            ):
+                continue
+            ranked.append(
+                (
+                    not label.startswith(folded_query),
+                    SUGGEST_KINDS.index(item.kind),
+                    len(label),
+                    label,
+                    item,
+                )
+            )
+        ranked.sort(key=lambda entry: entry[:4])
+        return [entry[-1] for entry in ranked[:limit]]
+
+
+# Índice deste processo (None até a primeira consulta)
+_suggest_index = None
+
+
+def build_suggest_index(version=None):
+    """Construir o índice com todos os itens visíveis (uma consulta por tipo)"""
+    items = [item for kind in SUGGEST_KINDS for item in load_suggestions(kind)]
+    return SuggestIndex(items, version)
+
+
+def suggest_index():
+    """Índice deste processo, reconstruído quando a versão em cache muda"""
+    global _suggest_index
+    version = suggest_index_version()
+    if _suggest_index is None or _suggest_index.version != version:
+        _suggest_index = build_suggest_index(version)
+    return _suggest_index
+
+
+def update_suggestions(kind, ids):
+    """
+    Aplicar itens criados, alterados ou excluídos
+    O índice deste processo é atualizado no lugar se estava na versão
+    anterior; os demais processos reconstroem o seu ao ver a nova versão
+    """
+    ids = set(ids)
+    if not ids:
+        return
+    version = bump_suggest_index_version()
+    index = _suggest_index
+    if index is None or index.version != version - 1:
+        return
+    visible = {item.id: item for item in load_suggestions(kind, ids)}
+    for item_id in ids:
+        if item_id in visible:
+            index.put(visible[item_id])
+        else:
+            index.discard(kind, item_id)
+    index.version = version
@@ -1,8 +1,63 @@
+import gzip
+import json
+from datetime import timedelta
+from io import StringIO
+from unittest import mock, skipUnless
+
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.cache import cache, caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, connection
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-
-from .models import Category, Place, PlaceApproval, PlaceReview
+from django.utils import timezone
+
+from apps.core.search import (
+    SEARCH_BACKENDS,
+    PostgresBackend,
+    get_backend,
+    search,
+    sqlite_has_fts5,
+)
+from apps.core.text import analyze, normalize_query
+from apps.news.models import News, NewsCategory
+
+from .caching import (
+    _place_version_key,
+    _tile_version_key,
+    category_place_counts,
+    tile_version,
+)
+from .cards import build_place_cards
+from .checks import check_shared_cache
+from .fuzzy import TrigramIndex, fuzzy_place_scores, similarity
+from .geo import (
+    bbox_geohash_cells,
+    encode_geohash,
+    haversine_km,
+    radius_bbox,
+    tile_for_coordinate,
+)
+from .models import (
+    Category,
+    Favorite,
+    Place,
+    PlaceActivity,
+    PlaceApproval,
+    PlaceCard,
+    PlaceChange,
+    PlaceImage,
+    PlaceReview,
+    PlaceSearchTerm,
+    PlaceStats,
+    SearchQueryLog,
+)
+from .search import PLACE_DOCUMENT, category_facets, index_places
+from .serializers import MAP_PLACE_FIELDS, PLACE_DETAIL_FIELDS, serialize_places
+from .suggest import suggest_index
 
 User = get_user_model()
 
@@ -144,6 +199,33 @@ class PlaceImageModelTests(TestCase):
         # So we'll just test the property exists
         self.assertIsNone(self.place.primary_image)
 
+    def test_primary_image_uses_prefetched_images(self):
+        """Test that primary_image reads prefetched images without a query"""
+        PlaceImage.objects.create(place=self.place, image="places/other.jpg")
+        primary = PlaceImage.objects.create(
+            place=self.place, image="places/primary.jpg", is_primary=True
+        )
+        self.assertEqual(self.place.primary_image, primary)
+
+        place = Place.objects.prefetch_related("images").get(pk=self.place.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(place.primary_image, primary)
+
+    def test_excerpt_maintained_on_save(self):
+        """Test that the stored excerpt follows the description"""
+        self.assertEqual(self.place.excerpt, "Test")
+
+        self.place.description = "x" * 150
+        self.place.save(update_fields=["description"])
+        self.place.refresh_from_db()
+        self.assertEqual(self.place.excerpt, "x" * 100 + "...")
+
+        place = Place.objects.defer("description").get(pk=self.place.pk)
+        place.name = "Renamed"
+        place.save()
+        place.refresh_from_db()
+        self.assertEqual(place.excerpt, "x" * 100 + "...")
+
     def test_place_gallery_images_property(self):
         """Test gallery_images property"""
         images = self.place.gallery_images
@@ -1080,6 +1162,7 @@ class MapDataAPITests(TestCase):
 
     def setUp(self):
         """Set up test data"""
+        cache.clear()
         self.client = Client()
         self.user = User.objects.create_user(
             username="testuser", password="testpass123", is_staff=False
@@ -1284,3 +1367,2524 @@ class MapDataAPITests(TestCase):
         self.assertEqual(data["count"], 2)
         self.assertEqual(data["places"][0]["name"], "Newer Place")
         self.assertEqual(data["places"][1]["name"], "Approved Place")
+
+    def test_api_filters_by_bbox(self):
+        """Test that bbox parameter returns only places inside the viewport"""
+        far_place = Place.objects.create(
+            name="Far Place",
+            description="Place in Sao Paulo",
+            address="1 Far Rd",
+            latitude=-23.5505,
+            longitude=-46.6333,
+            created_by=self.user,
+            is_approved=True,
+            is_active=True,
+        )
+
+        response = self.client.get(self.url, {"bbox": "-23.0,-43.5,-22.8,-43.0"})
+        data = response.json()
+
+        ids = [place["id"] for place in data["places"]]
+        self.assertEqual(ids, [self.approved_place.id])
+        self.assertNotIn(far_place.id, ids)
+
+    def test_api_bbox_excludes_places_on_the_edge_outside(self):
+        """Test that bbox refinement is exact, not just geohash cell based"""
+        response = self.client.get(self.url, {"bbox": "-22.9067,-43.5,-22.8,-43.0"})
+        self.assertEqual(response.json()["count"], 0)
+
+    def test_api_rejects_invalid_bbox(self):
+        """Test that malformed bbox returns 400"""
+        for bbox in ["1,2,3", "a,b,c,d", "10,0,-10,5"]:
+            response = self.client.get(self.url, {"bbox": bbox})
+            self.assertEqual(response.status_code, 400)
+
+    def test_api_limit(self):
+        """Test that limit caps the number of returned places"""
+        Place.objects.create(
+            name="Newer Place",
+            description="Newer place",
+            address="999 New St",
+            latitude=-22.9068,
+            longitude=-43.1729,
+            created_by=self.user,
+            is_approved=True,
+            is_active=True,
+        )
+
+        response = self.client.get(self.url, {"limit": 1})
+        data = response.json()
+        self.assertEqual(data["count"], 1)
+        self.assertEqual(data["places"][0]["name"], "Newer Place")
+
+        response = self.client.get(self.url, {"limit": 0})
+        self.assertEqual(response.status_code, 400)
+
+
+class GeoUtilsTests(TestCase):
+    """Tests for geohash spatial index helpers"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="creator", password="pass123")
+
+    def test_encode_geohash(self):
+        """Test geohash encoding against a known reference value"""
+        self.assertEqual(encode_geohash(57.64911, 10.40744, 11), "u4pruydqqvj")
+
+    def test_place_save_keeps_geohash_in_sync(self):
+        """Test geohash is computed on save and cleared without coordinates"""
+        place = Place.objects.create(
+            name="Geo Place",
+            description="Test",
+            address="Test address",
+            latitude=-22.9194,
+            longitude=-42.8186,
+            created_by=self.user,
+        )
+        self.assertEqual(place.geohash, encode_geohash(-22.9194, -42.8186))
+
+        place.latitude = None
+        place.save(update_fields=["latitude"])
+        place.refresh_from_db()
+        self.assertEqual(place.geohash, "")
+
+    def test_bbox_cells_cover_bbox(self):
+        """Test every point inside the bbox falls in one of the covering cells"""
+        cells = bbox_geohash_cells(-23.0, -43.5, -22.8, -42.6)
+        self.assertLessEqual(len(cells), 16)
+        for lat in (-23.0, -22.9, -22.8):
+            for lng in (-43.5, -43.0, -42.6):
+                geohash = encode_geohash(lat, lng)
+                self.assertTrue(any(geohash.startswith(cell) for cell in cells))
+
+    def test_haversine_km(self):
+        """Test great-circle distance against a known reference value"""
+        # Rio de Janeiro -> São Paulo, cerca de 361 km
+        distance = haversine_km(-22.9068, -43.1729, -23.5505, -46.6333)
+        self.assertAlmostEqual(distance, 361, delta=2)
+        self.assertEqual(haversine_km(-22.9, -42.8, -22.9, -42.8), 0)
+
+    def test_radius_bbox_contains_circle(self):
+        """Test the radius bbox contains points at the radius distance"""
+        south, west, north, east = radius_bbox(-22.9194, -42.8186, 10)
+        self.assertLess(haversine_km(south, -42.8186, -22.9194, -42.8186), 10.01)
+        self.assertGreater(haversine_km(-22.9194, west, -22.9194, -42.8186), 9.99)
+        self.assertLess(west, -42.8186)
+        self.assertGreater(east, -42.8186)
+
+    def test_radius_bbox_wraps_antimeridian_and_poles(self):
+        """Test boxes crossing the antimeridian or a pole"""
+        south, west, north, east = radius_bbox(0, 179.99, 5)
+        self.assertGreater(west, east)
+        self.assertEqual(radius_bbox(89.99, 0, 5)[1::2], (-180.0, 180.0))
+
+
+class MapClustersAPITests(TestCase):
+    """Test suite for zoom-aware map clustering endpoint"""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username="creator", password="pass123")
+        self.beach = Category.objects.create(name="Praias", slug="praias", icon="🏖️")
+        self.food = Category.objects.create(
+            name="Restaurantes", slug="restaurantes", icon="🍽️"
+        )
+
+        # Três lugares no centro de Maricá e um em Niterói
+        self.center_places = []
+        for index, (lat, lng) in enumerate(
+            [(-22.9194, -42.8186), (-22.9195, -42.8187), (-22.9196, -42.8185)]
+        ):
+            place = Place.objects.create(
+                name=f"Center {index}",
+                description="Test",
+                address="Test address",
+                latitude=lat,
+                longitude=lng,
+                created_by=self.user,
+                is_approved=True,
+            )
+            place.categories.add(self.beach if index < 2 else self.food)
+            self.center_places.append(place)
+
+        self.far_place = Place.objects.create(
+            name="Niteroi",
+            description="Test",
+            address="Test address",
+            latitude=-22.8832,
+            longitude=-43.1034,
+            created_by=self.user,
+            is_approved=True,
+        )
+
+        self.url = reverse("explore:map_clusters_api")
+
+    def test_low_zoom_returns_aggregated_clusters(self):
+        """Test that places are grouped into clusters at low zoom"""
+        response = self.client.get(self.url, {"zoom": 11})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+
+        self.assertEqual(data["places"], [])
+        self.assertEqual(data["count"], 4)
+        counts = sorted(cluster["count"] for cluster in data["clusters"])
+        self.assertEqual(counts, [1, 3])
+
+        center = next(c for c in data["clusters"] if c["count"] == 3)
+        self.assertEqual(center["category_icon"], "🏖️")
+        self.assertAlmostEqual(center["latitude"], -22.9195, places=4)
+        self.assertAlmostEqual(center["longitude"], -42.8186, places=4)
+
+    def test_cluster_without_category_uses_default_icon(self):
+        """Test that clusters of uncategorized places fall back to the pin"""
+        data = self.client.get(self.url, {"zoom": 11}).json()
+        far = next(c for c in data["clusters"] if c["count"] == 1)
+        self.assertEqual(far["category"], "Outros")
+        self.assertEqual(far["category_icon"], "📍")
+
+    def test_high_zoom_returns_individual_places(self):
+        """Test that individual places are returned once zoomed in enough"""
+        data = self.client.get(self.url, {"zoom": 16}).json()
+        self.assertEqual(data["clusters"], [])
+        self.assertEqual(data["count"], 4)
+        self.assertFalse(data["truncated"])
+        self.assertIn("url", data["places"][0])
+
+    @override_settings(MAP_DATA_MAX_LIMIT=3)
+    def test_high_zoom_flags_truncated_places(self):
+        """Test that hitting the place limit is reported to the client"""
+        data = self.client.get(self.url, {"zoom": 16}).json()
+        self.assertEqual(data["count"], 3)
+        self.assertTrue(data["truncated"])
+
+    def test_clusters_respect_bbox(self):
+        """Test that only places inside the viewport are clustered"""
+        data = self.client.get(
+            self.url, {"zoom": 11, "bbox": "-23.0,-42.9,-22.8,-42.7"}
+        ).json()
+        self.assertEqual(data["count"], 3)
+
+    def test_invalid_zoom_returns_400(self):
+        """Test that missing or invalid zoom is rejected"""
+        for params in [{}, {"zoom": "abc"}, {"zoom": 30}]:
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 400)
+
+
+class MapTileAPITests(TestCase):
+    """Test suite for cached web-mercator tile endpoint"""
+
+    def setUp(self):
+        cache.clear()
+        caches["api"].clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username="creator", password="pass123")
+        self.place = Place.objects.create(
+            name="Marica Place",
+            description="Test",
+            address="Test address",
+            latitude=-22.9194,
+            longitude=-42.8186,
+            created_by=self.user,
+            is_approved=True,
+        )
+        self.zoom = 12
+        self.x, self.y = tile_for_coordinate(-22.9194, -42.8186, self.zoom)
+        self.url = self.tile_url(self.zoom, self.x, self.y)
+
+    def tile_url(self, zoom, x, y):
+        return reverse("explore:map_tile_api", kwargs={"zoom": zoom, "x": x, "y": y})
+
+    def test_tile_returns_places_inside_tile(self):
+        """Test that a tile contains the places inside its bounds only"""
+        data = self.client.get(self.url).json()
+        self.assertEqual([p["id"] for p in data["places"]], [self.place.id])
+
+        data = self.client.get(self.tile_url(self.zoom, self.x + 1, self.y)).json()
+        self.assertEqual(data["count"], 0)
+
+    @override_settings(MAP_DATA_MAX_LIMIT=1)
+    def test_tile_flags_truncated_places(self):
+        """Test that a tile cut off at the place limit is not served as complete"""
+        data = self.client.get(self.url).json()
+        self.assertFalse(data["truncated"])
+
+        newer = Place.objects.create(
+            name="Newer Place",
+            description="Test",
+            address="Test address",
+            latitude=-22.9195,
+            longitude=-42.8187,
+            created_by=self.user,
+            is_approved=True,
+        )
+        data = self.client.get(self.url).json()
+        self.assertEqual([p["id"] for p in data["places"]], [newer.id])
+        self.assertTrue(data["truncated"])
+
+    def test_tile_is_served_from_cache(self):
+        """Test that a second request does not hit the database"""
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.json()["count"], 1)
+
+    def test_editing_place_invalidates_its_tile(self):
+        """Test that editing a place refreshes the cached tile"""
+        self.client.get(self.url)
+        self.place.name = "Renamed Place"
+        self.place.save()
+
+        data = self.client.get(self.url).json()
+        self.assertEqual(data["places"][0]["name"], "Renamed Place")
+
+    def test_moving_place_invalidates_old_and_new_tiles(self):
+        """Test that both the old and the new tile are invalidated on move"""
+        new_x, new_y = tile_for_coordinate(-22.8832, -43.1034, self.zoom)
+        new_url = self.tile_url(self.zoom, new_x, new_y)
+        self.client.get(self.url)
+        self.client.get(new_url)
+
+        self.place.latitude = -22.8832
+        self.place.longitude = -43.1034
+        self.place.save()
+
+        self.assertEqual(self.client.get(self.url).json()["count"], 0)
+        self.assertEqual(self.client.get(new_url).json()["count"], 1)
+
+    def test_unrelated_tiles_stay_cached(self):
+        """Test that changes only invalidate the tiles containing the place"""
+        other_x, other_y = tile_for_coordinate(-23.5505, -46.6333, self.zoom)
+        other_version = tile_version(self.zoom, other_x, other_y)
+        version = tile_version(self.zoom, self.x, self.y)
+
+        self.place.name = "Renamed Place"
+        self.place.save()
+
+        self.assertEqual(tile_version(self.zoom, other_x, other_y), other_version)
+        self.assertNotEqual(tile_version(self.zoom, self.x, self.y), version)
+
+    def test_evicted_version_does_not_serve_stale_tile(self):
+        """Test that losing a tile version key does not revive old content"""
+        # Versão ainda não criada, como logo após um despejo
+        caches["api"].clear()
+        self.assertEqual(self.client.get(self.url).json()["count"], 1)
+        self.place.is_active = False
+        self.place.save()
+        caches["api"].delete(_tile_version_key(self.zoom, self.x, self.y))
+        self.assertEqual(self.client.get(self.url).json()["count"], 0)
+
+    def test_approval_and_deletion_invalidate_tile(self):
+        """Test that approving and deleting places refresh the tile"""
+        admin = User.objects.create_user(
+            username="admin", password="pass123", is_staff=True
+        )
+        pending = Place.objects.create(
+            name="Pending Place",
+            description="Test",
+            address="Test address",
+            latitude=-22.9195,
+            longitude=-42.8187,
+            created_by=self.user,
+        )
+        self.assertEqual(self.client.get(self.url).json()["count"], 1)
+
+        PlaceApproval.objects.create(place=pending, reviewer=admin, action="APPROVE")
+        self.assertEqual(self.client.get(self.url).json()["count"], 2)
+
+        pending.delete()
+        self.assertEqual(self.client.get(self.url).json()["count"], 1)
+
+    def test_invalid_tile_returns_400(self):
+        """Test that out of range tiles are rejected"""
+        response = self.client.get(self.tile_url(2, 4, 0))
+        self.assertEqual(response.status_code, 400)
+
+
+# Deltas exatos; a releitura das versões abaixo de since é testada à parte
+@override_settings(PLACE_CHANGE_SYNC_OVERLAP=0)
+class MapDataDeltaSyncTests(TestCase):
+    """Test suite for ?since= delta sync of the map data API"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username="creator", password="pass123")
+        self.admin = User.objects.create_user(
+            username="admin", password="pass123", is_staff=True
+        )
+        self.place = Place.objects.create(
+            name="Synced Place",
+            description="Test",
+            address="Test address",
+            latitude=-22.9194,
+            longitude=-42.8186,
+            created_by=self.user,
+            is_approved=True,
+        )
+        self.url = reverse("explore:map_data_api")
+        self.version = self.client.get(self.url).json()["version"]
+
+    def sync(self):
+        return self.client.get(self.url, {"since": self.version}).json()
+
+    def test_full_response_includes_version(self):
+        """Test that the full payload carries the current change version"""
+        self.assertEqual(self.version, PlaceChange.current_version())
+        self.assertGreater(self.version, 0)
+
+    def test_no_changes_returns_empty_delta(self):
+        """Test that nothing is returned when nothing changed"""
+        data = self.sync()
+        self.assertEqual(data["places"], [])
+        self.assertEqual(data["deleted"], [])
+        self.assertEqual(data["version"], self.version)
+
+    def test_changed_place_is_returned(self):
+        """Test that edited and new places are returned in the delta"""
+        self.place.name = "Edited Place"
+        self.place.save()
+        new_place = Place.objects.create(
+            name="New Place",
+            description="Test",
+            address="Test address",
+            latitude=-22.92,
+            longitude=-42.82,
+            created_by=self.user,
+            is_approved=True,
+        )
+
+        data = self.sync()
+        self.assertEqual(
+            sorted(p["id"] for p in data["places"]), [self.place.id, new_place.id]
+        )
+        self.assertGreater(data["version"], self.version)
+
+    def test_deleted_place_is_tombstoned(self):
+        """Test that deleted places are returned as tombstone IDs"""
+        place_id = self.place.id
+        self.place.delete()
+
+        data = self.sync()
+        self.assertEqual(data["places"], [])
+        self.assertEqual(data["deleted"], [place_id])
+
+    def test_rejected_place_is_tombstoned(self):
+        """Test that rejecting a place produces a tombstone"""
+        PlaceApproval.objects.create(
+            place=self.place, reviewer=self.admin, action="REJECT"
+        )
+        self.assertEqual(self.sync()["deleted"], [self.place.id])
+
+    def test_new_review_updates_place(self):
+        """Test that rating changes are part of the delta"""
+        PlaceReview.objects.create(
+            place=self.place, user=self.user, rating=5, comment="Great"
+        )
+        data = self.sync()
+        self.assertEqual(data["places"][0]["rating"], 5.0)
+
+    def test_invalid_since_returns_400(self):
+        """Test that a malformed version is rejected"""
+        response = self.client.get(self.url, {"since": "abc"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_category_cleared_from_its_side_updates_place(self):
+        """Test that category.places.clear() reaches delta sync and the snapshot"""
+        category = Category.objects.create(name="Praias", slug="praias")
+        self.place.categories.add(category)
+        version = PlaceChange.current_version()
+        etag = self.client.get(self.url)["ETag"]
+
+        category.places.clear()
+
+        self.assertGreater(PlaceChange.current_version(), version)
+        self.assertNotEqual(self.client.get(self.url)["ETag"], etag)
+        data = self.client.get(self.url, {"since": version}).json()
+        self.assertEqual([place["id"] for place in data["places"]], [self.place.id])
+        self.assertEqual(data["places"][0]["category"], "Outros")
+
+    def test_since_after_current_version_forces_reload(self):
+        """Test that a version this server never issued gets everything"""
+        data = self.client.get(self.url, {"since": self.version + 1000}).json()
+        self.assertTrue(data["reset"])
+        self.assertEqual([place["id"] for place in data["places"]], [self.place.id])
+
+    @override_settings(PLACE_CHANGE_SYNC_OVERLAP=5)
+    def test_change_committed_out_of_order_is_delivered(self):
+        """Test that a lower version committed late still reaches the client"""
+        other = Place.objects.create(
+            name="Other Place",
+            description="Test",
+            address="Test address",
+            latitude=-22.92,
+            longitude=-42.82,
+            created_by=self.user,
+            is_approved=True,
+        )
+        self.place.name = "Edited Place"
+        self.place.save()
+        # A alteração de "other" ainda não foi confirmada quando o cliente sincroniza
+        late = PlaceChange.objects.filter(place_id=other.id).latest("id")
+        late.delete()
+        version = self.sync()["version"]
+
+        PlaceChange.objects.create(id=late.id, place_id=other.id)
+        data = self.client.get(self.url, {"since": version}).json()
+        self.assertIn(other.id, [place["id"] for place in data["places"]])
+
+    def test_since_with_limit_returns_400(self):
+        """Test that a delta cannot be truncated with limit"""
+        response = self.client.get(self.url, {"since": self.version, "limit": "1"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_prune_keeps_latest_change(self):
+        """Test that pruning old changes never moves the version backwards"""
+        self.place.name = "Edited Place"
+        self.place.save()
+        version = PlaceChange.current_version()
+        PlaceChange.objects.update(changed_at=timezone.now() - timedelta(days=90))
+
+        out = StringIO()
+        call_command("prune_place_changes", "--days", "30", stdout=out)
+        self.assertIn("alterações de lugares removidas", out.getvalue())
+        self.assertEqual(
+            list(PlaceChange.objects.values_list("id", flat=True)), [version]
+        )
+        self.assertEqual(PlaceChange.current_version(), version)
+
+    def test_since_before_pruned_history_forces_reload(self):
+        """Test that a client older than the kept history gets everything"""
+        other = Place.objects.create(
+            name="Other Place",
+            description="Test",
+            address="Test address",
+            latitude=-22.92,
+            longitude=-42.82,
+            created_by=self.user,
+            is_approved=True,
+        )
+        self.place.name = "Edited Place"
+        self.place.save()
+        PlaceChange.prune(timezone.now() + timedelta(days=1))
+
+        data = self.sync()
+        self.assertTrue(data["reset"])
+        self.assertNotIn("deleted", data)
+        self.assertEqual(
+            sorted(place["id"] for place in data["places"]), [self.place.id, other.id]
+        )
+
+        # Clientes em dia continuam recebendo apenas o delta
+        data = self.client.get(self.url, {"since": data["version"]}).json()
+        self.assertNotIn("reset", data)
+        self.assertEqual(data["places"], [])
+
+
+class MapDataSnapshotTests(TestCase):
+    """Test suite for the pre-compressed map data snapshot"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username="creator", password="pass123")
+        self.place = Place.objects.create(
+            name="Snapshot Place",
+            description="Test",
+            address="Test address",
+            latitude=-22.9194,
+            longitude=-42.8186,
+            created_by=self.user,
+            is_approved=True,
+        )
+        self.url = reverse("explore:map_data_api")
+
+    def test_response_has_etag(self):
+        """Test that the full response carries a version based ETag"""
+        response = self.client.get(self.url)
+        version = response.json()["version"]
+        self.assertEqual(response["ETag"], f'"map-json-{version}"')
+
+    def test_if_none_match_returns_304(self):
+        """Test that a matching ETag is answered with 304"""
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_change_invalidates_etag(self):
+        """Test that a place change produces a new snapshot and ETag"""
+        etag = self.client.get(self.url)["ETag"]
+        self.place.name = "Renamed"
+        self.place.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["places"][0]["name"], "Renamed")
+
+    def test_gzip_bytes_are_served_when_accepted(self):
+        """Test that pre-compressed bytes match the plain snapshot"""
+        plain = self.client.get(self.url)
+        compressed = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip, br")
+
+        self.assertEqual(compressed["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", compressed["Vary"])
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+
+    def test_snapshot_is_reused_between_requests(self):
+        """Test that cached reads only query the change version"""
+        self.client.get(self.url)
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+
+def decode_columnar(payload):
+    """Reference decoder for the columnar map payload (mirrors landing_map.js)"""
+    columns = payload["columns"]
+    places = []
+    lat = lng = 0
+    for index, place_id in enumerate(columns["id"]):
+        lat += columns["latitude"][index]
+        lng += columns["longitude"][index]
+        category, icon = payload["categories"][columns["category"][index]]
+        image = columns["image"][index]
+        places.append(
+            {
+                "id": place_id,
+                "name": columns["name"][index],
+                "description": columns["description"][index],
+                "latitude": lat / 1_000_000,
+                "longitude": lng / 1_000_000,
+                "image_url": payload["images"][image] if image >= 0 else None,
+                "category": category,
+                "category_icon": icon,
+                "url": payload["url_template"].replace("{id}", str(place_id)),
+                "rating": columns["rating"][index],
+                "review_count": columns["review_count"][index],
+            }
+        )
+    return places
+
+
+class MapDataColumnarFormatTests(TestCase):
+    """Test suite for the compact columnar map payload"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username="creator", password="pass123")
+        self.beach = Category.objects.create(name="Praias", slug="praias", icon="🏖️")
+        coordinates = [
+            (-22.9194, -42.8186),
+            (-22.958123, -42.951234),
+            (-22.9068, -43.1729),
+            (-22.919401, -42.818599),
+        ]
+        for index, (lat, lng) in enumerate(coordinates):
+            place = Place.objects.create(
+                name=f"Place {index}",
+                description="D" * (50 + index * 40),
+                address="Test address",
+                latitude=lat,
+                longitude=lng,
+                created_by=self.user,
+                is_approved=True,
+            )
+            if index % 2 == 0:
+                place.categories.add(self.beach)
+            PlaceReview.objects.create(
+                place=place, user=self.user, rating=index + 1, comment="Ok"
+            )
+        self.url = reverse("explore:map_data_api")
+
+    def test_columnar_is_equivalent_to_json_format(self):
+        """Test that decoding the columnar payload yields the regular payload"""
+        regular = self.client.get(self.url).json()
+        columnar = self.client.get(self.url, {"format": "columnar"}).json()
+
+        self.assertEqual(columnar["format"], "columnar")
+        self.assertEqual(columnar["count"], regular["count"])
+        self.assertEqual(columnar["version"], regular["version"])
+
+        decoded = {place["id"]: place for place in decode_columnar(columnar)}
+        expected = {place["id"]: place for place in regular["places"]}
+        self.assertEqual(decoded, expected)
+
+    def test_columnar_payload_is_smaller(self):
+        """Test that the columnar payload is smaller than the regular one"""
+        regular = self.client.get(self.url)
+        columnar = self.client.get(self.url, {"format": "columnar"})
+        self.assertLess(len(columnar.content), len(regular.content))
+
+    def test_columnar_interns_categories(self):
+        """Test that each category appears once in the lookup table"""
+        columnar = self.client.get(self.url, {"format": "columnar"}).json()
+        self.assertEqual(
+            sorted(map(tuple, columnar["categories"])),
+            [("Outros", "📍"), ("Praias", "🏖️")],
+        )
+
+    def test_columnar_coordinates_are_sorted_deltas(self):
+        """Test that coordinates are integer micro-degree deltas"""
+        columns = self.client.get(self.url, {"format": "columnar"}).json()["columns"]
+        for value in columns["latitude"] + columns["longitude"]:
+            self.assertIsInstance(value, int)
+        self.assertTrue(all(delta >= 0 for delta in columns["latitude"][1:]))
+
+    @override_settings(PLACE_CHANGE_SYNC_OVERLAP=0)
+    def test_columnar_works_with_filters(self):
+        """Test that columnar output can be combined with bbox and since"""
+        data = self.client.get(
+            self.url, {"format": "columnar", "bbox": "-23.0,-43.0,-22.9,-42.8"}
+        ).json()
+        self.assertEqual(data["count"], 3)
+
+        data = self.client.get(
+            self.url, {"format": "columnar", "since": data["version"]}
+        ).json()
+        self.assertEqual(data["count"], 0)
+        self.assertEqual(data["deleted"], [])
+
+    def test_invalid_format_returns_400(self):
+        """Test that unknown output formats are rejected"""
+        response = self.client.get(self.url, {"format": "xml"})
+        self.assertEqual(response.status_code, 400)
+
+
+class SparseFieldsetTests(TestCase):
+    """Test suite for ?fields= and ?precision= on the explore JSON APIs"""
+
+    def setUp(self):
+        cache.clear()
+        caches["api"].clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username="creator", password="pass123")
+        self.category = Category.objects.create(name="Praias", slug="praias")
+        self.places = []
+        for index in range(3):
+            place = Place.objects.create(
+                name=f"Place {index}",
+                description="Description",
+                address="Test address",
+                latitude=-22.919412 + index / 100,
+                longitude=-42.818687,
+                created_by=self.user,
+                is_approved=True,
+            )
+            place.categories.add(self.category)
+            self.places.append(place)
+        self.map_url = reverse("explore:map_data_api")
+        self.ids_url = reverse("explore:places_by_ids_api")
+
+    def test_map_data_returns_only_requested_fields(self):
+        """Test that only the requested fields are serialized, in default order"""
+        data = self.client.get(
+            self.map_url, {"fields": "name,latitude,id,longitude"}
+        ).json()
+        self.assertEqual(data["count"], 3)
+        for place in data["places"]:
+            self.assertEqual(list(place), ["id", "name", "latitude", "longitude"])
+
+    def test_simple_fields_skip_prefetch_queries(self):
+        """Test that column-only fields are loaded without relation queries"""
+        # Versão atual + uma única consulta com .values()
+        with self.assertNumQueries(2):
+            self.client.get(self.map_url, {"fields": "id,latitude,longitude"})
+
+    def test_precision_rounds_coordinates(self):
+        """Test that coordinates are rounded to the requested precision"""
+        data = self.client.get(
+            self.map_url, {"fields": "id,latitude,longitude", "precision": "3"}
+        ).json()
+        latitudes = sorted(place["latitude"] for place in data["places"])
+        self.assertEqual(latitudes, [-22.919, -22.909, -22.899])
+        self.assertTrue(all(place["longitude"] == -42.819 for place in data["places"]))
+
+    def test_fields_with_columnar_format(self):
+        """Test that columnar output only carries the requested columns"""
+        data = self.client.get(
+            self.map_url, {"format": "columnar", "fields": "id,latitude,longitude"}
+        ).json()
+        self.assertEqual(set(data["columns"]), {"id", "latitude", "longitude"})
+        self.assertNotIn("url_template", data)
+        self.assertNotIn("categories", data)
+
+    def test_invalid_fields_or_precision_return_400(self):
+        """Test that unknown fields and bad precision values are rejected"""
+        for params in (
+            {"fields": "id,secret"},
+            {"fields": ","},
+            {"precision": "7"},
+            {"precision": "abc"},
+        ):
+            response = self.client.get(self.map_url, params)
+            self.assertEqual(response.status_code, 400, params)
+
+        response = self.client.get(self.ids_url, {"ids": "1", "fields": "latitude"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_places_by_ids_fields(self):
+        """Test that places-by-ids supports sparse fieldsets"""
+        ids = ",".join(str(place.id) for place in self.places)
+        data = self.client.get(self.ids_url, {"ids": ids, "fields": "id,categories"})
+        data = data.json()
+        self.assertEqual(data["count"], 3)
+        for place in data["places"]:
+            self.assertEqual(list(place), ["id", "categories"])
+            self.assertEqual(place["categories"][0]["slug"], "praias")
+
+    def test_places_by_ids_excerpt_field(self):
+        """Test that the description excerpt is only returned when requested"""
+        place = self.places[0]
+        place.description = "x" * 300
+        place.save()
+        data = self.client.get(
+            self.ids_url,
+            {
+                "ids": str(place.id),
+                "fields": "id,name,image_url,categories,url,excerpt",
+            },
+        ).json()
+        self.assertEqual(
+            list(data["places"][0]),
+            ["id", "name", "image_url", "categories", "url", "excerpt"],
+        )
+        self.assertEqual(data["places"][0]["excerpt"], "x" * 100 + "...")
+
+    def test_places_by_ids_default_payload_unchanged(self):
+        """Test that places-by-ids still returns all fields by default"""
+        data = self.client.get(self.ids_url, {"ids": str(self.places[0].id)}).json()
+        self.assertEqual(
+            list(data["places"][0]),
+            [
+                "id",
+                "name",
+                "description",
+                "image_url",
+                "categories",
+                "url",
+                "rating",
+                "review_count",
+                "rating_histogram",
+            ],
+        )
+
+
+class MapDataStreamingTests(TestCase):
+    """Test suite for the streaming mode of the map data API"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username="creator", password="pass123")
+        for index in range(5):
+            Place.objects.create(
+                name=f"Place {index}",
+                description="Description",
+                address="Test address",
+                latitude=-22.9194 + index / 100,
+                longitude=-42.8186,
+                created_by=self.user,
+                is_approved=True,
+            )
+        self.url = reverse("explore:map_data_api")
+
+    def _stream(self, params):
+        response = self.client.get(self.url, {**params, "stream": "1"})
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content)
+
+    def test_stream_matches_buffered_response(self):
+        """Test that the streamed body is identical to the regular response"""
+        params = {"bbox": "-23.0,-43.0,-22.0,-42.0"}
+        buffered = self.client.get(self.url, params).content
+        self.assertEqual(self._stream(params), buffered)
+
+    def test_stream_in_chunks(self):
+        """Test that places are emitted in several chunks"""
+        with self.settings(MAP_DATA_STREAM_CHUNK_SIZE=2):
+            response = self.client.get(self.url, {"stream": "1"})
+            chunks = list(response.streaming_content)
+        self.assertEqual(len(chunks), 3)
+        data = json.loads(b"".join(chunks))
+        self.assertEqual(data["count"], 5)
+
+    @override_settings(PLACE_CHANGE_SYNC_OVERLAP=0)
+    def test_stream_with_fields_and_since(self):
+        """Test that streaming supports sparse fieldsets and delta sync"""
+        version = PlaceChange.current_version()
+        place = Place.objects.first()
+        place.name = "Renamed"
+        place.save()
+        Place.objects.last().delete()
+
+        data = json.loads(self._stream({"since": version, "fields": "id,name"}))
+        self.assertEqual(data["places"], [{"id": place.id, "name": "Renamed"}])
+        self.assertEqual(len(data["deleted"]), 1)
+        self.assertEqual(data["version"], PlaceChange.current_version())
+
+    def test_stream_order_is_stable(self):
+        """Test that places with the same creation time keep a stable order"""
+        Place.objects.update(created_at=Place.objects.first().created_at)
+        data = json.loads(self._stream({"fields": "id"}))
+        ids = [place["id"] for place in data["places"]]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+
+    def test_stream_rejects_columnar_format(self):
+        """Test that the columnar format cannot be streamed"""
+        response = self.client.get(self.url, {"stream": "1", "format": "columnar"})
+        self.assertEqual(response.status_code, 400)
+
+
+class PlacesByIdsAPITests(TestCase):
+    """Test suite for the places-by-ids API"""
+
+    def setUp(self):
+        cache.clear()
+        caches["api"].clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username="creator", password="pass123")
+        self.reviewer = User.objects.create_user(username="reviewer", password="pass")
+        self.category = Category.objects.create(name="Praias", slug="praias")
+        self.places = []
+        for index in range(4):
+            place = Place.objects.create(
+                name=f"Place {index}",
+                description="Description",
+                address="Test address",
+                created_by=self.user,
+                is_approved=True,
+            )
+            place.categories.add(self.category)
+            PlaceImage.objects.create(place=place, image=f"places/{index}.jpg")
+            PlaceImage.objects.create(
+                place=place, image=f"places/{index}-primary.jpg", is_primary=True
+            )
+            PlaceReview.objects.create(
+                place=place, user=self.user, rating=4, comment="Bom"
+            )
+            PlaceReview.objects.create(
+                place=place, user=self.reviewer, rating=index + 1, comment="Ok"
+            )
+            self.places.append(place)
+        self.url = reverse("explore:places_by_ids_api")
+
+    def _ids(self, places):
+        return ",".join(str(place.id) for place in places)
+
+    def test_results_follow_requested_order(self):
+        """Test that places are returned in the order of the requested IDs"""
+        requested = [self.places[2], self.places[0], self.places[3]]
+        data = self.client.get(self.url, {"ids": self._ids(requested)}).json()
+        self.assertEqual(
+            [place["id"] for place in data["places"]],
+            [place.id for place in requested],
+        )
+
+    def test_duplicate_and_hidden_ids_are_skipped(self):
+        """Test that duplicated and non-approved IDs are not returned"""
+        hidden = Place.objects.create(
+            name="Hidden", description="D", address="A", created_by=self.user
+        )
+        ids = f"{self.places[1].id},{hidden.id},{self.places[1].id},999999"
+        data = self.client.get(self.url, {"ids": ids}).json()
+        self.assertEqual([place["id"] for place in data["places"]], [self.places[1].id])
+        self.assertEqual(data["count"], 1)
+
+    def test_payload_values(self):
+        """Test rating, review count and primary image in the payload"""
+        data = self.client.get(self.url, {"ids": self._ids(self.places[:2])}).json()
+        first, second = data["places"]
+        self.assertEqual(first["rating"], 2.5)
+        self.assertEqual(second["rating"], 3.0)
+        self.assertEqual(first["review_count"], 2)
+        self.assertEqual(first["image_url"], "/media/places/0-primary.jpg")
+        self.assertEqual(first["categories"][0]["slug"], "praias")
+
+    def test_query_count_does_not_depend_on_number_of_ids(self):
+        """Test that any ID list is answered in a fixed number of queries"""
+        # Places joined with their pre-serialized cards
+        with self.assertNumQueries(1):
+            self.client.get(self.url, {"ids": self._ids(self.places[:1])})
+        with self.assertNumQueries(1):
+            self.client.get(self.url, {"ids": self._ids(self.places[1:])})
+        # Sparse fields: places + primary images + categories
+        with self.assertNumQueries(3):
+            self.client.get(
+                self.url,
+                {
+                    "ids": self._ids(self.places[1:]),
+                    "fields": "id,image_url,categories",
+                },
+            )
+
+    def test_fragments_are_cached(self):
+        """Test that cached per-place fragments are reused"""
+        ids = self._ids(self.places)
+        first = self.client.get(self.url, {"ids": ids}).content
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url, {"ids": ids}).content
+        self.assertEqual(first, second)
+
+    def test_fragment_invalidated_when_place_changes(self):
+        """Test that a review invalidates only the reviewed place fragment"""
+        ids = self._ids(self.places)
+        self.client.get(self.url, {"ids": ids})
+
+        other = User.objects.create_user(username="other", password="pass")
+        PlaceReview.objects.create(
+            place=self.places[0], user=other, rating=1, comment="Ruim"
+        )
+
+        with self.assertNumQueries(1):
+            data = self.client.get(self.url, {"ids": ids}).json()
+        self.assertEqual(data["places"][0]["review_count"], 3)
+        self.assertEqual(data["places"][1]["review_count"], 2)
+
+    def test_evicted_version_does_not_serve_stale_fragment(self):
+        """Test that losing a place version key does not revive old fragments"""
+        place = self.places[0]
+        # Versão ainda não criada, como logo após um despejo
+        caches["api"].clear()
+        self.client.get(self.url, {"ids": str(place.id)})
+        place.name = "Renamed"
+        place.save()
+        caches["api"].delete(_place_version_key(place.id))
+
+        data = self.client.get(self.url, {"ids": str(place.id)}).json()
+        self.assertEqual(data["places"][0]["name"], "Renamed")
+
+    def test_max_ids_enforced(self):
+        """Test that requests with too many IDs are rejected"""
+        with self.settings(PLACES_BY_IDS_MAX=3):
+            response = self.client.get(self.url, {"ids": self._ids(self.places)})
+            self.assertEqual(response.status_code, 400)
+
+            # Duplicados não contam para o limite
+            ids = ",".join([str(self.places[0].id)] * 5)
+            response = self.client.get(self.url, {"ids": ids})
+            self.assertEqual(response.status_code, 200)
+
+    def test_favorites_page_fetches_over_limit_ids_in_batches(self):
+        """Test that more favorites than PLACES_BY_IDS_MAX are loaded in batches"""
+        with self.settings(PLACES_BY_IDS_MAX=3):
+            page = self.client.get(reverse("explore:favorites"))
+            self.assertEqual(page.context["places_by_ids_max"], 3)
+            self.assertContains(page, "const batchSize = 3;")
+
+            # Os lotes que a página envia, juntos, trazem todos os favoritos
+            batches = [self.places[:3], self.places[3:]]
+            loaded = []
+            for batch in batches:
+                response = self.client.get(self.url, {"ids": self._ids(batch)})
+                self.assertEqual(response.status_code, 200)
+                loaded.extend(place["id"] for place in response.json()["places"])
+        self.assertEqual(loaded, [place.id for place in self.places])
+
+
+class NearbyAPITests(TestCase):
+    """Test suite for the nearby places API"""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username="creator", password="pass123")
+        self.center = (-22.9194, -42.8186)
+        # Lugares a ~0, ~1,1, ~2,2, ~5,6 e ~11 km ao norte do centro
+        self.places = []
+        for index, offset in enumerate((0, 0.01, 0.02, 0.05, 0.1)):
+            self.places.append(
+                Place.objects.create(
+                    name=f"Place {index}",
+                    description="Description",
+                    address="Test address",
+                    latitude=self.center[0] + offset,
+                    longitude=self.center[1],
+                    created_by=self.user,
+                    is_approved=True,
+                )
+            )
+        self.url = reverse("explore:nearby_api")
+
+    def _get(self, **params):
+        params = {"lat": self.center[0], "lng": self.center[1], **params}
+        return self.client.get(self.url, params)
+
+    def test_places_sorted_by_distance(self):
+        """Test places are returned nearest first with their distance"""
+        data = self._get(radius_km=20).json()
+        self.assertEqual(
+            [place["id"] for place in data["places"]],
+            [place.id for place in self.places],
+        )
+        distances = [place["distance_km"] for place in data["places"]]
+        self.assertEqual(distances, sorted(distances))
+        self.assertEqual(distances[0], 0)
+        self.assertAlmostEqual(distances[1], 1.112, places=2)
+
+    def test_radius_and_k_limit_results(self):
+        """Test results stay within the radius and k"""
+        data = self._get(radius_km=3).json()
+        self.assertEqual(data["count"], 3)
+        self.assertTrue(all(place["distance_km"] <= 3 for place in data["places"]))
+
+        data = self._get(radius_km=20, k=2).json()
+        self.assertEqual(
+            [place["id"] for place in data["places"]],
+            [self.places[0].id, self.places[1].id],
+        )
+
+    def test_k_nearest_found_beyond_initial_search_radius(self):
+        """Test that the search expands until k places are found"""
+        data = self._get(lat=self.center[0] + 0.1, radius_km=50, k=2).json()
+        self.assertEqual(
+            [place["id"] for place in data["places"]],
+            [self.places[4].id, self.places[3].id],
+        )
+
+    def test_hidden_places_excluded(self):
+        """Test that non-approved places are not returned"""
+        self.places[0].is_approved = False
+        self.places[0].save()
+        data = self._get(radius_km=20).json()
+        self.assertNotIn(self.places[0].id, [place["id"] for place in data["places"]])
+
+    def test_fields(self):
+        """Test that sparse fieldsets are supported"""
+        data = self._get(radius_km=20, fields="name").json()
+        self.assertEqual(list(data["places"][0]), ["name", "distance_km"])
+
+    def test_invalid_parameters_return_400(self):
+        """Test that invalid coordinates, radius and k are rejected"""
+        for params in (
+            {"lat": "abc"},
+            {"lat": "91"},
+            {"lng": "-181"},
+            {"radius_km": "0"},
+            {"radius_km": "1000"},
+            {"k": "0"},
+            {"k": "x"},
+            {"fields": "secret"},
+        ):
+            response = self._get(**params)
+            self.assertEqual(response.status_code, 400, params)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 400)
+
+
+class PlaceStatsTests(TestCase):
+    """Test suite for the denormalized PlaceStats aggregates"""
+
+    def setUp(self):
+        self.creator = User.objects.create_user(username="creator", password="pass")
+        self.users = [
+            User.objects.create_user(username=f"user{index}", password="pass")
+            for index in range(3)
+        ]
+        self.place = Place.objects.create(
+            name="Test Place",
+            description="Test description",
+            address="Test address",
+            created_by=self.creator,
+            is_approved=True,
+        )
+
+    def _stats(self):
+        return PlaceStats.objects.get(place=self.place)
+
+    def _assert_consistent(self):
+        """Incremental values must match a full rebuild"""
+        incremental = self._stats()
+        PlaceStats.rebuild([self.place.id])
+        rebuilt = self._stats()
+        for field in ("review_count", "rating_sum", "favorites_count"):
+            self.assertEqual(getattr(incremental, field), getattr(rebuilt, field))
+        self.assertEqual(incremental.average_rating, rebuilt.average_rating)
+        self.assertAlmostEqual(incremental.bayesian_rating, rebuilt.bayesian_rating)
+
+    def test_stats_created_with_place(self):
+        """Test that a new place starts with zeroed stats"""
+        stats = self._stats()
+        self.assertEqual(stats.review_count, 0)
+        self.assertEqual(stats.rating_sum, 0)
+        self.assertIsNone(stats.average_rating)
+        self.assertEqual(stats.favorites_count, 0)
+
+    def test_review_create_edit_delete(self):
+        """Test that reviews update count, sum and average incrementally"""
+        first = PlaceReview.objects.create(
+            place=self.place, user=self.users[0], rating=5, comment="Ótimo"
+        )
+        PlaceReview.objects.create(
+            place=self.place, user=self.users[1], rating=2, comment="Ruim"
+        )
+        stats = self._stats()
+        self.assertEqual((stats.review_count, stats.rating_sum), (2, 7))
+        self.assertEqual(stats.average_rating, 3.5)
+
+        first.rating = 3
+        first.save()
+        stats = self._stats()
+        self.assertEqual((stats.review_count, stats.rating_sum), (2, 5))
+        self.assertEqual(stats.average_rating, 2.5)
+        self._assert_consistent()
+
+        self.assertEqual(self._stats().rating_histogram, {1: 0, 2: 1, 3: 1, 4: 0, 5: 0})
+
+        first.delete()
+        self.assertEqual(self._stats().average_rating, 2.0)
+        self.assertEqual(self._stats().rating_histogram, {1: 0, 2: 1, 3: 0, 4: 0, 5: 0})
+        PlaceReview.objects.all().delete()
+        stats = self._stats()
+        self.assertEqual((stats.review_count, stats.rating_sum), (0, 0))
+        self.assertIsNone(stats.average_rating)
+
+    def test_favorites_count(self):
+        """Test that favorites update the favorites count"""
+        for user in self.users:
+            Favorite.objects.create(user=user, place=self.place)
+        self.assertEqual(self._stats().favorites_count, 3)
+
+        Favorite.objects.filter(user=self.users[0]).delete()
+        self.assertEqual(self._stats().favorites_count, 2)
+        self._assert_consistent()
+
+    def test_properties_read_from_stats(self):
+        """Test that Place properties do not run aggregate queries"""
+        PlaceReview.objects.create(
+            place=self.place, user=self.users[0], rating=4, comment="Bom"
+        )
+        Favorite.objects.create(user=self.users[0], place=self.place)
+
+        place = Place.objects.select_related("stats").get(pk=self.place.pk)
+        with self.assertNumQueries(0):
+            for _ in range(5):
+                self.assertEqual(place.average_rating, 4.0)
+            self.assertEqual(place.review_count, 1)
+            self.assertEqual(place.favorites_count, 1)
+
+    def test_missing_stats_rebuilt_on_review(self):
+        """Test that a review recreates stats missing for older places"""
+        PlaceReview.objects.create(
+            place=self.place, user=self.users[0], rating=4, comment="Bom"
+        )
+        PlaceStats.objects.all().delete()
+        place = Place.objects.get(pk=self.place.pk)
+        self.assertIsNone(place.average_rating)
+
+        PlaceReview.objects.create(
+            place=self.place, user=self.users[1], rating=2, comment="Ok"
+        )
+        stats = self._stats()
+        self.assertEqual((stats.review_count, stats.rating_sum), (2, 6))
+
+    def test_delete_place_with_reviews_and_favorites(self):
+        """Test that cascading deletes do not recreate stats"""
+        PlaceReview.objects.create(
+            place=self.place, user=self.users[0], rating=4, comment="Bom"
+        )
+        Favorite.objects.create(user=self.users[0], place=self.place)
+        self.place.delete()
+        self.assertFalse(PlaceStats.objects.exists())
+
+    def test_rebuild_place_stats_command(self):
+        """Test that the rebuild command fixes inconsistent stats"""
+        PlaceReview.objects.create(
+            place=self.place, user=self.users[0], rating=4, comment="Bom"
+        )
+        PlaceStats.objects.filter(place=self.place).update(
+            review_count=10, rating_sum=3, average_rating=0.3, favorites_count=7
+        )
+
+        PlaceStats.objects.filter(place=self.place).update(rating_1=5, rating_4=0)
+
+        call_command("rebuild_place_stats", stdout=StringIO())
+
+        stats = self._stats()
+        self.assertEqual((stats.review_count, stats.rating_sum), (1, 4))
+        self.assertEqual(stats.average_rating, 4.0)
+        self.assertEqual(stats.favorites_count, 0)
+        self.assertEqual(stats.rating_histogram, {1: 0, 2: 0, 3: 0, 4: 1, 5: 0})
+
+    def test_review_views_update_histogram(self):
+        """Test that the review views keep the histogram in sync"""
+        client = Client()
+        client.login(username="user0", password="pass")
+        client.post(
+            reverse("explore:review_create", args=[self.place.pk]),
+            {"rating": 5, "comment": "Excelente"},
+        )
+        self.assertEqual(self._stats().rating_histogram[5], 1)
+
+        review = PlaceReview.objects.get(place=self.place)
+        client.post(
+            reverse("explore:review_edit", args=[review.pk]),
+            {"rating": 3, "comment": "Mudei de ideia"},
+        )
+        self.assertEqual(self._stats().rating_histogram, {1: 0, 2: 0, 3: 1, 4: 0, 5: 0})
+
+        client.post(reverse("explore:review_delete", args=[review.pk]))
+        stats = self._stats()
+        self.assertEqual(stats.rating_histogram, {1: 0, 2: 0, 3: 0, 4: 0, 5: 0})
+        self.assertEqual(stats.review_count, 0)
+
+    def test_detail_page_shows_rating_breakdown(self):
+        """Test that the detail page shows the histogram from the stats"""
+        for user, rating in zip(self.users, (5, 5, 2)):
+            PlaceReview.objects.create(
+                place=self.place, user=user, rating=rating, comment="Ok"
+            )
+        response = Client().get(reverse("explore:place_detail", args=[self.place.pk]))
+        breakdown = response.context["rating_breakdown"]
+        self.assertEqual([row["stars"] for row in breakdown], [5, 4, 3, 2, 1])
+        self.assertEqual(breakdown[0], {"stars": 5, "count": 2, "percent": 67})
+        self.assertEqual(breakdown[3], {"stars": 2, "count": 1, "percent": 33})
+        self.assertEqual(response.context["review_count"], 3)
+
+    def test_places_by_ids_rating_histogram(self):
+        """Test that the JSON API exposes the histogram"""
+        PlaceReview.objects.create(
+            place=self.place, user=self.users[0], rating=4, comment="Bom"
+        )
+        response = Client().get(
+            reverse("explore:places_by_ids_api"),
+            {"ids": self.place.pk, "fields": "rating_histogram"},
+        )
+        self.assertEqual(
+            response.json()["places"][0]["rating_histogram"],
+            {"1": 0, "2": 0, "3": 0, "4": 1, "5": 0},
+        )
+
+
+class PlaceSortTests(TestCase):
+    """Test suite for the rating and favorites sorts of the explore pages"""
+
+    def setUp(self):
+        self.creator = User.objects.create_user(username="creator", password="pass")
+        self.users = [
+            User.objects.create_user(username=f"user{index}", password="pass")
+            for index in range(6)
+        ]
+        self.category = Category.objects.create(
+            name="Praias", slug="praias", is_active=True
+        )
+        self.lucky, self.popular, self.unrated = [
+            Place.objects.create(
+                name=name,
+                description="Test description",
+                address="Test address",
+                created_by=self.creator,
+                is_approved=True,
+            )
+            for name in ("Lucky", "Popular", "Unrated")
+        ]
+        for place in (self.lucky, self.popular, self.unrated):
+            place.categories.add(self.category)
+
+        # Uma única nota 5 contra muitas notas 4 e 5
+        PlaceReview.objects.create(
+            place=self.lucky, user=self.users[0], rating=5, comment="Perfeito"
+        )
+        for user, rating in zip(self.users, (5, 4, 5, 4, 5, 4)):
+            PlaceReview.objects.create(
+                place=self.popular, user=user, rating=rating, comment="Bom"
+            )
+        for user in self.users[:2]:
+            Favorite.objects.create(user=user, place=self.unrated)
+        Favorite.objects.create(user=self.users[0], place=self.lucky)
+
+    def _names(self, response, key):
+        return [place.name for place in response.context[key]]
+
+    def test_rating_sort_prefers_many_good_reviews(self):
+        """Test that a single 5-star review does not beat many good reviews"""
+        response = Client().get(reverse("explore:explore"), {"sort": "rating"})
+        self.assertEqual(
+            self._names(response, "all_places"), ["Popular", "Lucky", "Unrated"]
+        )
+        self.assertEqual(response.context["current_sort"], "rating")
+
+    def test_favorites_sort(self):
+        """Test sorting by number of favorites"""
+        response = Client().get(reverse("explore:explore"), {"sort": "favorites"})
+        self.assertEqual(
+            self._names(response, "all_places"), ["Unrated", "Lucky", "Popular"]
+        )
+
+    def test_category_page_sorts(self):
+        """Test that the category page accepts the same sorts"""
+        url = reverse("explore:category_detail", args=[self.category.slug])
+        response = Client().get(url, {"sort": "rating"})
+        self.assertEqual(
+            self._names(response, "places"), ["Popular", "Lucky", "Unrated"]
+        )
+        response = Client().get(url, {"sort": "favorites"})
+        self.assertEqual(
+            self._names(response, "places"), ["Unrated", "Lucky", "Popular"]
+        )
+
+    def test_unknown_sort_falls_back_to_newest(self):
+        """Test that an unknown sort keeps the default ordering"""
+        response = Client().get(reverse("explore:explore"), {"sort": "bogus"})
+        self.assertEqual(
+            self._names(response, "all_places"), ["Unrated", "Popular", "Lucky"]
+        )
+
+    def test_bayesian_rating_maintained_incrementally(self):
+        """Test that the stored score follows reviews and matches a rebuild"""
+        with self.settings(RATING_PRIOR_MEAN=3.0, RATING_PRIOR_WEIGHT=5):
+            review = PlaceReview.objects.create(
+                place=self.unrated, user=self.users[0], rating=5, comment="Ok"
+            )
+            stats = PlaceStats.objects.get(place=self.unrated)
+            self.assertAlmostEqual(stats.bayesian_rating, (15 + 5) / 6)
+
+            review.rating = 1
+            review.save()
+            stats = PlaceStats.objects.get(place=self.unrated)
+            self.assertAlmostEqual(stats.bayesian_rating, (15 + 1) / 6)
+
+            review.delete()
+            stats = PlaceStats.objects.get(place=self.unrated)
+            self.assertAlmostEqual(stats.bayesian_rating, 3.0)
+
+            incremental = {
+                place_id: score
+                for place_id, score in PlaceStats.objects.values_list(
+                    "place_id", "bayesian_rating"
+                )
+            }
+            PlaceStats.rebuild()
+            for place_id, score in PlaceStats.objects.values_list(
+                "place_id", "bayesian_rating"
+            ):
+                self.assertAlmostEqual(incremental[place_id], score)
+
+    def test_sort_reads_indexed_columns(self):
+        """Test that the sorts do not aggregate reviews or favorites"""
+        for sort in ("rating", "favorites"):
+            response = Client().get(reverse("explore:explore"), {"sort": sort})
+            query = str(response.context["all_places"].query)
+            self.assertIn("explore_placestats", query)
+            self.assertNotIn("GROUP BY", query)
+            self.assertNotIn("explore_placereview", query)
+            self.assertNotIn("explore_favorite", query)
+
+
+class TrendingScoreTests(TestCase):
+    """Test suite for the daily activity counters and the trending score"""
+
+    def setUp(self):
+        self.creator = User.objects.create_user(username="creator", password="pass")
+        self.user = User.objects.create_user(username="visitor", password="pass")
+        self.places = [
+            Place.objects.create(
+                name=f"Place {index}",
+                description="Test description",
+                address="Test address",
+                created_by=self.creator,
+                is_approved=True,
+            )
+            for index in range(3)
+        ]
+        self.today = timezone.localdate()
+
+    def _activity(self, place):
+        return PlaceActivity.objects.get(place=place, day=self.today)
+
+    def _score(self, place):
+        return PlaceStats.objects.get(place=place).trending_score
+
+    def test_activity_recorded(self):
+        """Test that views, reviews and favorites fill today's counter"""
+        place = self.places[0]
+        for _ in range(2):
+            Client().get(reverse("explore:place_detail", args=[place.pk]))
+        PlaceReview.objects.create(place=place, user=self.user, rating=4, comment="Bom")
+        Favorite.objects.create(user=self.user, place=place)
+
+        activity = self._activity(place)
+        self.assertEqual(
+            (activity.views, activity.reviews, activity.favorites), (2, 1, 1)
+        )
+        self.assertEqual(PlaceActivity.objects.count(), 1)
+
+    def test_score_decays_with_age(self):
+        """Test that older activity weighs half per half-life"""
+        with self.settings(TRENDING_HALF_LIFE_DAYS=2, TRENDING_WINDOW_DAYS=14):
+            PlaceActivity.objects.create(place=self.places[0], day=self.today, views=4)
+            PlaceActivity.objects.create(
+                place=self.places[1], day=self.today - timedelta(days=2), views=4
+            )
+            PlaceActivity.objects.create(
+                place=self.places[2], day=self.today - timedelta(days=4), reviews=1
+            )
+            self.assertEqual(PlaceStats.update_trending(), 3)
+
+        self.assertAlmostEqual(self._score(self.places[0]), 4)
+        self.assertAlmostEqual(self._score(self.places[1]), 2)
+        self.assertAlmostEqual(self._score(self.places[2]), 5 / 4)
+
+    def test_activity_outside_window_is_dropped(self):
+        """Test that places without recent activity fall back to zero"""
+        with self.settings(TRENDING_WINDOW_DAYS=7):
+            PlaceActivity.objects.create(place=self.places[0], day=self.today, views=1)
+            PlaceStats.update_trending()
+            self.assertGreater(self._score(self.places[0]), 0)
+
+            PlaceActivity.objects.filter(place=self.places[0]).update(
+                day=self.today - timedelta(days=7)
+            )
+            self.assertEqual(PlaceStats.update_trending(), 0)
+
+        self.assertEqual(self._score(self.places[0]), 0)
+        self.assertFalse(PlaceActivity.objects.exists())
+
+    def test_landing_shows_top_trending_places(self):
+        """Test that the landing page orders trending places by score"""
+        for place, views in zip(self.places, (1, 0, 7)):
+            if views:
+                PlaceActivity.objects.create(place=place, day=self.today, views=views)
+        call_command("update_trending", stdout=StringIO())
+
+        response = Client().get(reverse("core:landing"))
+        trending = response.context["trending_places"]
+        self.assertEqual(list(trending), [self.places[2], self.places[0]])
+        self.assertNotIn("explore_placeactivity", str(trending.query))
+
+    def test_landing_falls_back_to_recent_places(self):
+        """Test that trending shows recent places before any score exists"""
+        response = Client().get(reverse("core:landing"))
+        trending = response.context["trending_places"]
+        self.assertEqual(list(trending), self.places[::-1])
+
+    def test_hidden_place_views_are_not_recorded(self):
+        """Test that owners viewing a pending place do not count as views"""
+        place = self.places[0]
+        Place.objects.filter(pk=place.pk).update(is_approved=False)
+        client = Client()
+        client.login(username="creator", password="pass")
+
+        response = client.get(reverse("explore:place_detail", args=[place.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(PlaceActivity.objects.exists())
+
+
+class PlaceCardQueryTests(TestCase):
+    """Test that pages listing place cards run a constant number of queries"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="admin", password="pass", is_staff=True
+        )
+        self.category = Category.objects.create(
+            name="Praias", slug="praias", is_active=True
+        )
+        self.client = Client()
+        self.client.login(username="admin", password="pass")
+
+    def _add_places(self, count):
+        for _ in range(count):
+            index = Place.objects.count()
+            place = Place.objects.create(
+                name=f"Place {index}",
+                description="Description",
+                address="Test address",
+                created_by=self.admin,
+                is_approved=True,
+            )
+            place.categories.add(self.category)
+            PlaceImage.objects.create(place=place, image=f"places/{index}.jpg")
+            PlaceImage.objects.create(
+                place=place, image=f"places/{index}-primary.jpg", is_primary=True
+            )
+            Favorite.objects.create(user=self.admin, place=place)
+
+    def _count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "-primary.jpg")
+        return len(queries)
+
+    def test_card_pages_query_count_does_not_depend_on_places(self):
+        """Test explore, category, landing, backlog and favorites pages"""
+        urls = [
+            reverse("explore:explore"),
+            reverse("explore:category_detail", args=[self.category.slug]),
+            reverse("core:landing"),
+            reverse("explore:backlog"),
+            reverse("explore:favorites"),
+        ]
+        self._add_places(2)
+        few = {url: self._count_queries(url) for url in urls}
+        self._add_places(4)
+        many = {url: self._count_queries(url) for url in urls}
+        self.assertEqual(few, many)
+
+
+class CategoryPlaceCountTests(TestCase):
+    """Test suite for the cached category place counts"""
+
+    def setUp(self):
+        cache.clear()
+        self.creator = User.objects.create_user(username="creator", password="pass")
+        self.beaches = Category.objects.create(name="Praias", slug="praias")
+        self.parks = Category.objects.create(name="Parques", slug="parques")
+        self.place = self._place(self.beaches)
+        self._place(self.beaches)
+        self._place(self.parks, is_approved=False)
+
+    def _place(self, category, is_approved=True):
+        place = Place.objects.create(
+            name="Place",
+            description="Description",
+            address="Test address",
+            created_by=self.creator,
+            is_approved=is_approved,
+        )
+        place.categories.add(category)
+        return place
+
+    def _counts(self):
+        counts = category_place_counts()
+        return counts[self.beaches.pk], counts[self.parks.pk]
+
+    def test_counts_only_visible_places(self):
+        """Test that only approved and active places are counted"""
+        self.assertEqual(self._counts(), (2, 0))
+
+    def test_counts_cached(self):
+        """Test that the counts are served from the cache"""
+        self._counts()
+        with self.assertNumQueries(0):
+            self.assertEqual(self._counts(), (2, 0))
+
+    def test_counts_refreshed_on_visibility_and_category_changes(self):
+        """Test approve, reject, deactivate, recategorize and delete"""
+        self.assertEqual(self._counts(), (2, 0))
+
+        pending = Place.objects.get(is_approved=False)
+        pending.is_approved = True
+        pending.save()
+        self.assertEqual(self._counts(), (2, 1))
+
+        self.place.is_approved = False
+        self.place.save()
+        self.assertEqual(self._counts(), (1, 1))
+
+        self.place.is_approved = True
+        self.place.save()
+        self.place.is_active = False
+        self.place.save()
+        self.assertEqual(self._counts(), (1, 1))
+
+        self.place.is_active = True
+        self.place.save()
+        self.place.categories.set([self.parks])
+        self.assertEqual(self._counts(), (1, 2))
+
+        self.place.delete()
+        self.assertEqual(self._counts(), (1, 1))
+
+    def test_pages_use_cached_counts(self):
+        """Test that pages do not count places once per category"""
+        for index in range(5):
+            Category.objects.create(name=f"Categoria {index}", slug=f"cat-{index}")
+        category_place_counts()
+
+        urls = [
+            reverse("core:landing"),
+            reverse("explore:explore"),
+            reverse("explore:category_detail", args=[self.beaches.slug]),
+        ]
+        for url in urls:
+            with CaptureQueriesContext(connection) as queries:
+                response = Client().get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(
+                [
+                    query
+                    for query in queries
+                    if "COUNT(" in query["sql"]
+                    and "explore_place_categories" in query["sql"]
+                ]
+            )
+        self.assertContains(response, "(2)")
+
+
+class SearchFacetTests(TestCase):
+    """Test suite for the category facets of the explore search"""
+
+    def setUp(self):
+        cache.clear()
+        self.creator = User.objects.create_user(username="creator", password="pass")
+        self.beaches = Category.objects.create(name="Praias", slug="praias")
+        self.food = Category.objects.create(name="Comida", slug="comida")
+        self.parks = Category.objects.create(name="Parques", slug="parques")
+        self.places = {}
+        for name, categories in (
+            ("Praia do Sol", [self.beaches]),
+            ("Quiosque do Sol", [self.beaches, self.food]),
+            ("Restaurante Sol Nascente", [self.food]),
+            ("Parque da Lua", [self.parks]),
+        ):
+            place = Place.objects.create(
+                name=name,
+                description="Description",
+                address="Test address",
+                created_by=self.creator,
+                is_approved=True,
+            )
+            place.categories.set(categories)
+            self.places[name] = place
+        self.url = reverse("explore:explore")
+
+    def _facets(self, response):
+        return {category.slug: count for category, count in response.context["facets"]}
+
+    def test_facet_counts_for_search_results(self):
+        """Test that each category shows how many results it contains"""
+        response = Client().get(self.url, {"q": "Sol"})
+        self.assertEqual(self._facets(response), {"praias": 2, "comida": 2})
+        self.assertContains(response, "?q=Sol&amp;sort=relevance&amp;category=praias")
+
+    def test_narrow_by_category(self):
+        """Test that ?category= narrows the results but keeps all facets"""
+        response = Client().get(self.url, {"q": "Sol", "category": "comida"})
+        self.assertEqual(
+            {place.name for place in response.context["all_places"]},
+            {"Quiosque do Sol", "Restaurante Sol Nascente"},
+        )
+        self.assertEqual(self._facets(response), {"praias": 2, "comida": 2})
+        self.assertEqual(response.context["selected_category"], "comida")
+
+    def test_no_facets_without_search(self):
+        """Test that facets are only computed for searches"""
+        response = Client().get(self.url)
+        self.assertEqual(response.context["facets"], [])
+
+    def test_facets_do_not_query_per_category(self):
+        """Test that the facets cost no query once the index is built"""
+        category_facets([])
+        ids = [place.pk for place in self.places.values()]
+        with self.assertNumQueries(0):
+            counts = category_facets(ids)
+        self.assertEqual(
+            counts, {self.beaches.pk: 2, self.food.pk: 2, self.parks.pk: 1}
+        )
+
+    def test_index_refreshed_when_categories_change(self):
+        """Test that re-categorizing a place updates the facets"""
+        Client().get(self.url, {"q": "Sol"})
+        self.places["Praia do Sol"].categories.set([self.parks])
+
+        response = Client().get(self.url, {"q": "Sol"})
+        self.assertEqual(
+            self._facets(response), {"praias": 1, "comida": 2, "parques": 1}
+        )
+
+
+class PlaceSearchTests(TestCase):
+    """Test suite for the explore search with the default backend"""
+
+    def setUp(self):
+        cache.clear()
+        self.creator = User.objects.create_user(username="creator", password="pass")
+        self.beaches = Category.objects.create(name="Praias", slug="praias")
+        self.food = Category.objects.create(name="Restaurantes", slug="restaurantes")
+        self.places = {}
+        for name, description, categories in (
+            ("Praia de Itaipuaçu", "Areia branca e ondas fortes", [self.beaches]),
+            ("Quiosque Maricá", "Petiscos na praia", [self.food]),
+            ("Restaurante Lagoa", "Peixes frescos", [self.food]),
+        ):
+            place = Place.objects.create(
+                name=name,
+                description=description,
+                address="Test address",
+                created_by=self.creator,
+                is_approved=True,
+            )
+            place.categories.set(categories)
+            self.places[name] = place
+        self.url = reverse("explore:explore")
+
+    def _search(self, query):
+        results = search(Place.objects.all(), query)
+        return [place.name for place in results.order_by("-relevance", "name")]
+
+    def test_analyzer_folds_accents_and_stems(self):
+        """Test accent folding, plural stemming and stop word removal"""
+        self.assertEqual(analyze("Maricá"), analyze("marica"))
+        self.assertEqual(analyze("praias"), analyze("Praia"))
+        self.assertEqual(analyze("hotéis"), analyze("hotel"))
+        self.assertEqual(analyze("praia de Maricá"), analyze("praia Maricá"))
+
+    def test_accent_insensitive_search(self):
+        """Test that a query without accents finds accented names"""
+        self.assertEqual(self._search("marica"), ["Quiosque Maricá"])
+        self.assertEqual(self._search("ITAIPUACU"), ["Praia de Itaipuaçu"])
+
+    def test_plural_matches_singular(self):
+        """Test that stemming matches plural and singular forms"""
+        self.assertEqual(self._search("restaurantes lagoa"), ["Restaurante Lagoa"])
+        self.assertEqual(self._search("peixe"), ["Restaurante Lagoa"])
+
+    def test_all_words_must_match(self):
+        """Test that every query word must be present"""
+        self.assertEqual(self._search("praia areia"), ["Praia de Itaipuaçu"])
+        self.assertEqual(self._search("praia lagoa"), [])
+
+    def test_last_word_matches_prefix(self):
+        """Test that the last word matches as a prefix (search as you type)"""
+        self.assertEqual(self._search("restaurante lag"), ["Restaurante Lagoa"])
+        self.assertEqual(self._search("lag restaurante"), [])
+
+    def test_stop_words_only_returns_nothing(self):
+        """Test that a query made only of stop words has no results"""
+        self.assertEqual(self._search("de na"), [])
+        response = Client().get(self.url, {"q": "de"})
+        self.assertEqual(list(response.context["all_places"]), [])
+
+    def test_name_ranks_above_description(self):
+        """Test that matches in the name weigh more than in the description"""
+        self.assertEqual(
+            self._search("praia"), ["Praia de Itaipuaçu", "Quiosque Maricá"]
+        )
+
+    def test_explore_orders_searches_by_relevance(self):
+        """Test that explore sorts search results by relevance by default"""
+        response = Client().get(self.url, {"q": "praia"})
+        self.assertEqual(response.context["current_sort"], "relevance")
+        self.assertEqual(
+            [place.name for place in response.context["all_places"]],
+            ["Praia de Itaipuaçu", "Quiosque Maricá"],
+        )
+
+    def test_index_follows_place_edits(self):
+        """Test that editing a place reindexes it"""
+        place = self.places["Restaurante Lagoa"]
+        place.name = "Restaurante Araçatiba"
+        place.save()
+        self.assertEqual(self._search("lagoa"), [])
+        self.assertEqual(self._search("aracatiba"), ["Restaurante Araçatiba"])
+
+    def test_index_follows_category_changes(self):
+        """Test that category links, renames and deletions reindex places"""
+        self.assertEqual(
+            self._search("restaurantes"), ["Restaurante Lagoa", "Quiosque Maricá"]
+        )
+
+        self.places["Quiosque Maricá"].categories.set([self.beaches])
+        self.assertEqual(self._search("restaurantes"), ["Restaurante Lagoa"])
+
+        self.beaches.name = "Balneários"
+        self.beaches.save()
+        self.assertCountEqual(
+            self._search("balnearios"), ["Praia de Itaipuaçu", "Quiosque Maricá"]
+        )
+
+        self.beaches.delete()
+        self.assertEqual(self._search("balnearios"), [])
+
+    def test_deleted_place_leaves_the_index(self):
+        """Test that deleting a place removes it from the results"""
+        self.places["Restaurante Lagoa"].delete()
+        self.assertEqual(self._search("lagoa"), [])
+
+    def test_rebuild_search_index_command(self):
+        """Test that the command indexes places created without signals"""
+        Place.objects.bulk_create(
+            [
+                Place(
+                    name="Praia Secreta",
+                    description="Sem sinais",
+                    address="Test address",
+                    created_by=self.creator,
+                    is_approved=True,
+                )
+            ]
+        )
+        self.assertEqual(self._search("secreta"), [])
+
+        out = StringIO()
+        call_command("rebuild_search_index", "--model", "explore.place", stdout=out)
+        self.assertIn("explore.place: 4 documentos indexados", out.getvalue())
+        self.assertEqual(self._search("secreta"), ["Praia Secreta"])
+
+    def test_failed_rebuild_keeps_previous_index(self):
+        """Test that the index is never left cleared by an interrupted rebuild"""
+        with mock.patch.object(get_backend(), "index", side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                call_command(
+                    "rebuild_search_index",
+                    "--model",
+                    "explore.place",
+                    stdout=StringIO(),
+                )
+        self.assertEqual(self._search("lagoa"), ["Restaurante Lagoa"])
+
+    def test_index_places_uses_fixed_queries(self):
+        """Test that reindexing does not query per place"""
+        ids = [place.pk for place in self.places.values()]
+        # Categorias, lugares, exclusão e inserção dos termos
+        with self.assertNumQueries(4):
+            index_places(ids)
+
+
+@skipUnless(connection.vendor == "postgresql", "Requires PostgreSQL")
+@override_settings(SEARCH_BACKEND="postgres")
+class PostgresSearchTests(PlaceSearchTests):
+    """Run the search suite against the PostgreSQL tsvector backend"""
+
+
+@override_settings(SEARCH_BACKEND="terms")
+class TermIndexSearchTests(PlaceSearchTests):
+    """Run the search suite against the portable term index (PlaceSearchTerm)"""
+
+    def test_terms_are_weighted_by_field(self):
+        """Test that each term stores the sum of its field weights"""
+        place = self.places["Praia de Itaipuaçu"]
+        weights = dict(place.search_terms.values_list("term", "weight"))
+        # "praia" no nome (4) e "praias" na categoria (2) têm o mesmo radical
+        self.assertEqual(weights[analyze("praia")[0]], 6)
+        self.assertEqual(weights[analyze("areia")[0]], 1)
+
+
+class SearchBackendTests(TestCase):
+    """Test backend selection and the icontains reference backend"""
+
+    def setUp(self):
+        self.creator = User.objects.create_user(username="creator", password="pass")
+        self.place = Place.objects.create(
+            name="Praia de Maricá",
+            description="Areia branca",
+            address="Test address",
+            created_by=self.creator,
+            is_approved=True,
+        )
+
+    def test_auto_uses_native_backend(self):
+        """Test that "auto" picks FTS5 on SQLite builds that have it"""
+        expected = "fts5" if sqlite_has_fts5() else "terms"
+        self.assertEqual(get_backend("auto").name, expected)
+
+    def test_unavailable_backend_is_rejected(self):
+        """Test that a backend the database lacks raises ImproperlyConfigured"""
+        with self.assertRaises(ImproperlyConfigured):
+            get_backend("postgres")
+        with self.assertRaises(ImproperlyConfigured):
+            get_backend("unknown")
+
+    def test_icontains_backend_matches_substrings(self):
+        """Test the unindexed reference path used by the benchmark"""
+        places = Place.objects.all()
+        self.assertEqual(
+            list(search(places, "de Mar", backend="icontains")), [self.place]
+        )
+        # Sem análise: acentos e plurais não são normalizados
+        self.assertEqual(list(search(places, "praias", backend="icontains")), [])
+
+    @override_settings(SEARCH_BACKEND="icontains")
+    def test_explore_view_with_icontains_backend(self):
+        """Test that explore works with the configured backend"""
+        response = Client().get(reverse("explore:explore"), {"q": "branca"})
+        self.assertEqual(list(response.context["all_places"]), [self.place])
+
+    def test_every_backend_ranks_the_same_places(self):
+        """Test that indexed backends return the same places"""
+        backends = [
+            name
+            for name in ("terms", "fts5", "postgres")
+            if SEARCH_BACKENDS[name].is_available()
+        ]
+        for name in backends:
+            get_backend(name).index(PLACE_DOCUMENT, [self.place.pk])
+            with self.subTest(backend=name):
+                self.assertEqual(
+                    list(search(Place.objects.all(), "marica are", backend=name)),
+                    [self.place],
+                )
+
+    def test_auto_native_backend_skips_term_index(self):
+        """Test that "auto" only maintains the native index when there is one"""
+        if get_backend("auto").name == "terms":
+            self.skipTest("No native search index on this database")
+        self.assertFalse(PlaceSearchTerm.objects.exists())
+
+    def test_postgres_query(self):
+        """Test the tsquery and ts_rank weights built by the postgres backend"""
+        results = PostgresBackend().search(
+            PLACE_DOCUMENT, Place.objects.all(), "praias de marica"
+        )
+        sql, params = results.query.sql_with_params()
+        self.assertIn("to_tsquery('simple', %s)", sql)
+        self.assertIn("prai & maric:*", params)
+        # Pesos {D, C, B, A}: descrição, categorias e nome relativos ao nome
+        self.assertIn("{0.0, 0.25, 0.5, 1.0}", params)
+
+
+class PlaceCardProjectionTests(TestCase):
+    """Test that card listings and the map API skip the full description"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(
+            username="admin", password="pass", is_staff=True
+        )
+        self.category = Category.objects.create(name="Praias", slug="praias")
+        self.place = Place.objects.create(
+            name="Praia",
+            description="Areia branca " * 40,
+            address="Test address",
+            latitude=-22.9,
+            longitude=-42.8,
+            created_by=self.admin,
+            is_approved=True,
+        )
+        self.place.categories.add(self.category)
+        Favorite.objects.create(user=self.admin, place=self.place)
+        self.client = Client()
+        self.client.login(username="admin", password="pass")
+
+    def _selects_description(self, url, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return any('"explore_place"."description"' in q["sql"] for q in queries)
+
+    def test_card_pages_defer_description(self):
+        """Test explore, category, landing, backlog and favorites pages"""
+        for url in (
+            reverse("explore:explore"),
+            reverse("explore:category_detail", args=[self.category.slug]),
+            reverse("core:landing"),
+            reverse("explore:backlog"),
+            reverse("explore:favorites"),
+        ):
+            self.assertFalse(self._selects_description(url), url)
+
+    def test_favorite_card_shows_excerpt(self):
+        """Test that favorite cards render the stored excerpt"""
+        response = self.client.get(reverse("explore:favorites"))
+        self.assertContains(response, self.place.excerpt)
+
+    def test_map_data_uses_stored_excerpt(self):
+        """Test that the map API reads the excerpt column"""
+        url = reverse("explore:map_data_api")
+        self.assertFalse(self._selects_description(url))
+        place_data = self.client.get(url).json()["places"][0]
+        self.assertEqual(place_data["description"], self.place.excerpt)
+        self.assertEqual(len(place_data["description"]), 103)
+
+
+class PlaceCardPayloadTests(TestCase):
+    """Test the pre-serialized per-place JSON cards (PlaceCard)"""
+
+    def setUp(self):
+        cache.clear()
+        caches["api"].clear()
+        self.user = User.objects.create_user(username="creator", password="pass")
+        self.category = Category.objects.create(name="Praias", slug="praias")
+        self.places = []
+        for index in range(3):
+            place = Place.objects.create(
+                name=f"Place {index}",
+                description="Description",
+                address="Test address",
+                latitude=-22.9 + index / 100,
+                longitude=-43.2,
+                created_by=self.user,
+                is_approved=True,
+            )
+            place.categories.add(self.category)
+            PlaceImage.objects.create(
+                place=place, image=f"places/{index}.jpg", is_primary=True
+            )
+            self.places.append(place)
+        self.place = self.places[0]
+        self.map_url = reverse("explore:map_data_api")
+        self.ids_url = reverse("explore:places_by_ids_api")
+
+    def _card(self, place=None):
+        return PlaceCard.objects.get(place=place or self.place)
+
+    def _detail(self, place=None):
+        return json.loads(self._card(place).detail_json)
+
+    def test_cards_match_serializers(self):
+        """Test that stored cards hold the encoded serializer output"""
+        places = Place.objects.filter(pk=self.place.pk)
+        encoder = DjangoJSONEncoder()
+        card = self._card()
+        self.assertEqual(
+            card.map_json,
+            encoder.encode(serialize_places(places, MAP_PLACE_FIELDS)[0]),
+        )
+        self.assertEqual(
+            card.detail_json,
+            encoder.encode(serialize_places(places, PLACE_DETAIL_FIELDS)[0]),
+        )
+
+    def test_map_data_bytes_match_serialized_response(self):
+        """Test that concatenated cards produce the same bytes as before"""
+        version = PlaceChange.current_version()
+        places = Place.objects.order_by("-created_at", "-id")
+        places_data = serialize_places(places, MAP_PLACE_FIELDS)
+        expected = json.dumps(
+            {"places": places_data, "count": 3, "version": version},
+            cls=DjangoJSONEncoder,
+        ).encode()
+
+        self.assertEqual(self.client.get(self.map_url).content, expected)
+        self.assertEqual(
+            self.client.get(self.map_url, {"limit": "10"}).content, expected
+        )
+
+    def test_map_data_reads_cards_in_one_query(self):
+        """Test that the default payload does not walk relations"""
+        # Versão atual + lugares com os cartões
+        with self.assertNumQueries(2):
+            self.client.get(self.map_url, {"limit": "10"})
+
+    def test_card_follows_images_reviews_and_categories(self):
+        """Test that related changes regenerate the card"""
+        PlaceImage.objects.filter(place=self.place).delete()
+        self.assertIsNone(self._detail()["image_url"])
+
+        PlaceReview.objects.create(
+            place=self.place, user=self.user, rating=5, comment="Ótimo"
+        )
+        self.assertEqual(self._detail()["rating"], 5.0)
+        self.assertEqual(self._detail()["review_count"], 1)
+
+        self.category.name = "Praias e Lagoas"
+        self.category.save()
+        self.assertEqual(self._detail()["categories"][0]["name"], "Praias e Lagoas")
+        self.assertIn("Praias e Lagoas", self._card(self.places[1]).map_json)
+
+        self.category.places.clear()
+        self.assertEqual(self._detail(self.places[2])["categories"], [])
+
+    def test_card_follows_category_deletion(self):
+        """Test that deleting a category removes it from the cards"""
+        self.category.delete()
+        self.assertEqual(self._detail()["categories"], [])
+
+    def test_place_deletion_removes_card(self):
+        """Test that deleting a place with reviews drops its card"""
+        PlaceReview.objects.create(
+            place=self.place, user=self.user, rating=4, comment="Bom"
+        )
+        self.place.delete()
+        self.assertFalse(PlaceCard.objects.filter(place_id=self.place.pk).exists())
+
+    def test_missing_cards_are_generated_on_read(self):
+        """Test that places without cards (bulk writes) are filled lazily"""
+        PlaceCard.objects.all().delete()
+        data = self.client.get(self.map_url, {"limit": "10"}).json()
+        self.assertEqual(data["count"], 3)
+        self.assertEqual(PlaceCard.objects.count(), 3)
+
+    def test_place_without_coordinates_has_empty_map_card(self):
+        """Test that places off the map only get the detail payload"""
+        place = Place.objects.create(
+            name="Sem mapa", description="D", address="A", created_by=self.user
+        )
+        self.assertEqual(build_place_cards([place.pk])[place.pk].map_json, "")
+        self.assertEqual(self._detail(place)["name"], "Sem mapa")
+
+    def test_rebuild_place_cards_command(self):
+        """Test that the rebuild command regenerates every card"""
+        PlaceCard.objects.all().delete()
+        out = StringIO()
+        call_command("rebuild_place_cards", stdout=out)
+        self.assertIn("3 lugares", out.getvalue())
+        self.assertEqual(PlaceCard.objects.count(), 3)
+
+
+class SuggestAPITests(TestCase):
+    """Test suite for the typeahead suggestions endpoint"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.url = reverse("explore:suggest_api")
+        self.user = User.objects.create_user(username="creator", password="pass")
+        self.beaches = Category.objects.create(name="Praias", slug="praias")
+        self.place = Place.objects.create(
+            name="Praia de Itaipuaçu",
+            description="D",
+            address="A",
+            created_by=self.user,
+            is_approved=True,
+        )
+        self.other = Place.objects.create(
+            name="Quiosque Maricá",
+            description="D",
+            address="A",
+            created_by=self.user,
+            is_approved=True,
+        )
+        self.news = News.objects.create(
+            title="Festival na praia",
+            content="C",
+            author=self.user,
+            category=NewsCategory.objects.get_or_create(name=NewsCategory.NEWS)[0],
+            status=News.PUBLISHED,
+        )
+
+    def _labels(self, query, **params):
+        response = self.client.get(self.url, {"q": query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [item["label"] for item in response.json()["suggestions"]]
+
+    def test_prefix_match_is_accent_insensitive(self):
+        """Test that prefixes match without accents or case"""
+        self.assertEqual(self._labels("MARIC"), ["Quiosque Maricá"])
+        self.assertEqual(self._labels("itaipuac"), ["Praia de Itaipuaçu"])
+        self.assertEqual(self._labels("xyz"), [])
+        self.assertEqual(self._labels(""), [])
+
+    def test_ranking_and_payload(self):
+        """Test the ranking (name prefix, then kind) and the response fields"""
+        data = self.client.get(self.url, {"q": "pra"}).json()
+        self.assertEqual(
+            [(item["type"], item["label"]) for item in data["suggestions"]],
+            [
+                ("category", "Praias"),
+                ("place", "Praia de Itaipuaçu"),
+                ("news", "Festival na praia"),
+            ],
+        )
+        self.assertEqual(data["count"], 3)
+        self.assertEqual(data["query"], "pra")
+        place = data["suggestions"][1]
+        self.assertEqual(place["id"], self.place.pk)
+        self.assertEqual(place["url"], f"/explore/place/{self.place.pk}/")
+        self.assertEqual(
+            data["suggestions"][0]["url"],
+            reverse("explore:category_detail", args=["praias"]),
+        )
+
+    def test_every_word_must_match(self):
+        """Test that earlier query words must start some word of the name"""
+        self.assertEqual(self._labels("praia ita"), ["Praia de Itaipuaçu"])
+        self.assertEqual(self._labels("ita praia"), ["Praia de Itaipuaçu"])
+        self.assertEqual(self._labels("quiosque ita"), [])
+
+    def test_limit(self):
+        """Test the limit parameter and its validation"""
+        self.assertEqual(len(self._labels("pra", limit="1")), 1)
+        for limit in ("0", "abc", "1000"):
+            response = self.client.get(self.url, {"q": "pra", "limit": limit})
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json()["error"], "Formato de limit inválido")
+
+    def test_hidden_items_are_not_suggested(self):
+        """Test that unapproved places, inactive categories and drafts stay out"""
+        Place.objects.create(
+            name="Praia Secreta", description="D", address="A", created_by=self.user
+        )
+        Category.objects.create(name="Praças", slug="pracas", is_active=False)
+        News.objects.create(
+            title="Praia em rascunho",
+            content="C",
+            author=self.user,
+            category=self.news.category,
+        )
+        self.assertEqual(
+            self._labels("pra"),
+            ["Praias", "Praia de Itaipuaçu", "Festival na praia"],
+        )
+
+    def test_scheduled_news_appears_after_publication(self):
+        """Test that news with a future publish date is hidden until then"""
+        News.objects.filter(pk=self.news.pk).update(
+            publish_date=timezone.now() + timedelta(days=1)
+        )
+        cache.clear()
+        self.assertNotIn("Festival na praia", self._labels("festival"))
+
+    def test_index_is_served_from_memory(self):
+        """Test that a built index answers without database queries"""
+        self._labels("pra")
+        with self.assertNumQueries(0):
+            self.assertEqual(self._labels("quio"), ["Quiosque Maricá"])
+
+    def test_signals_update_index_in_place(self):
+        """Test that saves and deletes update the built index incrementally"""
+        self._labels("pra")
+        index = suggest_index()
+
+        self.other.name = "Quiosque do Sol"
+        self.other.save()
+        self.assertEqual(self._labels("sol"), ["Quiosque do Sol"])
+        self.assertEqual(self._labels("marica"), [])
+
+        Category.objects.create(name="Restaurantes", slug="restaurantes")
+        self.assertEqual(self._labels("rest"), ["Restaurantes"])
+
+        self.news.title = "Show na lagoa"
+        self.news.save()
+        self.assertEqual(self._labels("show"), ["Show na lagoa"])
+
+        self.place.is_active = False
+        self.place.save()
+        self.assertNotIn("Praia de Itaipuaçu", self._labels("praia"))
+
+        self.beaches.delete()
+        self.news.delete()
+        self.assertEqual(self._labels("pra"), [])
+        self.assertIs(suggest_index(), index)
+
+    def test_index_rebuilds_when_version_changes(self):
+        """Test that other processes' changes (new version) trigger a rebuild"""
+        self._labels("pra")
+        index = suggest_index()
+        Place.objects.filter(pk=self.other.pk).update(name="Quiosque Lua")
+        self.assertEqual(self._labels("lua"), [])
+        cache.clear()
+        self.assertEqual(self._labels("lua"), ["Quiosque Lua"])
+        self.assertIsNot(suggest_index(), index)
+
+
+class FuzzySearchTests(TestCase):
+    """Test suite for the trigram fallback of the explore search"""
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse("explore:explore")
+        self.user = User.objects.create_user(username="creator", password="pass")
+        self.food = Category.objects.create(name="Restaurantes", slug="restaurantes")
+        self.places = {}
+        for name in ("Praia de Araçatiba", "Praia de Itaipuaçu", "Lagoa de Araruama"):
+            self.places[name] = Place.objects.create(
+                name=name,
+                description="D",
+                address="A",
+                created_by=self.user,
+                is_approved=True,
+            )
+        self.places["Praia de Itaipuaçu"].categories.add(self.food)
+
+    def _names(self, query):
+        response = Client().get(self.url, {"q": query})
+        self.assertEqual(response.status_code, 200)
+        return [place.name for place in response.context["all_places"]], response
+
+    def test_similarity(self):
+        """Test the trigram similarity between words"""
+        self.assertEqual(similarity("aracatiba", "aracatiba"), 1.0)
+        self.assertGreater(similarity("aracatyba", "aracatiba"), 0.4)
+        self.assertEqual(similarity("praia", "lagoa"), 0.0)
+
+    def test_misspelled_name_is_found(self):
+        """Test that a misspelled name falls back to similar names"""
+        names, response = self._names("aracatyba")
+        self.assertEqual(names, ["Praia de Araçatiba"])
+        self.assertTrue(response.context["approximate_results"])
+        self.assertContains(response, "nomes parecidos")
+
+    def test_misspelled_category_finds_its_places(self):
+        """Test that a misspelled category name finds the places in it"""
+        self.assertEqual(self._names("restaurnte")[0], ["Praia de Itaipuaçu"])
+
+    def test_exact_results_come_first(self):
+        """Test that exact matches rank above the approximate ones"""
+        names, response = self._names("praia aracatyba")
+        self.assertEqual(names[0], "Praia de Araçatiba")
+        names, response = self._names("praia aracatiba")
+        self.assertEqual(names, ["Praia de Araçatiba", "Praia de Itaipuaçu"])
+        self.assertTrue(response.context["approximate_results"])
+
+    @override_settings(FUZZY_SEARCH_MIN_RESULTS=1)
+    def test_no_fallback_with_enough_exact_results(self):
+        """Test that the fallback only runs below the minimum result count"""
+        names, response = self._names("itaipuacu")
+        self.assertEqual(names, ["Praia de Itaipuaçu"])
+        self.assertFalse(response.context["approximate_results"])
+
+    @override_settings(FUZZY_SEARCH_MIN_RESULTS=0)
+    def test_fallback_can_be_disabled(self):
+        """Test that FUZZY_SEARCH_MIN_RESULTS=0 disables the fallback"""
+        self.assertEqual(self._names("aracatyba")[0], [])
+
+    def test_hidden_places_are_not_added(self):
+        """Test that unapproved places are not suggested by similarity"""
+        Place.objects.create(
+            name="Pousada Araçatiba", description="D", address="A", created_by=self.user
+        )
+        self.assertEqual(self._names("aracatyba")[0], ["Praia de Araçatiba"])
+
+    def test_renamed_place_is_found(self):
+        """Test that the trigram index follows renamed places"""
+        self.assertEqual(fuzzy_place_scores("jacone"), {})
+        place = self.places["Lagoa de Araruama"]
+        place.name = "Praia de Jaconé"
+        place.save()
+        self.assertEqual(list(fuzzy_place_scores("jacne")), [place.pk])
+
+    def test_index_skips_numbers_and_short_words(self):
+        """Test that only alphabetic words with 3+ letters are indexed"""
+        index = TrigramIndex([(("place", 1), {"praia", "de", "12", "sol"})])
+        self.assertCountEqual(index.items, ["praia", "sol"])
+        self.assertEqual(index.postings["  p"], ["praia"])
+        self.assertEqual(index.similar_words("praiaa"), {"praia": 0.625})
+
+
+class SearchResultCacheTests(TestCase):
+    """Test suite for the explore search result cache and the query log"""
+
+    def setUp(self):
+        cache.clear()
+        caches["search"].clear()
+        self.url = reverse("explore:explore")
+        self.user = User.objects.create_user(username="creator", password="pass")
+        self.beaches = Category.objects.create(name="Praias", slug="praias")
+        self.places = {}
+        for name in ("Praia de Araçatiba", "Praia de Itaipuaçu", "Lagoa de Araruama"):
+            self.places[name] = Place.objects.create(
+                name=name,
+                description="D",
+                address="A",
+                created_by=self.user,
+                is_approved=True,
+            )
+        self.places["Praia de Araçatiba"].categories.add(self.beaches)
+
+    def _names(self, query, client=None, **params):
+        response = (client or Client()).get(self.url, {"q": query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [place.name for place in response.context["all_places"]]
+
+    def _log(self, query):
+        log = SearchQueryLog.objects.get(query=query)
+        return log.hits, log.misses
+
+    def test_normalize_query(self):
+        """Test case, accent and whitespace folding of the cache key"""
+        self.assertEqual(normalize_query("  Praia   de\tMARICÁ "), "praia de marica")
+
+    def test_equivalent_queries_share_cached_result(self):
+        """Test that a normalized repeat is answered from the cache"""
+        first = self._names("praia")
+        self.assertEqual(len(first), 2)
+        self.assertEqual(self._names("  PRÁIA "), first)
+        self.assertEqual(self._log("praia"), (1, 1))
+
+    def test_sort_is_part_of_key(self):
+        """Test that each sort has its own cached order"""
+        self.assertEqual(
+            self._names("praia", sort="name"),
+            ["Praia de Araçatiba", "Praia de Itaipuaçu"],
+        )
+        self.assertEqual(
+            self._names("praia", sort="-name"),
+            ["Praia de Itaipuaçu", "Praia de Araçatiba"],
+        )
+        self.assertEqual(
+            self._names("praia", sort="-name"),
+            ["Praia de Itaipuaçu", "Praia de Araçatiba"],
+        )
+        self.assertEqual(self._log("praia"), (1, 2))
+
+    def test_catalogue_changes_invalidate_results(self):
+        """Test that new places and favorites bump the catalogue version"""
+        self._names("praia", sort="favorites")
+        Place.objects.create(
+            name="Praia do Sol",
+            description="D",
+            address="A",
+            created_by=self.user,
+            is_approved=True,
+        )
+        self.assertIn("Praia do Sol", self._names("praia", sort="favorites"))
+        Favorite.objects.create(user=self.user, place=self.places["Praia de Araçatiba"])
+        self.assertEqual(
+            self._names("praia", sort="favorites")[0], "Praia de Araçatiba"
+        )
+        self.assertEqual(self._log("praia"), (0, 3))
+
+    def test_category_filter_and_facets_on_cached_result(self):
+        """Test that category filters and facets reuse the cached result"""
+        self._names("praia")
+        response = Client().get(self.url, {"q": "praia", "category": "praias"})
+        self.assertEqual(
+            [place.name for place in response.context["all_places"]],
+            ["Praia de Araçatiba"],
+        )
+        self.assertEqual(response.context["facets"], [(self.beaches, 1)])
+        self.assertEqual(self._log("praia"), (1, 1))
+
+    def test_users_with_pending_places_bypass_cache(self):
+        """Test that a user's own pending places never leak into the cache"""
+        Place.objects.create(
+            name="Praia Secreta", description="D", address="A", created_by=self.user
+        )
+        client = Client()
+        client.login(username="creator", password="pass")
+        self.assertIn("Praia Secreta", self._names("praia", client=client))
+        self.assertNotIn("Praia Secreta", self._names("praia"))
+        self.assertNotIn("Praia Secreta", self._names("praia"))
+        self.assertEqual(self._log("praia"), (1, 2))
+
+    @override_settings(SEARCH_CACHE_MAX_RESULTS=1)
+    def test_large_results_are_not_cached(self):
+        """Test that results above SEARCH_CACHE_MAX_RESULTS are recomputed"""
+        self._names("praia")
+        self._names("praia")
+        self.assertEqual(self._log("praia"), (0, 2))
+
+    def test_warm_command_fills_popular_queries(self):
+        """Test that the warm command caches the most searched queries"""
+        SearchQueryLog.objects.create(query="lagoa", misses=5)
+        SearchQueryLog.objects.create(query="praia", misses=1)
+        out = StringIO()
+        call_command("warm_search_cache", "--limit", "1", stdout=out)
+        self.assertIn("1 buscas", out.getvalue())
+        self.assertEqual(self._names("lagoa"), ["Lagoa de Araruama"])
+        self.assertEqual(self._log("lagoa"), (1, 5))
+        self._names("praia")
+        self.assertEqual(self._log("praia"), (0, 2))
+
+
+REDIS_CACHES = {
+    alias: {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": "redis://localhost:6379/0",
+        "KEY_PREFIX": alias,
+    }
+    for alias in ["default", "search"]
+}
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    """Test the deploy check for a cache shared between web processes"""
+
+    def test_process_local_cache_warns(self):
+        """Test that the in-memory default cache is reported"""
+        ids = [message.id for message in check_shared_cache(None)]
+        self.assertEqual(ids, ["explore.W001"])
+
+    @override_settings(CACHES=REDIS_CACHES)
+    def test_shared_cache_passes(self):
+        """Test that a shared backend evicting every key passes the check"""
+        with mock.patch(
+            "apps.explore.checks.redis_maxmemory_policy", return_value="allkeys-lru"
+        ) as policy:
+            self.assertEqual(check_shared_cache(None), [])
+        # Os dois aliases usam o mesmo servidor: consultado uma vez
+        policy.assert_called_once_with("default")
+
+    @override_settings(CACHES=REDIS_CACHES)
+    def test_redis_without_allkeys_eviction_warns(self):
+        """Test that keys without expiry must be evictable by Redis"""
+        for value in ["noeviction", "volatile-lru", None]:
+            with mock.patch(
+                "apps.explore.checks.redis_maxmemory_policy", return_value=value
+            ):
+                ids = [message.id for message in check_shared_cache(None)]
+            self.assertEqual(ids, ["explore.W002"])
@@ -8,7 +8,15 @@ urlpatterns = [
     path("", views.explore_view, name="explore"),
     # API endpoints
     path("api/map-data/", api.map_data_api, name="map_data_api"),
+    path("api/map-clusters/", api.map_clusters_api, name="map_clusters_api"),
+    path(
+        "api/tiles/<int:zoom>/<int:x>/<int:y>.json",
+        api.map_tile_api,
+        name="map_tile_api",
+    ),
+    path("api/nearby/", api.nearby_api, name="nearby_api"),
     path("api/places-by-ids/", api.places_by_ids_api, name="places_by_ids_api"),
+    path("api/suggest/", api.suggest_api, name="suggest_api"),
     path("category/<slug:slug>/", views.category_detail_view, name="category_detail"),
     path("place/<int:pk>/", views.place_detail_view, name="place_detail"),
     path("place/create/", views.place_create_view, name="place_create"),
@@ -1,34 +1,87 @@
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Q, Value, When
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 
 from django_ratelimit.decorators import ratelimit
 
+from apps.core.search import search
+
+from .caching import get_search_results, set_search_results, with_place_counts
 from .forms import PlaceForm, PlaceImageFormSet, PlaceReviewForm
-from .models import Category, Favorite, Place, PlaceApproval, PlaceReview
+from .fuzzy import with_fuzzy_matches
+from .models import (
+    CARD_DEFERRED_FIELDS,
+    Category,
+    Favorite,
+    Place,
+    PlaceActivity,
+    PlaceApproval,
+    PlaceReview,
+    SearchQueryLog,
+)
+from .search import category_facets
+
+# Ordenações aceitas em ?sort= nas páginas de exploração e de categoria
+# "rating" e "favorites" usam as colunas indexadas de PlaceStats
+PLACE_SORTS = {
+    "-created_at": ("-created_at",),
+    "name": ("name",),
+    "-name": ("-name",),
+    "rating": (F("stats__bayesian_rating").desc(nulls_last=True), "-created_at"),
+    "favorites": (F("stats__favorites_count").desc(nulls_last=True), "-created_at"),
+}
+
+# Ordenação das buscas por relevância (padrão quando há consulta)
+SEARCH_ORDER = ("-relevance", "-created_at")
+
+
+def search_places(places, query):
+    """
+    Busca do explore: backend SEARCH_BACKEND (sem acentos e com radicais,
+    anotando a relevância), completada pelos lugares de nome parecido quando
+    há poucos resultados; retorna (queryset, se inclui resultados aproximados)
+    """
+    return with_fuzzy_matches(places, search(places, query), query)
+
+
+def _in_order(place_ids):
+    """Lugares dos ids, anotados com "relevance" decrescente na ordem dada"""
+    return Place.objects.filter(id__in=place_ids).annotate(
+        relevance=Case(
+            *(
+                When(id=place_id, then=Value(len(place_ids) - position))
+                for position, place_id in enumerate(place_ids)
+            ),
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+    )
 
 
 def explore_view(request):
     """Página de exploração com categorias e todos os lugares com pesquisa"""
 
-    # Obter todas as categorias ativas com contagens de lugares
-    categories = Category.objects.filter(is_active=True).order_by("display_order")
+    # Obter todas as categorias ativas com contagens de lugares (em cache)
+    categories = with_place_counts(
+        Category.objects.filter(is_active=True).order_by("display_order")
+    )
 
     # Obter consulta de pesquisa
     search_query = request.GET.get("q", "").strip()
 
-    # Obter parâmetro de ordenação
-    sort_by = request.GET.get("sort", "-created_at")
-    valid_sorts = {
-        "-created_at": "-created_at",
-        "name": "name",
-        "-name": "-name",
-    }
-    sort_order = valid_sorts.get(sort_by, "-created_at")
+    # Obter parâmetro de ordenação (buscas são ordenadas por relevância)
+    default_sort = "relevance" if search_query else "-created_at"
+    sort_by = request.GET.get("sort", default_sort)
+    if sort_by == "relevance" and search_query:
+        sort_key, sort_order = "relevance", SEARCH_ORDER
+    else:
+        sort_key = sort_by if sort_by in PLACE_SORTS else "-created_at"
+        sort_order = PLACE_SORTS[sort_key]
 
     # Base queryset: all approved and active places
     base_query = Q(is_approved=True, is_active=True)
@@ -42,22 +95,70 @@ def explore_view(request):
     else:
         all_places = Place.objects.filter(base_query)
 
-    # Aplicar filtro de pesquisa se houver consulta
+    # Aplicar filtro de pesquisa se houver consulta; o resultado público (ids
+    # na ordem exibida) vem do cache quando a consulta normalizada já foi
+    # buscada com a mesma ordenação na versão atual do catálogo. Quem tem
+    # lugares pendentes próprios vê um resultado diferente e busca no banco
+    approximate_results = False
+    cacheable = False
+    cached_ids = None
     if search_query:
-        all_places = all_places.filter(
-            Q(name__icontains=search_query)
-            | Q(description__icontains=search_query)
-            | Q(categories__name__icontains=search_query)
-        ).distinct()
-
-    all_places = all_places.prefetch_related("images", "categories").order_by(
-        sort_order
+        cacheable = not (
+            request.user.is_authenticated
+            and Place.objects.filter(
+                created_by=request.user, is_approved=False, is_active=True
+            ).exists()
+        )
+        cached = get_search_results(search_query, sort_key) if cacheable else None
+        SearchQueryLog.record(search_query, hit=cached is not None)
+        if cached is not None:
+            cached_ids, approximate_results = cached
+            all_places = _in_order(cached_ids)
+            sort_order = ("-relevance",)
+        else:
+            all_places, approximate_results = search_places(all_places, search_query)
+    search_results = all_places
+
+    # Restringir a uma categoria (?category=<slug>)
+    selected_category = request.GET.get("category", "").strip()
+    if selected_category:
+        all_places = all_places.filter(categories__slug=selected_category)
+
+    all_places = (
+        all_places.defer(*CARD_DEFERRED_FIELDS)
+        .prefetch_related("images", "categories")
+        .order_by(*sort_order)
     )
 
+    # Contagem de resultados da busca por categoria (antes de restringir)
+    facets = []
+    if search_query:
+        if cached_ids is not None:
+            result_ids = cached_ids
+        elif selected_category:
+            result_ids = list(
+                search_results.order_by(*sort_order).values_list("id", flat=True)
+            )
+        else:
+            # Os IDs saem do próprio resultado exibido, sem outra consulta
+            result_ids = [place.pk for place in all_places]
+        if cacheable and cached_ids is None:
+            set_search_results(search_query, sort_key, result_ids, approximate_results)
+        counts = category_facets(result_ids)
+        facets = [
+            (category, counts[category.pk])
+            for category in categories
+            if counts.get(category.pk)
+        ]
+
     context = {
         "categories": categories,
         "all_places": all_places,
         "current_sort": sort_by,
+        "search_query": search_query,
+        "approximate_results": approximate_results,
+        "facets": facets,
+        "selected_category": selected_category,
     }
     return render(request, "explore/explore.html", context)
 
@@ -70,22 +171,20 @@ def category_detail_view(request, slug):
 
     # Obter parâmetro de ordenação
     sort_by = request.GET.get("sort", "-created_at")
-    valid_sorts = {
-        "-created_at": "-created_at",
-        "name": "name",
-        "-name": "-name",
-    }
-    sort_order = valid_sorts.get(sort_by, "-created_at")
+    sort_order = PLACE_SORTS.get(sort_by, PLACE_SORTS["-created_at"])
 
     # Obter todos os lugares aprovados e ativos nesta categoria
     places = (
         Place.objects.filter(categories=category, is_approved=True, is_active=True)
+        .defer(*CARD_DEFERRED_FIELDS)
         .prefetch_related("images", "categories", "created_by")
-        .order_by(sort_order)
+        .order_by(*sort_order)
     )
 
-    # Obter todas as categorias para navegação
-    all_categories = Category.objects.filter(is_active=True).order_by("display_order")
+    # Obter todas as categorias para navegação, com contagens de lugares (em cache)
+    all_categories = with_place_counts(
+        Category.objects.filter(is_active=True).order_by("display_order")
+    )
 
     context = {
         "category": category,
@@ -116,6 +215,11 @@ def place_detail_view(request, pk):
         # Usuários regulares só podem ver lugares aprovados e ativos
         place = get_object_or_404(Place, pk=pk, is_approved=True, is_active=True)
 
+    # Visualização conta para a pontuação de tendência (apenas lugares
+    # visíveis: dono e moderadores vendo um lugar pendente não contam)
+    if place.is_approved and place.is_active:
+        PlaceActivity.record(place.pk, views=1)
+
     # Obter lugares relacionados das mesmas categorias
     related_places = (
         Place.objects.filter(
@@ -123,6 +227,7 @@ def place_detail_view(request, pk):
         )
         .exclude(pk=place.pk)
         .distinct()
+        .defer(*CARD_DEFERRED_FIELDS)
         .prefetch_related("images", "categories")[:3]
     )
 
@@ -146,7 +251,18 @@ def place_detail_view(request, pk):
         is_favorited = Favorite.objects.filter(user=request.user, place=place).exists()
 
     # Obter contagem de favoritos
-    favorites_count = place.favorited_by.count()
+    favorites_count = place.favorites_count
+
+    # Distribuição das notas (de PlaceStats, sem percorrer as avaliações)
+    review_count = place.review_count
+    rating_breakdown = [
+        {
+            "stars": stars,
+            "count": count,
+            "percent": round(count * 100 / review_count) if review_count else 0,
+        }
+        for stars, count in sorted(place.rating_histogram.items(), reverse=True)
+    ]
 
     context = {
         "place": place,
@@ -156,6 +272,8 @@ def place_detail_view(request, pk):
         "user_review": user_review,
         "is_favorited": is_favorited,
         "favorites_count": favorites_count,
+        "review_count": review_count,
+        "rating_breakdown": rating_breakdown,
         "GOOGLE_MAPS_API_KEY": settings.GOOGLE_MAPS_API_KEY,
     }
     return render(request, "explore/place_detail.html", context)
@@ -412,8 +530,10 @@ def backlog_view(request):
     sort_by = request.GET.get("sort", "-created_at")
 
     # Começar com todos os lugares
-    places = Place.objects.select_related("created_by").prefetch_related(
-        "images", "categories"
+    places = (
+        Place.objects.select_related("created_by")
+        .defer(*CARD_DEFERRED_FIELDS)
+        .prefetch_related("images", "categories")
     )
 
     # Se estiver no modo de fila, mostrar apenas pendentes
@@ -488,7 +608,9 @@ def review_create_view(request, place_pk):
             review = form.save(commit=False)
             review.place = place
             review.user = request.user
-            review.save()
+            # Avaliação e agregados do lugar (PlaceStats) na mesma transação
+            with transaction.atomic():
+                review.save()
             messages.success(request, "Avaliação enviada com sucesso!")
             return redirect("explore:place_detail", pk=place.pk)
     else:
@@ -511,7 +633,9 @@ def review_edit_view(request, pk):
     if request.method == "POST":
         form = PlaceReviewForm(request.POST, instance=review)
         if form.is_valid():
-            form.save()
+            # Avaliação e agregados do lugar (PlaceStats) na mesma transação
+            with transaction.atomic():
+                form.save()
             messages.success(request, "Avaliação atualizada com sucesso!")
             return redirect("explore:place_detail", pk=review.place.pk)
     else:
@@ -533,7 +657,9 @@ def review_delete_view(request, pk):
 
     place_pk = review.place.pk
     if request.method == "POST":
-        review.delete()
+        # Avaliação e agregados do lugar (PlaceStats) na mesma transação
+        with transaction.atomic():
+            review.delete()
         messages.success(request, "Avaliação excluída com sucesso!")
         return redirect("explore:place_detail", pk=place_pk)
 
@@ -572,7 +698,7 @@ def toggle_favorite_view(request, pk):
             message = "Lugar adicionado aos favoritos"
 
         # Obter contagem total de favoritos para este lugar
-        favorites_count = place.favorited_by.count()
+        favorites_count = place.favorites_count
 
         return JsonResponse(
             {
@@ -604,6 +730,7 @@ def favorites_list_view(request):
         favorites = (
             Favorite.objects.filter(user=request.user)
             .select_related("place", "place__created_by")
+            .defer(*(f"place__{field}" for field in CARD_DEFERRED_FIELDS))
             .prefetch_related("place__images", "place__categories")
             .order_by("-created_at")
         )
@@ -619,6 +746,8 @@ def favorites_list_view(request):
             "favorites": [],
             "favorites_count": 0,
             "is_authenticated": False,
+            # A página pede os lugares em lotes do tamanho aceito pela API
+            "places_by_ids_max": settings.PLACES_BY_IDS_MAX,
         }
 
     return render(request, "explore/favorites.html", context)
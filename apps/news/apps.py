@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class NewsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.news"
+
+    def ready(self):
+        from . import search, signals  # noqa: F401
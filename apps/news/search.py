@@ -0,0 +1,29 @@
+"""
+Documento de busca das notícias (apps.core.search): título, local do evento
+e conteúdo, com pesos por campo
+"""
+
+from apps.core.search import register_document
+
+from .models import News
+
+# Peso de cada campo na relevância
+SEARCH_FIELD_WEIGHTS = {"title": 4, "event_location": 2, "content": 1}
+
+
+def news_texts(news_ids):
+    """Texto de cada campo buscável: {id da notícia: {campo: texto}}"""
+    return {
+        news_id: {"title": title, "event_location": location, "content": content}
+        for news_id, title, location, content in News.objects.filter(
+            id__in=news_ids
+        ).values_list("id", "title", "event_location", "content")
+    }
+
+
+NEWS_DOCUMENT = register_document(
+    News,
+    weights=SEARCH_FIELD_WEIGHTS,
+    texts=news_texts,
+    lookups=("title", "event_location", "content"),
+)
@@ -0,0 +1,29 @@
+"""
+Sinais do aplicativo news
+Mantém o índice do backend de busca (apps.core.search) e o índice de
+sugestões da caixa de busca (apps.explore.suggest) sincronizados com as
+notícias criadas, alteradas e excluídas
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.core.search import index_documents, remove_documents
+from apps.explore.suggest import update_suggestions
+
+from .models import News
+
+
+@receiver(post_save, sender=News)
+def news_saved(sender, instance, update_fields=None, **kwargs):
+    # Incrementar visualizações não altera o texto indexado
+    if update_fields and set(update_fields) <= {"view_count"}:
+        return
+    index_documents(News, [instance.pk])
+    update_suggestions("news", [instance.pk])
+
+
+@receiver(post_delete, sender=News)
+def news_deleted(sender, instance, **kwargs):
+    remove_documents(News, [instance.pk])
+    update_suggestions("news", [instance.pk])
@@ -1,4 +1,7 @@
-from django.test import Client, TestCase
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
 
@@ -289,3 +292,73 @@ class NewsFeaturedTests(TestCase):
         # Should contain our featured news
         self.assertEqual(len(featured_items), 1)
         self.assertEqual(featured_items[0].title, "Featured News")
+
+
+class NewsSearchTests(TestCase):
+    """Test suite for the news search (?q=)"""
+
+    def setUp(self):
+        """Set up test data"""
+        self.client = Client()
+        self.url = reverse("news:news_list")
+        self.user = User.objects.create_user(username="testauthor")
+        self.category, _ = NewsCategory.objects.get_or_create(name=NewsCategory.NEWS)
+        self.festival = self._create(
+            "Festival de Inverno em Maricá", "Shows gratuitos na orla"
+        )
+        self.beach = self._create("Praias limpas", "Mutirão no festival de verão")
+        self.draft = self._create("Festival secreto", "Rascunho", status=News.DRAFT)
+
+    def _create(self, title, content, status=News.PUBLISHED):
+        return News.objects.create(
+            title=title,
+            content=content,
+            author=self.user,
+            category=self.category,
+            publish_date=timezone.now(),
+            status=status,
+        )
+
+    def _titles(self, query, **params):
+        response = self.client.get(self.url, {"q": query, **params})
+        return [item.title for item in response.context["news_items"]]
+
+    def test_search_ignores_accents_and_plurals(self):
+        """Test that the search folds accents and stems words"""
+        self.assertEqual(self._titles("marica"), ["Festival de Inverno em Maricá"])
+        self.assertEqual(self._titles("praia limpa"), ["Praias limpas"])
+
+    def test_search_orders_by_relevance(self):
+        """Test that title matches come before content matches"""
+        response = self.client.get(self.url, {"q": "festival"})
+        self.assertEqual(response.context["current_sort"], "relevance")
+        self.assertEqual(
+            [item.title for item in response.context["news_items"]],
+            ["Festival de Inverno em Maricá", "Praias limpas"],
+        )
+
+    def test_search_keeps_published_filter(self):
+        """Test that drafts never appear in search results"""
+        self.assertNotIn("Festival secreto", self._titles("secreto"))
+
+    def test_search_follows_edits_and_deletions(self):
+        """Test that the index follows saved and deleted news"""
+        self.beach.title = "Praias de Itaipuaçu"
+        self.beach.save()
+        self.assertEqual(self._titles("itaipuacu"), ["Praias de Itaipuaçu"])
+
+        self.beach.delete()
+        self.assertEqual(self._titles("itaipuacu"), [])
+
+    def test_search_with_other_sort(self):
+        """Test that an explicit ?sort= still applies to search results"""
+        self.assertEqual(
+            len(self._titles("festival", sort="oldest")),
+            2,
+        )
+
+
+@skipUnless(connection.vendor == "postgresql", "Requires PostgreSQL")
+@override_settings(SEARCH_BACKEND="postgres")
+class PostgresNewsSearchTests(NewsSearchTests):
+    """Run the news search suite against the PostgreSQL tsvector backend"""
@@ -1,6 +1,8 @@
 from django.shortcuts import get_object_or_404, render
 from django.utils import timezone
 
+from apps.core.search import search
+
 from .models import News, NewsCategory
 
 
@@ -8,7 +10,9 @@ def news_list_view(request):
     """Exibir lista de todas as notícias e eventos publicados"""
     # Obter parâmetros de filtro
     category_filter = request.GET.get("category", "all")
-    sort_by = request.GET.get("sort", "newest")
+    search_query = request.GET.get("q", "").strip()
+    # Buscas são ordenadas por relevância
+    sort_by = request.GET.get("sort", "relevance" if search_query else "newest")
 
     # Consulta base - apenas itens publicados com publish_date <= agora
     news_items = News.objects.filter(
@@ -19,8 +23,14 @@ def news_list_view(request):
     if category_filter != "all":
         news_items = news_items.filter(category__name=category_filter)
 
+    # Buscar no título, local do evento e conteúdo (backend SEARCH_BACKEND)
+    if search_query:
+        news_items = search(news_items, search_query)
+
     # Ordenar
-    if sort_by == "oldest":
+    if sort_by == "relevance" and search_query:
+        news_items = news_items.order_by("-relevance", "-publish_date")
+    elif sort_by == "oldest":
         news_items = news_items.order_by("publish_date")
     elif sort_by == "popular":
         news_items = news_items.order_by("-view_count", "-publish_date")
@@ -43,6 +53,7 @@ def news_list_view(request):
         "categories": categories,
         "current_category": category_filter,
         "current_sort": sort_by,
+        "search_query": search_query,
         "upcoming_events": upcoming_events,
         "featured_items": featured_items,
     }
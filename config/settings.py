@@ -93,9 +93,46 @@ CACHES = {
     "default": {
         "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
         "LOCATION": "ratelimit-cache",
-    }
+    },
+    # Resultados da busca do explore, sem expiração: ao encher, saem os menos
+    # usados (LRU); as entradas de versões antigas do catálogo saem primeiro
+    "search": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "search-results",
+        "TIMEOUT": None,
+        "OPTIONS": {"MAX_ENTRIES": config("SEARCH_CACHE_SIZE", default=1000, cast=int)},
+    },
+    # Tiles do mapa e fragmentos de places-by-ids, com suas versões (cada
+    # alteração de lugar incrementa uma versão de tile por nível de zoom)
+    "api": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "explore-api",
+        "OPTIONS": {"MAX_ENTRIES": config("API_CACHE_SIZE", default=50000, cast=int)},
+    },
 }
 
+# Cache compartilhado entre os processos web (ex.: redis://localhost:6379/0)
+# As versões em cache do índice de sugestões, das facetas e do catálogo só
+# chegam aos demais processos com um backend compartilhado; sem REDIS_URL,
+# cada processo tem o próprio cache em memória (adequado a um único processo)
+REDIS_URL = config("REDIS_URL", default="")
+if REDIS_URL:
+    for alias, cache_settings in CACHES.items():
+        cache_settings.update(
+            {
+                "BACKEND": "django.core.cache.backends.redis.RedisCache",
+                "LOCATION": REDIS_URL,
+                "KEY_PREFIX": alias,
+                "OPTIONS": {},
+            }
+        )
+    # O Redis não tem o limite MAX_ENTRIES: os resultados da busca expiram, e o
+    # servidor precisa de maxmemory com a política allkeys-lru para despejar as
+    # demais chaves gravadas sem expiração (verificado em explore.W002)
+    CACHES["search"]["TIMEOUT"] = config(
+        "SEARCH_CACHE_TIMEOUT", default=86400, cast=int
+    )
+
 STATIC_URL = "static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
@@ -132,6 +169,64 @@ RATELIMIT_VIEW = "apps.explore.ratelimit_handlers.ratelimited_error"
 # Para produção com múltiplos processos, mude para Redis ou Memcached
 SILENCED_SYSTEM_CHECKS = ["django_ratelimit.E003", "django_ratelimit.W001"]
 
+# API de mapa do explore
+# Número máximo de lugares aceito no parâmetro ?limit= de /explore/api/map-data/
+MAP_DATA_MAX_LIMIT = config("MAP_DATA_MAX_LIMIT", default=1000, cast=int)
+# Lugares lidos do banco (e enviados) por bloco no modo ?stream=1
+MAP_DATA_STREAM_CHUNK_SIZE = config("MAP_DATA_STREAM_CHUNK_SIZE", default=500, cast=int)
+# Dias de histórico de PlaceChange mantidos por "manage.py prune_place_changes"
+# (clientes com uma versão mais antiga recebem o mapa completo)
+PLACE_CHANGE_RETENTION_DAYS = config(
+    "PLACE_CHANGE_RETENTION_DAYS", default=30, cast=int
+)
+# Versões abaixo de ?since= relidas a cada delta: alterações de transações
+# concorrentes confirmadas fora da ordem dos ids não se perdem
+PLACE_CHANGE_SYNC_OVERLAP = config("PLACE_CHANGE_SYNC_OVERLAP", default=100, cast=int)
+# Número máximo de IDs aceito por /explore/api/places-by-ids/
+PLACES_BY_IDS_MAX = config("PLACES_BY_IDS_MAX", default=100, cast=int)
+# Tempo de cache dos fragmentos JSON de cada lugar (em segundos)
+PLACE_FRAGMENT_CACHE_TIMEOUT = config(
+    "PLACE_FRAGMENT_CACHE_TIMEOUT", default=3600, cast=int
+)
+# Limites de /explore/api/nearby/ (raio em km e número de lugares)
+NEARBY_MAX_RADIUS_KM = config("NEARBY_MAX_RADIUS_KM", default=50, cast=float)
+NEARBY_MAX_RESULTS = config("NEARBY_MAX_RESULTS", default=100, cast=int)
+# Número máximo de sugestões de /explore/api/suggest/ (?limit=)
+SUGGEST_MAX_RESULTS = config("SUGGEST_MAX_RESULTS", default=20, cast=int)
+# Buscas do explore com menos resultados que isto são completadas com lugares
+# de nome parecido (busca aproximada por trigramas); 0 desativa
+FUZZY_SEARCH_MIN_RESULTS = config("FUZZY_SEARCH_MIN_RESULTS", default=3, cast=int)
+# Buscas com mais resultados que isto não entram no cache de resultados
+SEARCH_CACHE_MAX_RESULTS = config("SEARCH_CACHE_MAX_RESULTS", default=200, cast=int)
+# Zoom a partir do qual /explore/api/map-clusters/ retorna lugares individuais
+MAP_CLUSTER_MAX_ZOOM = config("MAP_CLUSTER_MAX_ZOOM", default=15, cast=int)
+# Tiles de /explore/api/tiles/<z>/<x>/<y>.json (cache por tile, em segundos)
+MAP_TILE_MAX_ZOOM = config("MAP_TILE_MAX_ZOOM", default=18, cast=int)
+MAP_TILE_CACHE_TIMEOUT = config("MAP_TILE_CACHE_TIMEOUT", default=3600, cast=int)
+
+# Ordenação por avaliação (?sort=rating): média bayesiana das notas
+# Cada lugar conta como se tivesse RATING_PRIOR_WEIGHT avaliações extras
+# com nota RATING_PRIOR_MEAN (após alterar, rode rebuild_place_stats)
+RATING_PRIOR_MEAN = config("RATING_PRIOR_MEAN", default=3.0, cast=float)
+RATING_PRIOR_WEIGHT = config("RATING_PRIOR_WEIGHT", default=5, cast=int)
+
+# Lugares em alta (landing): pontuação calculada por "manage.py update_trending"
+# Atividades dos últimos TRENDING_WINDOW_DAYS dias, com peso reduzido à metade
+# a cada TRENDING_HALF_LIFE_DAYS dias
+TRENDING_WINDOW_DAYS = config("TRENDING_WINDOW_DAYS", default=14, cast=int)
+TRENDING_HALF_LIFE_DAYS = config("TRENDING_HALF_LIFE_DAYS", default=3, cast=float)
+
+# Ranking de contribuidores (/accounts/contribuidores/)
+# Número de usuários exibidos e tempo de cache para visitantes anônimos (segundos)
+LEADERBOARD_SIZE = config("LEADERBOARD_SIZE", default=50, cast=int)
+LEADERBOARD_CACHE_TIMEOUT = config("LEADERBOARD_CACHE_TIMEOUT", default=300, cast=int)
+
+# Backend da busca textual de lugares e notícias (apps/core/search.py):
+# "auto" (nativo do banco: FTS5 no SQLite, tsvector no PostgreSQL), "fts5",
+# "postgres", "terms" (índice invertido portátil) ou "icontains" (sem índice)
+# Após trocar, rode "manage.py rebuild_search_index"
+SEARCH_BACKEND = config("SEARCH_BACKEND", default="auto")
+
 # Configuração de testes
 # Usar executor de testes personalizado para excluir .github da descoberta de testes
 TEST_RUNNER = "config.test_runner.CustomTestRunner"
@@ -0,0 +1,92 @@
+/**
+ * Sugestões da caixa de busca enquanto se digita
+ * Consulta /explore/api/suggest/ (índice de prefixos em memória no servidor)
+ * e mostra lugares, categorias e notícias abaixo de inputs com data-suggest-url
+ */
+
+const SUGGEST_DELAY_MS = 120;
+
+const SUGGEST_ICONS = {
+  place: 'bi-geo-alt',
+  category: 'bi-tag',
+  news: 'bi-newspaper',
+};
+
+function initSearchSuggest(input) {
+  const list = document.createElement('div');
+  list.className = 'list-group position-absolute w-100 shadow-sm d-none';
+  list.style.zIndex = 1050;
+  list.style.top = '100%';
+  input.parentNode.style.position = 'relative';
+  input.parentNode.appendChild(list);
+  input.setAttribute('autocomplete', 'off');
+
+  let timer = null;
+  let controller = null;
+
+  function hide() {
+    list.classList.add('d-none');
+    list.replaceChildren();
+  }
+
+  function render(suggestions) {
+    list.replaceChildren();
+    suggestions.forEach((suggestion) => {
+      const item = document.createElement('a');
+      item.className = 'list-group-item list-group-item-action d-flex align-items-center gap-2';
+      item.href = suggestion.url;
+      const icon = document.createElement('i');
+      icon.className = `bi ${SUGGEST_ICONS[suggestion.type] || 'bi-search'} text-muted`;
+      const label = document.createElement('span');
+      label.textContent = suggestion.label;
+      item.append(icon, label);
+      list.appendChild(item);
+    });
+    list.classList.toggle('d-none', suggestions.length === 0);
+  }
+
+  async function fetchSuggestions(query) {
+    // Cancelar a requisição anterior: apenas a última digitação importa
+    if (controller) {
+      controller.abort();
+    }
+    controller = new AbortController();
+    const url = new URL(input.dataset.suggestUrl, window.location.origin);
+    url.searchParams.set('q', query);
+    try {
+      const response = await fetch(url, { signal: controller.signal });
+      if (!response.ok) {
+        return;
+      }
+      const data = await response.json();
+      render(data.suggestions);
+    } catch (error) {
+      if (error.name !== 'AbortError') {
+        console.error('Erro ao buscar sugestões:', error);
+      }
+    }
+  }
+
+  input.addEventListener('input', () => {
+    clearTimeout(timer);
+    const query = input.value.trim();
+    if (!query) {
+      hide();
+      return;
+    }
+    timer = setTimeout(() => fetchSuggestions(query), SUGGEST_DELAY_MS);
+  });
+
+  input.addEventListener('keydown', (e) => {
+    if (e.key === 'Escape') {
+      hide();
+    }
+  });
+
+  // Esperar o clique na sugestão antes de esconder a lista
+  input.addEventListener('blur', () => setTimeout(hide, 150));
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+  document.querySelectorAll('input[data-suggest-url]').forEach(initSearchSuggest);
+});
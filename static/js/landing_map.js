@@ -1,12 +1,26 @@
 /**
  * Google Maps Interativo para Página Inicial
- * Mostra todos os locais com marcadores clicáveis e janelas de informação
+ * Mostra os locais da área visível com marcadores clicáveis e janelas de informação
+ * Em zoom baixo os locais chegam agrupados pelo servidor (clusters)
+ * Em zoom alto os locais vêm de uma cópia local, sincronizada de forma incremental
+ * apenas quando o mapa chega a esse zoom pela primeira vez (em zoom baixo a
+ * lista completa de locais não é baixada)
  */
 
 let landingMap;
-let markers = [];
+let markers = new Map();
 let infoWindow;
 let markerCluster;
+let fetchController;
+
+// Deve corresponder a MAP_CLUSTER_MAX_ZOOM nas configurações do Django
+const MAP_CLUSTER_MAX_ZOOM = 15;
+const PLACE_STORE_KEY = 'maricacity_map_places';
+
+// Cópia local dos locais do mapa: { version, places: { id: place } }
+let placeStore = { version: 0, places: {} };
+// Promessa da sincronização (null até o primeiro zoom alto)
+let placeStoreReady = null;
 
 async function initLandingMap() {
   const mapContainer = document.getElementById('landing-map');
@@ -35,26 +49,223 @@ async function initLandingMap() {
   // Criar instância única de janela de informação (reutilizada para todos os marcadores)
   infoWindow = new google.maps.InfoWindow();
 
-  // Buscar dados dos locais
+  // Buscar os locais sempre que o mapa parar de se mover
+  landingMap.addListener('idle', fetchVisiblePlaces);
+}
+
+function loadPlaceStore() {
   try {
-    const response = await fetch('/explore/api/map-data/');
+    const stored = JSON.parse(localStorage.getItem(PLACE_STORE_KEY));
+    if (stored && stored.version && stored.places) {
+      placeStore = stored;
+    }
+  } catch (error) {
+    localStorage.removeItem(PLACE_STORE_KEY);
+  }
+}
+
+async function syncPlaceStore() {
+  loadPlaceStore();
+
+  // Visitantes que já têm uma cópia baixam apenas o que mudou desde a última visita
+  const url = placeStore.version
+    ? `/explore/api/map-data/?format=columnar&since=${placeStore.version}`
+    : '/explore/api/map-data/?format=columnar';
+
+  try {
+    const response = await fetch(url);
     const data = await response.json();
+    data.places = decodeColumnarPlaces(data);
+
+    // Com "reset", a versão local é anterior ao histórico mantido no servidor:
+    // a resposta traz todos os locais e substitui a cópia inteira
+    const deletedIds = data.reset ? Object.keys(placeStore.places) : (data.deleted || []);
+    if (!placeStore.version || data.reset) {
+      placeStore.places = {};
+    }
+    if (!data.reset) {
+      deletedIds.forEach(id => {
+        delete placeStore.places[id];
+      });
+    }
+    data.places.forEach(place => {
+      placeStore.places[place.id] = place;
+    });
+    placeStore.version = data.version;
+
+    patchMarkers(data.places, deletedIds);
+    localStorage.setItem(PLACE_STORE_KEY, JSON.stringify(placeStore));
+  } catch (error) {
+    console.error('Erro ao sincronizar dados dos locais:', error);
+  }
+}
+
+/**
+ * Converter o formato colunar da API (?format=columnar) em objetos de local
+ * Coordenadas vêm em micrograus codificados por diferença; categorias e
+ * imagens vêm como índices para as tabelas "categories" e "images"
+ */
+function decodeColumnarPlaces(data) {
+  const columns = data.columns;
+  const places = [];
+  let lat = 0;
+  let lng = 0;
+
+  columns.id.forEach((id, index) => {
+    lat += columns.latitude[index];
+    lng += columns.longitude[index];
+    const [category, categoryIcon] = data.categories[columns.category[index]];
+    const image = columns.image[index];
+
+    places.push({
+      id,
+      name: columns.name[index],
+      description: columns.description[index],
+      latitude: lat / 1e6,
+      longitude: lng / 1e6,
+      image_url: image >= 0 ? data.images[image] : null,
+      category,
+      category_icon: categoryIcon,
+      url: data.url_template.replace('{id}', id),
+      rating: columns.rating[index],
+      review_count: columns.review_count[index],
+    });
+  });
+
+  return places;
+}
+
+function patchMarkers(changedPlaces, deletedIds) {
+  // Atualizar no lugar os marcadores individuais que já estão no mapa
+  [...changedPlaces.map(place => place.id), ...deletedIds].forEach(id => {
+    const marker = markers.get(`place:${id}`);
+    if (marker) {
+      marker.setMap(null);
+      markers.delete(`place:${id}`);
+    }
+  });
+
+  if (landingMap.getZoom() >= MAP_CLUSTER_MAX_ZOOM) {
+    showStoredPlaces();
+  }
+}
+
+function showStoredPlaces() {
+  const bounds = landingMap.getBounds();
+  if (!bounds) return;
+
+  const places = Object.values(placeStore.places).filter(place =>
+    bounds.contains({ lat: place.latitude, lng: place.longitude })
+  );
+  syncMarkers(places, []);
+  updatePlaceCount(places.length);
+}
 
-    if (data.places && data.places.length > 0) {
-      // Criar marcadores para todos os locais
-      createMarkers(data.places);
+function getBBoxParam() {
+  const bounds = landingMap.getBounds();
+  if (!bounds) return null;
 
-      // Ajustar mapa para mostrar todos os marcadores
-      fitMapToMarkers();
+  const sw = bounds.getSouthWest();
+  const ne = bounds.getNorthEast();
+  return [sw.lat(), sw.lng(), ne.lat(), ne.lng()].map(v => v.toFixed(6)).join(',');
+}
+
+async function fetchVisiblePlaces() {
+  const bbox = getBBoxParam();
+  if (!bbox) return;
+
+  // Cancelar a requisição anterior se o mapa se moveu novamente
+  if (fetchController) {
+    fetchController.abort();
+  }
+  fetchController = new AbortController();
+
+  const zoom = landingMap.getZoom();
+
+  // Zoom alto: usar a cópia local, sincronizada uma vez por página
+  if (zoom >= MAP_CLUSTER_MAX_ZOOM) {
+    if (!placeStoreReady) {
+      placeStoreReady = syncPlaceStore();
     }
+    await placeStoreReady;
+    showStoredPlaces();
+    return;
+  }
+
+  try {
+    const response = await fetch(
+      `/explore/api/map-clusters/?zoom=${zoom}&bbox=${bbox}`,
+      { signal: fetchController.signal }
+    );
+    const data = await response.json();
+
+    syncMarkers(data.places || [], data.clusters || []);
 
     // Atualizar contagem de locais
     updatePlaceCount(data.count);
   } catch (error) {
-    console.error('Erro ao buscar dados dos locais:', error);
+    if (error.name !== 'AbortError') {
+      console.error('Erro ao buscar dados dos locais:', error);
+    }
   }
 }
 
+function syncMarkers(places, clusters) {
+  const visibleKeys = new Set([
+    ...places.map(place => `place:${place.id}`),
+    ...clusters.map(cluster => clusterKey(cluster)),
+  ]);
+
+  // Remover marcadores que saíram da área visível ou mudaram de agrupamento
+  markers.forEach((marker, key) => {
+    if (!visibleKeys.has(key)) {
+      marker.setMap(null);
+      markers.delete(key);
+    }
+  });
+
+  // Criar apenas os marcadores que ainda não existem
+  createMarkers(places.filter(place => !markers.has(`place:${place.id}`)));
+  createClusterMarkers(clusters.filter(cluster => !markers.has(clusterKey(cluster))));
+}
+
+function clusterKey(cluster) {
+  // A contagem faz parte da chave para atualizar o rótulo quando ela muda
+  return `cluster:${cluster.geohash}:${cluster.count}`;
+}
+
+function createClusterMarkers(clusters) {
+  clusters.forEach(cluster => {
+    const position = { lat: cluster.latitude, lng: cluster.longitude };
+    const marker = new google.maps.Marker({
+      position,
+      map: landingMap,
+      title: `${cluster.category_icon} ${cluster.count} locais`,
+      label: {
+        text: String(cluster.count),
+        color: 'white',
+        fontWeight: '600',
+      },
+      icon: {
+        path: google.maps.SymbolPath.CIRCLE,
+        scale: 14 + Math.min(Math.log10(cluster.count) * 6, 16),
+        fillColor: '#c1121f',
+        fillOpacity: 0.9,
+        strokeColor: 'white',
+        strokeWeight: 2,
+      },
+    });
+
+    // Clicar no agrupamento aproxima o mapa
+    marker.addListener('click', () => {
+      landingMap.panTo(position);
+      landingMap.setZoom(landingMap.getZoom() + 2);
+    });
+
+    markers.set(clusterKey(cluster), marker);
+  });
+}
+
 function createMarkers(places) {
   places.forEach(place => {
     const marker = new google.maps.Marker({
@@ -72,7 +283,7 @@ function createMarkers(places) {
       showInfoWindow(marker);
     });
 
-    markers.push(marker);
+    markers.set(`place:${place.id}`, marker);
   });
 }
 
@@ -127,22 +338,6 @@ function showInfoWindow(marker) {
   infoWindow.open(landingMap, marker);
 }
 
-function fitMapToMarkers() {
-  if (markers.length === 0) return;
-
-  const bounds = new google.maps.LatLngBounds();
-  markers.forEach(marker => {
-    bounds.extend(marker.getPosition());
-  });
-
-  landingMap.fitBounds(bounds);
-
-  // Não dar zoom demais se houver apenas um marcador
-  if (markers.length === 1) {
-    landingMap.setZoom(15);
-  }
-}
-
 function updatePlaceCount(count) {
   const countElement = document.getElementById('map-place-count');
   if (countElement) {